@@ -0,0 +1,611 @@
+import argparse
+import glob
+import hashlib
+import os
+import re
+from xml.sax.saxutils import escape
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from functools import lru_cache
+
+from PIL import Image, ImageSequence
+import numpy as np
+
+ASCII_CHARS = [
+    " ", ".", ":", "-", "=", "+", "*", "#", "%", "@", "M", "W", "8", "8", "B", "8", "8", "8", "8"
+]
+
+@lru_cache(maxsize=None)
+def glyph_lut(density):
+    """256-entry table mapping a gray level to the byte of its ASCII glyph."""
+    ascii_chars = ASCII_CHARS[:density]
+    codes = np.frombuffer("".join(ascii_chars).encode("ascii"), dtype=np.uint8)
+    lut = codes[np.arange(256) * len(ascii_chars) // 256]
+    lut.setflags(write=False)
+    return lut
+
+def glyph_array(pixels, density):
+    """Map a 2-D uint8 gray image to a same-shaped array of glyph bytes."""
+    return glyph_lut(density)[pixels]
+
+def glyphs_to_text(glyphs):
+    """Join a 2-D array of glyph bytes into newline-separated rows."""
+    height, width = glyphs.shape
+    out = np.empty((height, width + 1), dtype=np.uint8)
+    out[:, :width] = glyphs
+    out[:, width] = ord("\n")
+    return out.tobytes()[:-1].decode("ascii")
+
+def map_glyphs(pixels, density):
+    """Map a 2-D uint8 gray image to newline-separated rows of glyphs."""
+    return glyphs_to_text(glyph_array(pixels, density))
+
+def load_gray(image_path, width, height):
+    """Decode and downsample an image to a width x height grayscale image.
+
+    JPEGs are decoded at a reduced scale (draft mode) and large images are
+    box-reduced before the final resize, so the full-resolution image is
+    never held in memory as RGB.
+    """
+    img = Image.open(image_path)
+    img.draft("L", (width * 2, height * 2))
+    return downsample(img, width, height)
+
+def downsample(img, width, height):
+    """Convert an open image to grayscale and resize it to width x height."""
+    img = img.convert("L")
+    factor = min(img.width // (width * 2), img.height // (height * 2))
+    if factor > 1:
+        img = img.reduce(factor)
+    return img.resize((width, height))
+
+def tone_luts(histogram, brightness, contrast, invert):
+    """Fuse brightness, contrast and invert into 256-entry tables.
+
+    Matches ImageEnhance: brightness scales each level, contrast blends with
+    the mean level of the brightened image, and both truncate and clip.
+    The settings may be equal-length arrays, giving one table per row.
+    """
+    levels = np.arange(256, dtype=np.float64)
+    brightness = np.asarray(brightness, dtype=np.float64).reshape(-1, 1)
+    contrast = np.asarray(contrast, dtype=np.float64).reshape(-1, 1)
+    invert = np.asarray(invert, dtype=bool).reshape(-1, 1)
+    bright = np.clip(np.trunc(levels * brightness), 0, 255)
+    histogram = np.asarray(histogram, dtype=np.float64)
+    mean = np.floor(bright @ histogram / max(histogram.sum(), 1) + 0.5).reshape(-1, 1)
+    toned = np.clip(np.trunc(mean + contrast * (bright - mean)), 0, 255)
+    toned = np.where(invert, 255 - toned, toned)
+    return toned.astype(np.uint8)
+
+def tone_lut(histogram, brightness=1.0, contrast=1.0, invert=False):
+    """Single-setting tone_luts, as a flat 256-entry table."""
+    return tone_luts(histogram, brightness, contrast, invert)[0]
+
+def image_to_ascii(image_path, width, height, density=10, invert=False, brightness=1.0, contrast=1.0):
+    img = load_gray(image_path, width, height)
+    img = img.point(tone_lut(img.histogram(), brightness, contrast, invert).tolist())
+
+    # Get pixel values and map to ASCII characters
+    return map_glyphs(np.asarray(img, dtype=np.uint8), density)
+
+def svg_row(line, x, y, collapse_runs=0, advance=0.6):
+    """Emit one art row as <tspan> markup.
+
+    Trailing blanks are dropped and glyphs are XML-escaped. With
+    ``collapse_runs`` set, runs of at least that many spaces are replaced by
+    a sibling <tspan> shifted with ``dx`` wherever that markup is shorter
+    than the run; the shift assumes a monospace advance of ``advance`` em
+    (0.6 for Andale Mono).
+    """
+    line = line.rstrip(" ")
+    parts = [f'<tspan x="{x}" y="{y}">']
+    start = 0
+    if collapse_runs:
+        for run in re.finditer(" {%d,}" % collapse_runs, line):
+            dx = f'dx="{len(run.group()) * advance:g}em"'
+            if run.start() == 0:
+                # A leading run shifts the row's own tspan instead.
+                if len(dx) + 1 < len(run.group()):
+                    parts[0] = f'<tspan x="{x}" y="{y}" {dx}>'
+                    start = run.end()
+                continue
+            shift = f"</tspan><tspan {dx}>"
+            if len(shift) < len(run.group()):
+                parts.append(escape(line[start:run.start()]) + shift)
+                start = run.end()
+    parts.append(escape(line[start:]) + "</tspan>")
+    return "".join(parts)
+
+def ascii_to_svg(ascii_art, font_size=15, line_height=20, x=15, y=30, fill="#24292f",
+                 collapse_runs=0, stats=None):
+    """Wrap ASCII art in an SVG <text> block, one row per line_height.
+
+    Rows start one line below ``y``, leaving the first line blank. Pass a
+    dict as ``stats`` to get the output size and the size of the same art
+    emitted with every space kept literally.
+    """
+    lines = ascii_art.split("\n")
+    rows = [
+        svg_row(line, x, y + (i + 1) * line_height, collapse_runs, 0.6)
+        for i, line in enumerate(lines)
+        if line.strip(" ")
+    ]
+    header = f'<text x="{x}" y="{y}" fill="{fill}" class="ascii">'
+    svg_template = "\n".join([header] + rows + ["</text>"])
+    if stats is not None:
+        stats["bytes"] = len(svg_template.encode("utf-8"))
+        stats["untrimmed_bytes"] = len(header) + len("\n</text>") + sum(
+            len(f'\n<tspan x="{x}" y="{y + (i + 1) * line_height}">{line}</tspan>')
+            for i, line in enumerate(lines)
+        )
+    return svg_template
+
+def savings(stats):
+    saved = stats["untrimmed_bytes"] - stats["bytes"]
+    return f"{stats['bytes']:,} bytes, {saved:,} ({saved / max(stats['untrimmed_bytes'], 1):.0%}) saved"
+
+def sweep_variants(densities, brightnesses, contrasts, inverts):
+    """Every combination of the given settings, as a list of dicts."""
+    return [
+        {"density": density, "brightness": brightness, "contrast": contrast, "invert": invert}
+        for density in densities
+        for invert in inverts
+        for brightness in brightnesses
+        for contrast in contrasts
+    ]
+
+def sweep_ascii(image_path, width, height, variants):
+    """Render one image under many settings in a single batched lookup.
+
+    The image is decoded and downsampled once. Each variant's tone table is
+    composed with its density's glyph table into one 256-entry byte table,
+    and all variants are rendered by indexing the stacked (variants x 256)
+    tables with the pixel array, giving a (variants x H x W) glyph array.
+    """
+    img = load_gray(image_path, width, height)
+    pixels = np.asarray(img, dtype=np.uint8)
+    tones = tone_luts(
+        img.histogram(),
+        [variant["brightness"] for variant in variants],
+        [variant["contrast"] for variant in variants],
+        [variant["invert"] for variant in variants],
+    )
+    glyphs = np.stack([glyph_lut(variant["density"]) for variant in variants])
+    luts = np.take_along_axis(glyphs, tones.astype(np.intp), axis=1)
+    out = np.empty((len(variants), height, width + 1), dtype=np.uint8)
+    out[:, :, :width] = luts[:, pixels]
+    out[:, :, width] = ord("\n")
+    return [variant_out.tobytes()[:-1].decode("ascii") for variant_out in out]
+
+def variant_label(variant):
+    return "d={density} b={brightness:g} c={contrast:g}{inv}".format(
+        inv=" inv" if variant["invert"] else "", **variant
+    )
+
+def contact_sheet_svg(arts, variants, columns=6, font_size=6, line_height=7):
+    """Lay out rendered variants as a labelled grid in one SVG document."""
+    rows = arts[0].split("\n")
+    cell_width = len(rows[0]) * font_size * 0.6 + 20
+    cell_height = (len(rows) + 2) * line_height + 10
+    parts = []
+    for index, (art, variant) in enumerate(zip(arts, variants)):
+        x = 10 + (index % columns) * cell_width
+        y = 10 + (index // columns) * cell_height
+        parts.append(f'<g transform="translate({x:g},{y:g})">')
+        parts.append(f'<text y="{line_height}" class="label">{escape(variant_label(variant))}</text>')
+        parts.append(f'<text y="{line_height * 2}" class="art">')
+        parts += [
+            f'<tspan x="0" dy="{line_height if i else 0}">{escape(line)}</tspan>'
+            for i, line in enumerate(art.split("\n"))
+        ]
+        parts.append("</text></g>")
+    total_rows = -(-len(arts) // columns)
+    return "\n".join(
+        [
+            '<svg xmlns="http://www.w3.org/2000/svg" '
+            'font-family="Andale Mono,AndaleMono,Consolas,monospace" '
+            f'width="{columns * cell_width + 20:g}" height="{total_rows * cell_height + 20:g}" '
+            f'font-size="{font_size}px">',
+            "<style>text, tspan {white-space: pre;} .label {fill: #8b949e;} .art {fill: #24292f;}</style>",
+        ]
+        + parts
+        + ["</svg>"]
+    )
+
+def contact_sheet_html(arts, variants, columns=6):
+    """Lay out rendered variants as a labelled grid in one HTML page."""
+    cells = [
+        f"<figure><figcaption>{escape(variant_label(variant))}</figcaption>"
+        f"<pre>{escape(art)}</pre></figure>"
+        for art, variant in zip(arts, variants)
+    ]
+    return "\n".join(
+        [
+            "<!DOCTYPE html>",
+            '<meta charset="utf-8"><title>ASCII art sweep</title>',
+            "<style>body {display: grid; grid-template-columns: repeat(%d, max-content); gap: 12px;"
+            " font: 6px/7px monospace;} figure {margin: 0;} figcaption {color: #8b949e;}</style>" % columns,
+        ]
+        + cells
+    )
+
+def iter_frames(source, width, height, frame_duration=100):
+    """Yield (gray image, duration in ms) for each frame of an animation.
+
+    ``source`` is an animated GIF/APNG (any single image gives one frame) or
+    a directory of frame images, read in name order. Frames are decoded and
+    downsampled one at a time, so only the current frame is held in memory.
+    """
+    if os.path.isdir(source):
+        for path in expand_inputs([source]):
+            yield load_gray(path, width, height), frame_duration
+        return
+    with Image.open(source) as img:
+        for frame in ImageSequence.Iterator(img):
+            yield downsample(frame, width, height), frame.info.get("duration") or frame_duration
+
+def frame_glyphs(frames, density=10, invert=False, brightness=1.0, contrast=1.0):
+    """Turn (gray image, duration) frames into (glyph array, duration).
+
+    Each frame is toned against its own histogram, exactly like a still
+    rendered with image_to_ascii.
+    """
+    for img, duration in frames:
+        img = img.point(tone_lut(img.histogram(), brightness, contrast, invert).tolist())
+        yield glyph_array(np.asarray(img, dtype=np.uint8), density), duration
+
+def dedupe_frames(frames, threshold=0.0, stats=None):
+    """Merge consecutive frames that differ in at most ``threshold`` of their glyphs.
+
+    A merged frame extends the duration of the last frame kept; comparing
+    against that frame rather than the previous input frame stops slow fades
+    from drifting through unnoticed. Pass a dict as ``stats`` to count the
+    frames read and kept.
+    """
+    held = None
+    for glyphs, duration in frames:
+        if stats is not None:
+            stats["frames"] = stats.get("frames", 0) + 1
+        if held is not None and np.count_nonzero(held[0] != glyphs) <= threshold * glyphs.size:
+            held[1] += duration
+            continue
+        if held is not None:
+            yield tuple(held)
+        held = [glyphs, duration]
+    if held is not None:
+        yield tuple(held)
+
+def animated_svg(frames, out, font_size=15, line_height=20, x=15, y=30, fill="#24292f",
+                 collapse_runs=0):
+    """Stream (glyph array, duration) frames into an animated SVG on ``out``.
+
+    Every distinct row is written once as a <text> in <defs>, and each
+    distinct frame is a group of <use> references to its rows, so frames
+    sharing rows, and frames that come back later (A B A B), cost only a
+    few bytes each. A CSS keyframe animation per frame group makes it
+    visible during its time windows in the loop. Rows and groups are written
+    as frames arrive; only the row and frame-hash tables and the timeline
+    are kept, never the frames themselves. Returns size stats.
+    """
+    rows = {}  # row text -> id of its <text>
+    groups = {}  # frame content hash -> group index
+    windows = []  # per group, the (start, duration) spans it is shown for
+    elapsed = 0
+    written = 0
+
+    def write(text):
+        nonlocal written
+        out.write(text)
+        written += len(text.encode("utf-8"))
+
+    for glyphs, duration in frames:
+        if not windows:
+            height, width = glyphs.shape
+            write(
+                '<svg xmlns="http://www.w3.org/2000/svg" '
+                'font-family="Andale Mono,AndaleMono,Consolas,monospace" '
+                f'width="{2 * x + width * font_size * 0.6:g}" '
+                f'height="{y + (height + 1) * line_height:g}" font-size="{font_size}px">\n'
+                f'<g fill="{fill}" class="ascii">\n'
+            )
+        digest = hashlib.blake2b(glyphs.tobytes(), digest_size=16).digest()
+        if digest not in groups:
+            groups[digest] = len(windows)
+            windows.append([])
+            defs, uses = [], []
+            for i, line in enumerate(glyphs_to_text(glyphs).split("\n")):
+                line = line.rstrip(" ")
+                if not line:
+                    continue
+                if line not in rows:
+                    rows[line] = f"r{len(rows)}"
+                    body = svg_row(line, x, 0, collapse_runs) if collapse_runs else escape(line)
+                    defs.append(f'<text id="{rows[line]}" x="{x}">{body}</text>')
+                uses.append(f'<use href="#{rows[line]}" y="{y + (i + 1) * line_height}"/>')
+            if defs:
+                write("<defs>" + "".join(defs) + "</defs>\n")
+            write(f'<g id="f{groups[digest]}" class="f">' + "".join(uses) + "</g>\n")
+        windows[groups[digest]].append((elapsed, duration))
+        elapsed += duration
+
+    if not windows:
+        raise Exception("Animation has no frames")
+    css = [
+        "text {white-space: pre;}",
+        f".f {{visibility: hidden; animation: {elapsed}ms steps(1, end) infinite;}}",
+    ]
+    for index, spans in enumerate(windows):
+        keyframes = []
+        for start, duration in spans:
+            keyframes.append(f"{round(100 * start / elapsed, 4):g}% {{visibility: visible}}")
+            keyframes.append(f"{round(100 * (start + duration) / elapsed, 4):g}% {{visibility: hidden}}")
+        css.append(f"#f{index} {{animation-name: a{index};}} @keyframes a{index} {{{' '.join(keyframes)}}}")
+    write("</g>\n<style>" + "\n".join(css) + "</style>\n</svg>\n")
+    return {"frames": len(windows), "rows": len(rows), "duration": elapsed, "bytes": written}
+
+# Defaults
+IMAGE_PATH = "a.png"  # Replace with your image path
+OUTPUT_PATH = "ascii_art.svg"
+WIDTH = 36  # Number of characters in width
+HEIGHT = 23  # Number of lines
+
+# Controls
+DENSITY = 13  # Number of ASCII characters to use (1-17, where 17 is the most detailed)
+INVERT = False  # Invert the colors (True/False)
+BRIGHTNESS = 1  # Adjust brightness (1.0 = default)
+CONTRAST = 1  # Adjust contrast (1.0 = default)
+
+CACHE_DIR = os.path.join("cache", "ascii")  # Rendered art keyed by image + settings
+CACHE_MAX_BYTES = 8 * 1024 * 1024
+RENDER_VERSION = 1  # Bump when a change to the pipeline alters its output
+
+IMAGE_EXTENSIONS = {".png", ".jpg", ".jpeg", ".gif", ".bmp", ".webp", ".tif", ".tiff"}
+
+def render_key(image_path, params):
+    """Content hash of the image bytes plus every setting that affects output."""
+    digest = hashlib.sha256()
+    with open(image_path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    settings = (RENDER_VERSION,) + tuple(sorted(params.items()))
+    digest.update(repr(settings).encode("utf-8"))
+    return digest.hexdigest()
+
+def evict(cache_dir, max_bytes):
+    """Drop least recently used entries until the cache fits in max_bytes."""
+    entries = []
+    for name in os.listdir(cache_dir):
+        if name.endswith(".txt"):
+            stat = os.stat(os.path.join(cache_dir, name))
+            entries.append((stat.st_mtime, stat.st_size, name))
+    total = sum(size for _, size, _ in entries)
+    for _, size, name in sorted(entries):
+        if total <= max_bytes:
+            break
+        try:
+            os.remove(os.path.join(cache_dir, name))
+        except FileNotFoundError:
+            pass
+        total -= size
+
+def cached_image_to_ascii(image_path, cache_dir=CACHE_DIR, max_bytes=CACHE_MAX_BYTES, **params):
+    """image_to_ascii backed by an on-disk cache; returns (ascii_art, hit)."""
+    key = render_key(image_path, params)
+    entry = os.path.join(cache_dir, key + ".txt")
+    try:
+        with open(entry) as f:
+            ascii_art = f.read()
+        os.utime(entry)  # mark as recently used
+        return ascii_art, True
+    except FileNotFoundError:
+        pass
+    ascii_art = image_to_ascii(image_path, **params)
+    os.makedirs(cache_dir, exist_ok=True)
+    tmp = f"{entry}.{os.getpid()}.tmp"
+    with open(tmp, "w") as f:
+        f.write(ascii_art)
+    os.replace(tmp, entry)
+    evict(cache_dir, max_bytes)
+    return ascii_art, False
+
+def render_file(image_path, output_path, params, cache_dir=None, max_bytes=CACHE_MAX_BYTES,
+                svg_options=None):
+    """Render one image to an SVG fragment on disk; runs in a worker process.
+
+    Returns (image_path, output_path, stats) with the ascii_to_svg size stats.
+    """
+    if cache_dir:
+        ascii_art, _ = cached_image_to_ascii(image_path, cache_dir, max_bytes, **params)
+    else:
+        ascii_art = image_to_ascii(image_path, **params)
+    stats = {}
+    svg_output = ascii_to_svg(ascii_art, stats=stats, **(svg_options or {}))
+    with open(output_path, "w") as svg_file:
+        svg_file.write(svg_output)
+    return image_path, output_path, stats
+
+def expand_inputs(inputs):
+    """Resolve files, directories and glob patterns to a sorted list of images."""
+    paths = []
+    for item in inputs:
+        if os.path.isdir(item):
+            paths += sorted(
+                os.path.join(item, name)
+                for name in os.listdir(item)
+                if os.path.splitext(name)[1].lower() in IMAGE_EXTENSIONS
+            )
+        elif glob.has_magic(item):
+            paths += sorted(glob.glob(item))
+        else:
+            paths.append(item)
+    return paths
+
+def batch_outputs(image_paths, out_dir):
+    """Pair each image with <name>.svg in ``out_dir``.
+
+    Images sharing a name (a/logo.png and b/logo.jpg) would overwrite each
+    other's output, so those get a short hash of their path appended.
+    """
+    paths = list(dict.fromkeys(os.path.normpath(path) for path in image_paths))
+    stems = [os.path.splitext(os.path.basename(path))[0] for path in paths]
+    counts = {}
+    for stem in stems:
+        counts[stem.lower()] = counts.get(stem.lower(), 0) + 1
+    jobs = []
+    for path, stem in zip(paths, stems):
+        if counts[stem.lower()] > 1:
+            stem += "-" + hashlib.sha1(path.encode("utf-8")).hexdigest()[:8]
+        jobs.append((path, os.path.join(out_dir, stem + ".svg")))
+    return jobs
+
+def render_batch(jobs, params, workers=None, max_in_flight=None, cache_dir=None,
+                 max_bytes=CACHE_MAX_BYTES, svg_options=None):
+    """Render (image_path, output_path) pairs with a process pool.
+
+    At most ``max_in_flight`` images (default: two per worker) are queued at
+    once, so memory stays bounded however many images there are. Yields
+    (image_path, output_path) as renders finish.
+    """
+    workers = workers or os.cpu_count() or 1
+    max_in_flight = max_in_flight or workers * 2
+    jobs = iter(jobs)
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pending = set()
+        while True:
+            for image_path, output_path in jobs:
+                pending.add(pool.submit(
+                    render_file, image_path, output_path, params, cache_dir, max_bytes,
+                    svg_options,
+                ))
+                if len(pending) >= max_in_flight:
+                    break
+            if not pending:
+                return
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                yield future.result()
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Render images as ASCII art SVG fragments."
+    )
+    parser.add_argument(
+        "inputs", nargs="*", default=[IMAGE_PATH],
+        help="image files, directories or glob patterns (default: %(default)s)",
+    )
+    parser.add_argument(
+        "-o", "--output", help=f"output for a single image or sweep (default: {OUTPUT_PATH})"
+    )
+    parser.add_argument("--out-dir", help="write one <name>.svg per image into this directory (<name>-<hash>.svg for shared names)")
+    parser.add_argument("-j", "--jobs", type=int, help="worker processes (default: one per core)")
+    parser.add_argument("--cache-dir", default=CACHE_DIR, help="render cache (default: %(default)s)")
+    parser.add_argument("--cache-size", type=int, default=CACHE_MAX_BYTES, help="cache size in bytes")
+    parser.add_argument("--no-cache", action="store_true", help="always re-render")
+    parser.add_argument("--fill", default="#24292f", help="text color of the art")
+    parser.add_argument(
+        "--collapse-runs", type=int, default=0, metavar="N",
+        help="replace runs of N or more spaces with dx offsets (default: off)",
+    )
+    parser.add_argument("--width", type=int, default=WIDTH)
+    parser.add_argument("--height", type=int, default=HEIGHT)
+    parser.add_argument("--density", type=int, default=DENSITY)
+    parser.add_argument("--invert", action="store_true", default=INVERT)
+    parser.add_argument("--brightness", type=float, default=BRIGHTNESS)
+    parser.add_argument("--contrast", type=float, default=CONTRAST)
+    sweep = parser.add_argument_group(
+        "sweep", "render every combination of settings into one contact sheet (.svg or .html)"
+    )
+    sweep.add_argument("--sweep", action="store_true", help="sweep the first image")
+    sweep.add_argument("--sweep-density", type=int, nargs="+", metavar="N")
+    sweep.add_argument("--sweep-brightness", type=float, nargs="+", metavar="X")
+    sweep.add_argument("--sweep-contrast", type=float, nargs="+", metavar="X")
+    sweep.add_argument("--sweep-invert", action="store_true", help="include inverted variants")
+    sweep.add_argument("--sweep-columns", type=int, default=6)
+    animate = parser.add_argument_group(
+        "animation", "render an animated GIF/APNG or a directory of frames into one animated SVG"
+    )
+    animate.add_argument("--animate", action="store_true", help="animate the first input")
+    animate.add_argument(
+        "--frame-duration", type=int, default=100, metavar="MS",
+        help="duration of frames that do not carry one (default: %(default)s)",
+    )
+    animate.add_argument(
+        "--dedupe-threshold", type=float, default=0.0, metavar="F",
+        help="merge consecutive frames differing in at most this fraction of glyphs (default: %(default)s)",
+    )
+    args = parser.parse_args(argv)
+
+    params = {
+        "width": args.width,
+        "height": args.height,
+        "density": args.density,
+        "invert": args.invert,
+        "brightness": args.brightness,
+        "contrast": args.contrast,
+    }
+    cache_dir = None if args.no_cache else args.cache_dir
+    svg_options = {"fill": args.fill, "collapse_runs": args.collapse_runs}
+
+    if args.animate:
+        source = args.inputs[0]
+        frames = frame_glyphs(
+            iter_frames(source, args.width, args.height, args.frame_duration),
+            args.density, args.invert, args.brightness, args.contrast,
+        )
+        counts = {}
+        output = args.output or "ascii_animation.svg"
+        with open(output, "w") as f:
+            stats = animated_svg(
+                dedupe_frames(frames, args.dedupe_threshold, counts), f, **svg_options
+            )
+        print(
+            f"{counts['frames']} frames of '{source}' saved to '{output}' as "
+            f"{stats['frames']} distinct frames and {stats['rows']} distinct rows "
+            f"({stats['duration'] / 1000:g} s, {stats['bytes']:,} bytes)"
+        )
+        return
+
+    image_paths = expand_inputs(args.inputs)
+    if not image_paths:
+        parser.error("no images found")
+
+    if args.sweep:
+        variants = sweep_variants(
+            args.sweep_density or [args.density],
+            args.sweep_brightness or [args.brightness],
+            args.sweep_contrast or [args.contrast],
+            [False, True] if args.sweep_invert else [args.invert],
+        )
+        arts = sweep_ascii(image_paths[0], args.width, args.height, variants)
+        output = args.output or "ascii_sweep.svg"
+        if output.endswith(".html"):
+            sheet = contact_sheet_html(arts, variants, args.sweep_columns)
+        else:
+            sheet = contact_sheet_svg(arts, variants, args.sweep_columns)
+        with open(output, "w") as f:
+            f.write(sheet)
+        print(f"{len(variants)} variants of '{image_paths[0]}' saved to '{output}'")
+        return
+
+    if len(image_paths) == 1 and not args.out_dir:
+        output = args.output or OUTPUT_PATH
+        _, _, stats = render_file(
+            image_paths[0], output, params, cache_dir, args.cache_size, svg_options
+        )
+        print(f"ASCII art saved to '{output}' ({savings(stats)})")
+        return
+
+    out_dir = args.out_dir or "ascii_art"
+    os.makedirs(out_dir, exist_ok=True)
+    jobs = batch_outputs(image_paths, out_dir)
+    results = render_batch(
+        jobs, params, args.jobs, None, cache_dir, args.cache_size, svg_options
+    )
+    totals = {"bytes": 0, "untrimmed_bytes": 0}
+    for image_path, output_path, stats in results:
+        print(f"{image_path} -> {output_path} ({savings(stats)})")
+        for key in totals:
+            totals[key] += stats[key]
+    print(f"Rendered {len(jobs)} images into '{out_dir}' ({savings(totals)})")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,286 @@
+"""Benchmarks for the GitHub stats pipeline against fake_github.py.
+
+Runs the request-heavy paths of today.py (loc_query/cache_builder,
+incremental_cache_update, count_all_contributed_repos,
+get_lifetime_contributions and svg_overwrite) against a synthetic account, or
+against responses recorded with ``today.py --record-fixtures``, and reports
+wall time, request count, bytes transferred and peak traced memory per
+account size:
+
+    python bench.py                      # compare with bench/baseline.json
+    python bench.py --update-baseline    # store the current numbers
+    python bench.py --sizes small --fixtures run.jsonl --login my-login
+
+Exits non-zero when a benchmark needs more requests than the baseline, or
+more wall time than the baseline allows for. Wall times are measured with
+tracemalloc running, so they are only comparable with each other.
+
+It also checks ``python -X importtime -c "import today"``: the import must
+fit in --import-budget milliseconds and must not pull in any of
+LAZY_MODULES, which today.py only imports when a run needs them.
+"""
+
+import argparse
+import contextlib
+import datetime
+import io
+import json
+import multiprocessing
+import os
+import re
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import fake_github
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+BASELINE = os.path.join(HERE, "bench", "baseline.json")
+
+SIZES = {
+    "small": {"repos": 20, "orgs": 1, "org_repos": 5, "commits": 60},
+    "medium": {"repos": 150, "orgs": 3, "org_repos": 25, "commits": 150},
+    "org": {"repos": 600, "orgs": 12, "org_repos": 60, "commits": 250},
+}
+
+ALL_AFFILIATIONS = ["OWNER", "COLLABORATOR", "ORGANIZATION_MEMBER"]
+
+IMPORT_BUDGET_MS = 50
+LAZY_MODULES = ["requests", "dateutil", "xml.dom.minidom", "cProfile", "ascii_gen"]
+
+
+def import_today():
+    sys.path.insert(0, HERE)
+    import today
+
+    today.DEBUG = False
+    return today
+
+
+def import_time(runs=5):
+    """Best-of-``runs`` cumulative import time of today.py in ms, plus leaked lazy modules."""
+    check = (
+        "import sys, today; "
+        f"print(' '.join(m for m in {LAZY_MODULES!r} if m in sys.modules))"
+    )
+    # Bytecode caching is forced on so that, as for any installed CLI, the
+    # measurement covers loading today.py rather than compiling it.
+    env = {k: v for k, v in os.environ.items() if k != "PYTHONDONTWRITEBYTECODE"}
+    best, leaked = None, []
+    for _ in range(runs):
+        result = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", check],
+            cwd=HERE, env=env, capture_output=True, text=True, check=True,
+        )
+        match = re.search(r"^import time:\s+\d+ \|\s+(\d+) \| today$", result.stderr, re.M)
+        elapsed = int(match.group(1)) / 1000
+        best = elapsed if best is None else min(best, elapsed)
+        leaked = result.stdout.split()
+    return best, leaked
+
+
+def measure(today, func, *args):
+    spans = today.TELEMETRY["spans"]
+    first_span = len(spans)
+    tracemalloc.start()
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        func(*args)
+    wall = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    new_spans = spans[first_span:]
+    return {
+        "wall_time": round(wall, 4),
+        "requests": len(new_spans),
+        "bytes": sum(span["bytes"] for span in new_spans),
+        "peak_memory": peak,
+    }
+
+
+def serve_fake(params, args, port_queue):
+    account = fake_github.SyntheticAccount(login=args.login, seed=args.seed, **params)
+    fake = fake_github.FakeGitHub(
+        account, latency=args.latency, seed=args.seed, points=10 ** 9,
+        fixtures=args.fixtures,
+    )
+    server = fake.serve(port=0)
+    port_queue.put(server.server_address[1])
+    server.serve_forever()
+
+
+def run_size(today, size, params, args, workdir):
+    # The fake server runs in its own process so that tracemalloc and the
+    # wall-time numbers only cover today.py's side of each request.
+    port_queue = multiprocessing.Queue()
+    server = multiprocessing.Process(
+        target=serve_fake, args=(params, args, port_queue), daemon=True
+    )
+    server.start()
+    url = f"http://127.0.0.1:{port_queue.get(timeout=60)}/graphql"
+    try:
+        today.configure(args.login, "bench", os.path.join(workdir, "cache", size), url)
+        # Every benchmark must pay for its own requests; served from the
+        # response cache, later ones would reuse what earlier ones fetched.
+        today.RESPONSE_CACHE["enabled"] = False
+        user_info, created_at = today.user_getter(args.login)
+        today.CONFIG["owner_id"] = user_info["id"]
+        now = datetime.datetime.utcnow()
+        svg_file = os.path.join(workdir, f"{size}_dark_mode.svg")
+        shutil.copy(os.path.join(HERE, "dark_mode.svg"), svg_file)
+
+        results = {}
+        results["loc_query"] = measure(
+            today, today.loc_query, ALL_AFFILIATIONS, 7, True, None, [],
+            "_bench",
+        )
+        results["incremental_cache_update"] = measure(
+            today, today.incremental_cache_update,
+            "_bench", ALL_AFFILIATIONS,
+            (now - datetime.timedelta(days=30)).isoformat() + "Z", 7, False,
+        )
+        results["count_all_contributed_repos"] = measure(
+            today, today.count_all_contributed_repos,
+            args.login, today.CONFIG["owner_id"], created_at, now.isoformat() + "Z",
+        )
+        results["get_lifetime_contributions"] = measure(
+            today, today.get_lifetime_contributions,
+            args.login, created_at,
+        )
+        results["svg_overwrite"] = measure(
+            today, today.svg_overwrite, svg_file, "1 year", "1,234",
+            "56", "78", "9", "10", ["1,000", "500", "500"],
+        )
+        return results
+    finally:
+        server.terminate()
+        server.join()
+
+
+def compare(results, baseline, time_tolerance):
+    failures = []
+    for size, benchmarks in results.items():
+        for name, current in benchmarks.items():
+            expected = baseline.get(size, {}).get(name)
+            if expected is None:
+                continue
+            if current["requests"] > expected["requests"]:
+                failures.append(
+                    f"{size}/{name}: {current['requests']} requests, "
+                    f"baseline {expected['requests']}"
+                )
+            elif expected["requests"] and not current["requests"]:
+                # Nothing measured: the benchmark no longer reaches the fake.
+                failures.append(
+                    f"{size}/{name}: no requests, baseline {expected['requests']}"
+                )
+            limit = expected["wall_time"] * (1 + time_tolerance)
+            if current["wall_time"] > max(limit, 0.05):
+                failures.append(
+                    f"{size}/{name}: {current['wall_time']:.4f} s, "
+                    f"baseline {expected['wall_time']:.4f} s (+{time_tolerance:.0%})"
+                )
+    return failures
+
+
+def print_results(results):
+    print(
+        "{:<8} {:<30} {:>10} {:>9} {:>12} {:>12}".format(
+            "size", "benchmark", "wall (s)", "requests", "bytes", "peak (KiB)"
+        )
+    )
+    for size, benchmarks in results.items():
+        for name, entry in benchmarks.items():
+            print(
+                "{:<8} {:<30} {:>10.4f} {:>9} {:>12,} {:>12,.1f}".format(
+                    size, name, entry["wall_time"], entry["requests"], entry["bytes"],
+                    entry["peak_memory"] / 1024,
+                )
+            )
+
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    arg_parser.add_argument(
+        "--sizes", nargs="+", choices=list(SIZES), default=list(SIZES)
+    )
+    arg_parser.add_argument("--login", default="octocat")
+    arg_parser.add_argument("--seed", type=int, default=0)
+    arg_parser.add_argument(
+        "--latency", type=float, default=0.0, help="simulated seconds per request"
+    )
+    arg_parser.add_argument(
+        "--fixtures", metavar="PATH", help="replay responses recorded by today.py"
+    )
+    arg_parser.add_argument("--baseline", default=BASELINE)
+    arg_parser.add_argument(
+        "--time-tolerance",
+        type=float,
+        default=1.0,
+        help="allowed wall-time increase over the baseline (default: 1.0 = +100%%)",
+    )
+    arg_parser.add_argument(
+        "--import-budget",
+        type=float,
+        default=IMPORT_BUDGET_MS,
+        help="allowed import time of today.py in ms (default: %(default)s)",
+    )
+    arg_parser.add_argument("--update-baseline", action="store_true")
+    arg_parser.add_argument("--json", metavar="PATH", help="also write results as JSON")
+    args = arg_parser.parse_args()
+
+    import_ms, leaked = import_time()
+    print(f"import today: {import_ms:.1f} ms (budget {args.import_budget:g} ms)")
+    import_failures = []
+    if import_ms > args.import_budget:
+        import_failures.append(f"import today: {import_ms:.1f} ms, budget {args.import_budget:g} ms")
+    if leaked:
+        import_failures.append("import today: imports " + ", ".join(leaked) + " eagerly")
+
+    workdir = tempfile.mkdtemp(prefix="today-bench-")
+    try:
+        today = import_today()
+        results = {
+            size: run_size(today, size, SIZES[size], args, workdir)
+            for size in args.sizes
+        }
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+    print_results(results)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+    if import_failures:
+        print("\nStartup regressions:")
+        for failure in import_failures:
+            print("  " + failure)
+        sys.exit(1)
+
+    if args.update_baseline:
+        baseline = {}
+        if os.path.exists(args.baseline):
+            with open(args.baseline) as f:
+                baseline = json.load(f)
+        baseline.update(results)
+        os.makedirs(os.path.dirname(args.baseline), exist_ok=True)
+        with open(args.baseline, "w") as f:
+            json.dump(baseline, f, indent=2)
+            f.write("\n")
+        print(f"Baseline written to {args.baseline}")
+        sys.exit(0)
+
+    if not os.path.exists(args.baseline):
+        print(f"No baseline at {args.baseline}; run with --update-baseline first.")
+        sys.exit(0)
+    with open(args.baseline) as f:
+        failures = compare(results, json.load(f), args.time_tolerance)
+    if failures:
+        print("\nRegressions against baseline:")
+        for failure in failures:
+            print("  " + failure)
+        sys.exit(1)
+    print("\nNo regressions against baseline.")
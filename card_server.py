@@ -0,0 +1,235 @@
+"""Serve the rendered cards and a stats document over HTTP from memory.
+
+Every response comes from an in-memory snapshot: the SVG bodies and the
+stats JSON are encoded, hashed for a strong ETag and gzip-compressed once
+when the snapshot is built, so requests never touch the GitHub API, the
+disk or the renderer. Clients revalidating with If-None-Match get a 304.
+
+``today.py --daemon --serve HOST:PORT`` serves a snapshot that is replaced
+after every refresh cycle. On its own this module serves the cards from
+the working directory and the same stats document built from
+cache/meta.json, reloading them when they change on disk:
+
+    python card_server.py --port 8080
+    curl -H 'Accept-Encoding: gzip' http://127.0.0.1:8080/dark_mode.svg
+"""
+
+import argparse
+import gzip
+import hashlib
+import json
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+CONTENT_TYPES = {
+    ".svg": "image/svg+xml; charset=utf-8",
+    ".json": "application/json; charset=utf-8",
+}
+
+
+def representation(body, content_type):
+    """A body in identity and gzip encodings, each with its own strong ETag."""
+    tag = hashlib.sha256(body).hexdigest()[:32]
+    return {
+        "type": content_type,
+        "identity": (body, f'"{tag}"'),
+        "gzip": (gzip.compress(body, 9, mtime=0), f'"{tag}-gz"'),
+    }
+
+
+def build_snapshot(files, stats):
+    """Map URL paths to representations of ``files`` ({path: bytes}) and /stats.json."""
+    snapshot = {
+        path: representation(body, CONTENT_TYPES[os.path.splitext(path)[1]])
+        for path, body in files.items()
+    }
+    snapshot["/stats.json"] = representation(
+        json.dumps(stats, indent=2, sort_keys=True).encode("utf-8"),
+        CONTENT_TYPES[".json"],
+    )
+    return snapshot
+
+
+def etag_matches(if_none_match, etag):
+    """If-None-Match uses the weak comparison, so W/ prefixes are ignored."""
+    if if_none_match.strip() == "*":
+        return True
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if (candidate[2:] if candidate.startswith("W/") else candidate) == etag:
+            return True
+    return False
+
+
+def accepts_gzip(accept_encoding):
+    for coding in accept_encoding.split(","):
+        name, _, params = coding.strip().partition(";")
+        if name.strip().lower() in ("gzip", "x-gzip", "*"):
+            return params.replace(" ", "") not in ("q=0", "q=0.0", "q=0.00", "q=0.000")
+    return False
+
+
+class CardServer:
+    def __init__(self, snapshot=None):
+        # Replaced as a whole by update(), so a request always sees one
+        # consistent snapshot without locking.
+        self.snapshot = snapshot or {}
+        self.stats = {"requests": 0, "not_modified": 0}
+        # Requests are answered on ThreadingHTTPServer worker threads.
+        self.stats_lock = threading.Lock()
+
+    def update(self, snapshot):
+        self.snapshot = snapshot
+
+    def respond(self, path, request_headers):
+        """Return ``(status, headers, body)`` for a GET of ``path``."""
+        with self.stats_lock:
+            self.stats["requests"] += 1
+        entry = self.snapshot.get(path.split("?", 1)[0])
+        if entry is None:
+            return 404, {"Content-Type": "text/plain; charset=utf-8"}, b"Not Found\n"
+        encoding = "gzip" if accepts_gzip(request_headers.get("Accept-Encoding", "")) else "identity"
+        body, etag = entry[encoding]
+        headers = {
+            "ETag": etag,
+            "Cache-Control": "no-cache",
+            "Vary": "Accept-Encoding",
+        }
+        if etag_matches(request_headers.get("If-None-Match", ""), etag):
+            with self.stats_lock:
+                self.stats["not_modified"] += 1
+            return 304, headers, b""
+        headers["Content-Type"] = entry["type"]
+        if encoding == "gzip":
+            headers["Content-Encoding"] = "gzip"
+        return 200, headers, body
+
+    def serve(self, host="127.0.0.1", port=8080):
+        server = ThreadingHTTPServer((host, port), make_handler(self))
+        server.daemon_threads = True
+        return server
+
+    def start_in_thread(self, host="127.0.0.1", port=0):
+        """Start serving in a daemon thread; returns ``(server, base_url)``."""
+        server = self.serve(host, port)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        return server, f"http://{host}:{server.server_address[1]}"
+
+
+def make_handler(card_server):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+        # The headers and body go out in separate writes; without this a
+        # keep-alive client waits out Nagle plus delayed ACK on every
+        # response.
+        disable_nagle_algorithm = True
+
+        def send(self, include_body):
+            status, headers, body = card_server.respond(self.path, self.headers)
+            self.send_response(status)
+            for key, value in headers.items():
+                self.send_header(key, value)
+            if status != 304:
+                self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            if include_body and status != 304:
+                self.wfile.write(body)
+
+        def do_GET(self):
+            self.send(True)
+
+        def do_HEAD(self):
+            self.send(False)
+
+        def log_message(self, format, *args):
+            pass
+
+    return Handler
+
+
+def parse_address(address):
+    """``HOST:PORT`` or ``PORT`` -> (host, port)."""
+    host, _, port = address.rpartition(":")
+    return host or "127.0.0.1", int(port)
+
+
+def count(text):
+    """A rendered count ("6,869  ") back to an int."""
+    return int(str(text).replace(",", "").strip())
+
+
+def meta_stats(meta, user):
+    """The stats document for a run's meta.json, as served by --serve.
+
+    Counts come from the metadata; the age, contributions and LOC from the
+    values the cards were last rendered with, when there are any.
+    """
+    stats = {
+        "user": user,
+        "last_update": meta.get("last_update"),
+        "repos": meta.get("repo_count"),
+        "contributed_repos": meta.get("contrib_repo_count"),
+        "stars": meta.get("star_count"),
+        "followers": meta.get("follower_count"),
+    }
+    values = meta.get("card_values") or {}
+    if "age_data" in values:
+        stats["age"] = values["age_data"]
+    if "commit_data" in values:
+        stats["contributions"] = count(values["commit_data"])
+    if "loc_data" in values:
+        stats["loc"] = dict(
+            zip(("added", "deleted", "net"), (count(v) for v in values["loc_data"]))
+        )
+    return stats
+
+
+def snapshot_from_disk(svg_files, meta_path, user=None):
+    files = {}
+    for svg_file in svg_files:
+        with open(svg_file, "rb") as f:
+            files["/" + os.path.basename(svg_file)] = f.read()
+    try:
+        with open(meta_path, "r") as f:
+            stats = meta_stats(json.load(f), user)
+    except FileNotFoundError:
+        stats = {"user": user}
+    return build_snapshot(files, stats)
+
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    arg_parser.add_argument("--host", default="127.0.0.1")
+    arg_parser.add_argument("--port", type=int, default=8080)
+    arg_parser.add_argument(
+        "--svg", nargs="+", default=["dark_mode.svg", "light_mode.svg"], metavar="PATH"
+    )
+    arg_parser.add_argument("--meta", default=os.path.join("cache", "meta.json"))
+    arg_parser.add_argument(
+        "--user", default=os.environ.get("USER_NAME"), help="login shown in /stats.json"
+    )
+    arg_parser.add_argument(
+        "--poll", type=float, default=5.0, help="seconds between checks for changed files"
+    )
+    args = arg_parser.parse_args()
+
+    watched = args.svg + [args.meta]
+
+    def mtimes():
+        return [os.path.getmtime(path) if os.path.exists(path) else None for path in watched]
+
+    card_server = CardServer(snapshot_from_disk(args.svg, args.meta, args.user))
+    server, url = card_server.start_in_thread(args.host, args.port)
+    print(f"Serving {', '.join(sorted(card_server.snapshot))} at {url}")
+    seen = mtimes()
+    try:
+        while True:
+            time.sleep(args.poll)
+            if mtimes() != seen:
+                seen = mtimes()
+                card_server.update(snapshot_from_disk(args.svg, args.meta, args.user))
+                print("Reloaded snapshot")
+    except KeyboardInterrupt:
+        server.shutdown()
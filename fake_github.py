@@ -0,0 +1,1026 @@
+"""Local stand-in for the GitHub GraphQL API.
+
+Implements the subset of the schema today.py uses (user, repository,
+organization, repositories pagination, commit history with author filters,
+contributionsCollection and rateLimit) on top of a synthetic account of
+configurable size, so full and incremental runs can be load-tested offline:
+
+    python fake_github.py --repos 10000 --port 8787 &
+    GITHUB_GRAPHQL_URL=http://127.0.0.1:8787/graphql ACCESS_TOKEN=x \\
+        GITHUB_API_URL=http://127.0.0.1:8787 USER_NAME=octocat \\
+        python today.py --full-cache
+
+The REST endpoints behind ``today.py --rest-counters`` (GET /users/{login}
+and /user/repos, with ETags and 304 responses) are served from the same
+account.
+
+Latency, 5xx/429 errors and secondary rate limit responses can be injected
+with --latency, --error-rate, --throttle-rate and --secondary-rate. Responses
+recorded with ``today.py --record-fixtures`` are replayed with --fixtures and
+take precedence over the synthetic account.
+"""
+
+import argparse
+import base64
+import datetime
+import hashlib
+import json
+import random
+import re
+import threading
+import time
+import urllib.parse
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# ----------------------- GraphQL subset parser -----------------------
+
+TOKEN = re.compile(
+    r'(?P<skip>[\s,]+|#[^\n]*)'
+    r'|(?P<punct>\.\.\.|[{}()\[\]:!$=@])'
+    r'|(?P<name>[_A-Za-z][_0-9A-Za-z]*)'
+    r'|(?P<number>-?\d+(?:\.\d+)?(?:[eE][+-]?\d+)?)'
+    r'|(?P<string>"(?:[^"\\]|\\.)*")'
+)
+
+
+class GraphQLError(Exception):
+    pass
+
+
+class Var:
+    def __init__(self, name):
+        self.name = name
+
+
+class Field:
+    def __init__(self, name, alias, args, selections):
+        self.name = name
+        self.key = alias or name
+        self.args = args
+        self.selections = selections
+
+
+class Fragment:
+    def __init__(self, type_condition, selections):
+        self.type_condition = type_condition
+        self.selections = selections
+
+
+def tokenize(source):
+    tokens = []
+    pos = 0
+    while pos < len(source):
+        match = TOKEN.match(source, pos)
+        if not match:
+            raise GraphQLError(f"Syntax error at offset {pos}")
+        pos = match.end()
+        if match.lastgroup != "skip":
+            tokens.append((match.lastgroup, match.group()))
+    return tokens
+
+
+class Parser:
+    def __init__(self, source):
+        self.tokens = tokenize(source)
+        self.pos = 0
+
+    def peek(self, value=None):
+        if self.pos >= len(self.tokens):
+            return None
+        token = self.tokens[self.pos]
+        if value is not None:
+            return token[1] == value
+        return token
+
+    def take(self, value=None):
+        token = self.peek()
+        if token is None or (value is not None and token[1] != value):
+            raise GraphQLError(f"Expected {value!r}, got {token!r}")
+        self.pos += 1
+        return token
+
+    def document(self):
+        if self.peek("query"):
+            self.take()
+            if self.peek() and self.peek()[0] == "name":
+                self.take()
+            if self.peek("("):
+                self.variable_definitions()
+        elif self.peek("mutation") or self.peek("subscription"):
+            raise GraphQLError("Only queries are supported")
+        selections = self.selection_set()
+        if self.peek() is not None:
+            raise GraphQLError("Only a single operation is supported")
+        return selections
+
+    def variable_definitions(self):
+        # Types and defaults are not checked; variables are taken as sent.
+        depth = 0
+        while True:
+            token = self.take()
+            if token[1] == "(":
+                depth += 1
+            elif token[1] == ")":
+                depth -= 1
+                if depth == 0:
+                    return
+
+    def selection_set(self):
+        self.take("{")
+        selections = []
+        while not self.peek("}"):
+            if self.peek("..."):
+                self.take()
+                type_condition = None
+                if self.peek("on"):
+                    self.take()
+                    type_condition = self.take()[1]
+                selections.append(Fragment(type_condition, self.selection_set()))
+                continue
+            name = self.take()[1]
+            alias = None
+            if self.peek(":"):
+                self.take()
+                alias, name = name, self.take()[1]
+            args = self.arguments() if self.peek("(") else {}
+            while self.peek("@"):
+                self.take()
+                self.take()
+                if self.peek("("):
+                    self.arguments()
+            selections.append(
+                Field(name, alias, args, self.selection_set() if self.peek("{") else None)
+            )
+        self.take("}")
+        return selections
+
+    def arguments(self):
+        self.take("(")
+        args = {}
+        while not self.peek(")"):
+            name = self.take()[1]
+            self.take(":")
+            args[name] = self.value()
+        self.take(")")
+        return args
+
+    def value(self):
+        kind, text = self.take()
+        if text == "$":
+            return Var(self.take()[1])
+        if text == "[":
+            items = []
+            while not self.peek("]"):
+                items.append(self.value())
+            self.take("]")
+            return items
+        if text == "{":
+            fields = {}
+            while not self.peek("}"):
+                name = self.take()[1]
+                self.take(":")
+                fields[name] = self.value()
+            self.take("}")
+            return fields
+        if kind == "string":
+            return json.loads(text)
+        if kind == "number":
+            return float(text) if "." in text or "e" in text.lower() else int(text)
+        if text in ("true", "false"):
+            return text == "true"
+        if text == "null":
+            return None
+        return text  # enum value
+
+
+def parse(source):
+    return Parser(source).document()
+
+
+def bind(value, variables):
+    if isinstance(value, Var):
+        return variables.get(value.name)
+    if isinstance(value, list):
+        return [bind(item, variables) for item in value]
+    if isinstance(value, dict):
+        return {key: bind(item, variables) for key, item in value.items()}
+    return value
+
+
+def query_cost(selections, variables, parents=1):
+    """Estimate GitHub's point cost for a parsed query.
+
+    Follows GitHub's published rule: every connection adds one request per
+    parent node it is fetched for, and the sum is divided by 100 (minimum 1).
+    Returns ``(cost, requests, node_count)``.
+    """
+    requests_total = 0
+    nodes_total = 0
+    for selection in selections:
+        if isinstance(selection, Fragment):
+            sub = query_cost(selection.selections, variables, parents)
+            requests_total += sub[1]
+            nodes_total += sub[2]
+            continue
+        args = {key: bind(value, variables) for key, value in selection.args.items()}
+        page = args.get("first") or args.get("last") or args.get("maxRepositories")
+        if page is None and selection.name == "history":
+            page = 100  # history without first/last defaults to a full page
+        children = parents
+        if page is not None and selection.selections is not None:
+            requests_total += parents
+            children = parents * int(page)
+            nodes_total += children
+        if selection.selections:
+            sub = query_cost(selection.selections, variables, children)
+            requests_total += sub[1]
+            nodes_total += sub[2]
+    if parents == 1:
+        return max(1, round(requests_total / 100)), requests_total, nodes_total
+    return None, requests_total, nodes_total
+
+
+# ----------------------- Execution -----------------------
+
+
+def execute(node, selections, variables):
+    result = {}
+    for selection in selections:
+        if isinstance(selection, Fragment):
+            if selection.type_condition in (None, node.typename):
+                result.update(execute(node, selection.selections, variables))
+            continue
+        args = {key: bind(value, variables) for key, value in selection.args.items()}
+        if selection.name == "__typename":
+            result[selection.key] = node.typename
+            continue
+        value = node.resolve(selection.name, args)
+        result[selection.key] = complete(value, selection, variables)
+    return result
+
+
+def complete(value, selection, variables):
+    if value is None or selection.selections is None:
+        return value
+    if isinstance(value, list):
+        return [complete(item, selection, variables) for item in value]
+    return execute(value, selection.selections, variables)
+
+
+class Node:
+    typename = None
+
+    def resolve(self, name, args):
+        method = getattr(self, "field_" + name, None)
+        if method is None:
+            raise GraphQLError(
+                f"Field '{name}' doesn't exist on type '{self.typename}'"
+            )
+        return method(args)
+
+
+class Value(Node):
+    """Plain object whose fields are looked up in a dict."""
+
+    def __init__(self, typename, fields):
+        self.typename = typename
+        self.fields = fields
+
+    def resolve(self, name, args):
+        if name not in self.fields:
+            raise GraphQLError(
+                f"Field '{name}' doesn't exist on type '{self.typename}'"
+            )
+        value = self.fields[name]
+        return value(args) if callable(value) else value
+
+
+def encode_cursor(offset):
+    return base64.b64encode(f"cursor:{offset}".encode()).decode()
+
+
+def decode_cursor(cursor):
+    if cursor is None:
+        return 0
+    try:
+        return int(base64.b64decode(cursor).decode().split(":")[1]) + 1
+    except (ValueError, IndexError):
+        raise GraphQLError(f"Invalid cursor {cursor!r}")
+
+
+def page_size(args):
+    first = args.get("first")
+    if first is None:
+        first = 100
+    if not 0 <= first <= 100:
+        raise GraphQLError(
+            "Requesting more than 100 records on a connection is not allowed"
+        )
+    return first
+
+
+class Connection(Node):
+    """Cursor-paginated connection over ``count`` items fetched by ``item``."""
+
+    def __init__(self, typename, count, args, item):
+        self.typename = typename
+        self.count = count
+        self.start = decode_cursor(args.get("after"))
+        self.stop = min(self.start + page_size(args), count)
+        self.item = item
+
+    def field_totalCount(self, args):
+        return self.count
+
+    def field_nodes(self, args):
+        return [self.item(index) for index in range(self.start, self.stop)]
+
+    def field_edges(self, args):
+        return [
+            Value("Edge", {"node": self.item(index), "cursor": encode_cursor(index)})
+            for index in range(self.start, self.stop)
+        ]
+
+    def field_pageInfo(self, args):
+        return Value(
+            "PageInfo",
+            {
+                "startCursor": encode_cursor(self.start) if self.stop > self.start else None,
+                "endCursor": encode_cursor(self.stop - 1) if self.stop > self.start else None,
+                "hasNextPage": self.stop < self.count,
+                "hasPreviousPage": self.start > 0,
+            },
+        )
+
+
+# ----------------------- Synthetic account -----------------------
+
+
+def isoformat(moment):
+    return moment.strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+def parse_time(value):
+    return datetime.datetime.strptime(value[:19], "%Y-%m-%dT%H:%M:%S").replace(
+        tzinfo=datetime.timezone.utc
+    )
+
+
+class SyntheticAccount:
+    """A deterministic account with repos, orgs and lazily generated history.
+
+    Commits are never materialised: commit ``j`` of a repo (0 = newest) is
+    authored by the user when ``(j + offset) % 10 < share``, and its size is
+    a cheap hash of ``j``, so a 10k-repo account costs a few megabytes.
+    """
+
+    def __init__(
+        self,
+        login="octocat",
+        repos=50,
+        orgs=2,
+        org_repos=20,
+        commits=200,
+        my_share=0.4,
+        start_year=2016,
+        followers=42,
+        seed=0,
+    ):
+        rng = random.Random(seed)
+        self.login = login
+        self.id = "U_" + base64.b64encode(login.encode()).decode().rstrip("=")
+        self.now = datetime.datetime.now(datetime.timezone.utc).replace(microsecond=0)
+        self.created_at = datetime.datetime(
+            start_year, 3, 14, 9, 26, 53, tzinfo=datetime.timezone.utc
+        )
+        self.followers = followers
+        self.seed = seed
+        self.orgs = [
+            {
+                "login": f"{login}-org{index}",
+                "updated_at": self.now - datetime.timedelta(days=rng.randint(0, 400)),
+                "repos": [],
+            }
+            for index in range(orgs)
+        ]
+        self.repos = []
+        for index in range(repos):
+            affiliation = "OWNER" if rng.random() < 0.75 else "COLLABORATOR"
+            owner = login if affiliation == "OWNER" else f"friend{rng.randint(0, 30)}"
+            self.add_repo(rng, owner, f"project-{index}", affiliation, commits, my_share)
+        for org in self.orgs:
+            for index in range(org_repos):
+                repo = self.add_repo(
+                    rng, org["login"], f"service-{index}", "ORGANIZATION_MEMBER",
+                    commits, my_share,
+                )
+                org["repos"].append(repo)
+        self.by_name = {repo["nameWithOwner"]: repo for repo in self.repos}
+        self.org_by_login = {org["login"]: org for org in self.orgs}
+
+    def add_repo(self, rng, owner, name, affiliation, commits, my_share):
+        share = my_share if affiliation == "OWNER" else my_share / 3
+        pushed = self.now - datetime.timedelta(minutes=rng.randint(0, 60 * 24 * 900))
+        repo = {
+            "index": len(self.repos),
+            "nameWithOwner": f"{owner}/{name}",
+            "owner": owner,
+            "name": name,
+            "affiliation": affiliation,
+            "commits": 0 if rng.random() < 0.02 else max(1, int(rng.expovariate(1 / commits))),
+            "mine": min(10, max(0, round(share * 10 + rng.uniform(-2, 2)))),
+            "offset": rng.randint(0, 9),
+            "stars": int(rng.paretovariate(1.5)) - 1,
+            "pushed_at": pushed,
+            "updated_at": pushed + datetime.timedelta(minutes=rng.randint(0, 600)),
+            "archived": rng.random() < 0.05,
+        }
+        self.repos.append(repo)
+        return repo
+
+    def repos_for(self, affiliations):
+        affiliations = set(affiliations or ["OWNER", "COLLABORATOR"])
+        return [repo for repo in self.repos if repo["affiliation"] in affiliations]
+
+    def my_commit_count(self, repo):
+        def upto(x):
+            return x // 10 * repo["mine"] + min(x % 10, repo["mine"])
+
+        return upto(repo["commits"] + repo["offset"]) - upto(repo["offset"])
+
+    def is_mine(self, repo, index):
+        return (index + repo["offset"]) % 10 < repo["mine"]
+
+    def year_contributions(self, year):
+        return 150 + (year * 7919 + self.seed) % 900
+
+    def contributions_between(self, start, end):
+        total = 0.0
+        for year in range(start.year, end.year + 1):
+            year_start = datetime.datetime(year, 1, 1, tzinfo=datetime.timezone.utc)
+            year_end = datetime.datetime(year + 1, 1, 1, tzinfo=datetime.timezone.utc)
+            overlap = (
+                min(end, year_end, self.now) - max(start, year_start, self.created_at)
+            ).total_seconds()
+            if overlap > 0:
+                total += self.year_contributions(year) * overlap / (
+                    year_end - year_start
+                ).total_seconds()
+        return int(total)
+
+
+# ----------------------- Schema -----------------------
+
+
+class Query(Node):
+    typename = "Query"
+
+    def __init__(self, server):
+        self.server = server
+        self.account = server.account
+
+    def field_user(self, args):
+        if args.get("login", "").lower() != self.account.login.lower():
+            return None
+        return User(self.account)
+
+    def field_viewer(self, args):
+        return User(self.account)
+
+    def field_repository(self, args):
+        repo = self.account.by_name.get(f"{args.get('owner')}/{args.get('name')}")
+        return Repository(self.account, repo) if repo else None
+
+    def field_organization(self, args):
+        org = self.account.org_by_login.get(args.get("login"))
+        return Organization(self.account, org) if org else None
+
+    def field_rateLimit(self, args):
+        state = self.server.rate_limit
+        return Value(
+            "RateLimit",
+            {
+                "limit": state["limit"],
+                "cost": state["last_cost"],
+                "remaining": state["remaining"],
+                "used": state["limit"] - state["remaining"],
+                "resetAt": isoformat(
+                    datetime.datetime.fromtimestamp(state["reset"], datetime.timezone.utc)
+                ),
+                "nodeCount": state["last_nodes"],
+            },
+        )
+
+
+def repository_connection(account, repos, args):
+    repos = list(repos)
+    order = args.get("orderBy") or {}
+    keys = {"PUSHED_AT": "pushed_at", "UPDATED_AT": "updated_at", "STARGAZERS": "stars"}
+    if order.get("field") in keys:
+        key = keys[order["field"]]
+        repos.sort(key=lambda repo: repo[key], reverse=order.get("direction") != "ASC")
+    return Connection(
+        "RepositoryConnection",
+        len(repos),
+        args,
+        lambda index: Repository(account, repos[index]),
+    )
+
+
+class User(Node):
+    typename = "User"
+
+    def __init__(self, account):
+        self.account = account
+
+    def field_id(self, args):
+        return self.account.id
+
+    def field_login(self, args):
+        return self.account.login
+
+    def field_createdAt(self, args):
+        return isoformat(self.account.created_at)
+
+    def field_followers(self, args):
+        return Connection(
+            "FollowerConnection",
+            self.account.followers,
+            args,
+            lambda index: Value("User", {"login": f"follower{index}"}),
+        )
+
+    def field_repositories(self, args):
+        repos = self.account.repos_for(args.get("ownerAffiliations"))
+        return repository_connection(self.account, repos, args)
+
+    def field_organizations(self, args):
+        orgs = self.account.orgs
+        return Connection(
+            "OrganizationConnection",
+            len(orgs),
+            args,
+            lambda index: Organization(self.account, orgs[index]),
+        )
+
+    def field_contributionsCollection(self, args):
+        start = parse_time(args["from"]) if args.get("from") else None
+        end = parse_time(args["to"]) if args.get("to") else None
+        if start is None:
+            start = (end or self.account.now) - datetime.timedelta(days=365)
+        if end is None:
+            end = min(start + datetime.timedelta(days=365), self.account.now)
+        if end - start > datetime.timedelta(days=366):
+            raise GraphQLError("The total time spanned by 'from' and 'to' must not exceed 1 year")
+        return ContributionsCollection(self.account, start, end)
+
+
+class Organization(Node):
+    typename = "Organization"
+
+    def __init__(self, account, org):
+        self.account = account
+        self.org = org
+
+    def field_login(self, args):
+        return self.org["login"]
+
+    def field_updatedAt(self, args):
+        return isoformat(self.org["updated_at"])
+
+    def field_repositories(self, args):
+        return repository_connection(self.account, self.org["repos"], args)
+
+
+class ContributionsCollection(Node):
+    typename = "ContributionsCollection"
+
+    def __init__(self, account, start, end):
+        self.account = account
+        self.start = start
+        self.end = end
+
+    def field_contributionCalendar(self, args):
+        return Value(
+            "ContributionCalendar",
+            {
+                "totalContributions": self.account.contributions_between(
+                    self.start, self.end
+                )
+            },
+        )
+
+    def field_totalCommitContributions(self, args):
+        return self.account.contributions_between(self.start, self.end) // 2
+
+    def field_commitContributionsByRepository(self, args):
+        limit = min(args.get("maxRepositories", 25), 100)
+        year = self.start.year
+        picked = [
+            repo
+            for repo in self.account.repos
+            if (repo["index"] + year) % 7 == 0
+            and self.account.my_commit_count(repo) > 0
+            and repo["pushed_at"] >= self.start
+        ][:limit]
+        return [
+            Value(
+                "CommitContributionsByRepository",
+                {
+                    "repository": Repository(self.account, repo),
+                    "contributions": Value(
+                        "CreatedCommitContributionConnection",
+                        {"totalCount": self.account.my_commit_count(repo)},
+                    ),
+                },
+            )
+            for repo in picked
+        ]
+
+
+class Repository(Node):
+    typename = "Repository"
+
+    def __init__(self, account, repo):
+        self.account = account
+        self.repo = repo
+
+    def field_nameWithOwner(self, args):
+        return self.repo["nameWithOwner"]
+
+    def field_name(self, args):
+        return self.repo["name"]
+
+    def field_owner(self, args):
+        return Value("RepositoryOwner", {"login": self.repo["owner"]})
+
+    def field_updatedAt(self, args):
+        return isoformat(self.repo["updated_at"])
+
+    def field_pushedAt(self, args):
+        return isoformat(self.repo["pushed_at"])
+
+    def field_isArchived(self, args):
+        return self.repo["archived"]
+
+    def field_stargazerCount(self, args):
+        return self.repo["stars"]
+
+    def field_stargazers(self, args):
+        return Connection(
+            "StargazerConnection",
+            self.repo["stars"],
+            args,
+            lambda index: Value("User", {"login": f"stargazer{index}"}),
+        )
+
+    def field_defaultBranchRef(self, args):
+        if not self.repo["commits"]:
+            return None
+        return Value("Ref", {"name": "main", "target": Commit(self.account, self.repo, 0)})
+
+
+class Commit(Node):
+    typename = "Commit"
+
+    def __init__(self, account, repo, index):
+        self.account = account
+        self.repo = repo
+        self.index = index
+
+    def field_oid(self, args):
+        return f"{self.repo['index']:08x}{self.repo['commits'] - self.index:032x}"
+
+    def field_committedDate(self, args):
+        return isoformat(self.repo["pushed_at"] - datetime.timedelta(hours=self.index))
+
+    def field_additions(self, args):
+        return (self.index * 7919 + self.repo["index"] * 31) % 400
+
+    def field_deletions(self, args):
+        return (self.index * 104729 + self.repo["index"] * 17) % 150
+
+    def field_author(self, args):
+        mine = self.account.is_mine(self.repo, self.index)
+        user = Value(
+            "User",
+            {
+                "id": self.account.id if mine else "U_other",
+                "login": self.account.login if mine else "someone-else",
+            },
+        )
+        return Value(
+            "GitActor",
+            {
+                "user": user,
+                "name": user.fields["login"],
+                "email": f"{user.fields['login']}@users.noreply.github.com",
+            },
+        )
+
+    def field_history(self, args):
+        author = (args.get("author") or {}).get("id")
+        repo = self.repo
+        if author is None:
+            return Connection(
+                "CommitHistoryConnection",
+                repo["commits"],
+                args,
+                lambda index: Commit(self.account, repo, index),
+            )
+        if author != self.account.id:
+            return Connection("CommitHistoryConnection", 0, args, None)
+
+        def nth_mine(index):
+            # The index-th commit authored by the user, newest first.
+            cycles, rest = divmod(index, repo["mine"])
+            start = cycles * 10
+            position = start
+            while True:
+                if self.account.is_mine(repo, position):
+                    if rest == 0:
+                        return Commit(self.account, repo, position)
+                    rest -= 1
+                position += 1
+
+        return Connection(
+            "CommitHistoryConnection",
+            self.account.my_commit_count(repo),
+            args,
+            nth_mine,
+        )
+
+
+# ----------------------- Server -----------------------
+
+
+def fixture_key(query, variables):
+    return " ".join(query.split()) + json.dumps(variables or {}, sort_keys=True)
+
+
+def load_fixtures(filename):
+    fixtures = {}
+    with open(filename, encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                entry = json.loads(line)
+                fixtures[fixture_key(entry["query"], entry["variables"])] = entry["body"]
+    return fixtures
+
+
+class FakeGitHub:
+    """Request handling, rate-limit accounting and fault injection."""
+
+    def __init__(
+        self,
+        account,
+        latency=0.0,
+        jitter=0.0,
+        error_rate=0.0,
+        throttle_rate=0.0,
+        secondary_rate=0.0,
+        retry_after=1,
+        points=5000,
+        seed=0,
+        fixtures=None,
+    ):
+        self.account = account
+        self.fixtures = load_fixtures(fixtures) if fixtures else {}
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.throttle_rate = throttle_rate
+        self.secondary_rate = secondary_rate
+        self.retry_after = retry_after
+        self.rng = random.Random(seed)
+        self.lock = threading.Lock()
+        self.rate_limit = {
+            "limit": points,
+            "remaining": points,
+            "reset": int(time.time()) + 3600,
+            "last_cost": 0,
+            "last_nodes": 0,
+        }
+        self.stats = {"requests": 0, "errors": 0, "bytes": 0, "rest": 0, "not_modified": 0}
+
+    def rate_headers(self):
+        state = self.rate_limit
+        return {
+            "X-RateLimit-Limit": str(state["limit"]),
+            "X-RateLimit-Remaining": str(state["remaining"]),
+            "X-RateLimit-Used": str(state["limit"] - state["remaining"]),
+            "X-RateLimit-Reset": str(state["reset"]),
+            "X-RateLimit-Resource": "graphql",
+        }
+
+    def fault(self):
+        """Pick an injected failure for this request, if any."""
+        roll = self.rng.random()
+        if roll < self.error_rate:
+            return 502 + self.rng.randint(0, 2), {}, {"message": "Server Error"}
+        roll -= self.error_rate
+        if roll < self.throttle_rate:
+            return (
+                429,
+                {"Retry-After": str(self.retry_after)},
+                {"message": "Too Many Requests"},
+            )
+        roll -= self.throttle_rate
+        if roll < self.secondary_rate:
+            return (
+                403,
+                {"Retry-After": str(self.retry_after)},
+                {
+                    "message": "You have exceeded a secondary rate limit. "
+                    "Please wait a few minutes before you try again.",
+                    "documentation_url": "https://docs.github.com/rest/overview/"
+                    "resources-in-the-rest-api#secondary-rate-limits",
+                },
+            )
+        return None
+
+    def handle_graphql(self, body):
+        """Return ``(status, headers, payload)`` for one POST /graphql body."""
+        with self.lock:
+            self.stats["requests"] += 1
+            fault = self.fault()
+            if self.rate_limit["reset"] <= time.time():
+                self.rate_limit["remaining"] = self.rate_limit["limit"]
+                self.rate_limit["reset"] = int(time.time()) + 3600
+        delay = self.latency + (self.rng.uniform(0, self.jitter) if self.jitter else 0)
+        if delay:
+            time.sleep(delay)
+        if fault:
+            with self.lock:
+                self.stats["errors"] += 1
+            return fault
+        try:
+            request = json.loads(body)
+            variables = request.get("variables") or {}
+            selections = parse(request["query"])
+            cost, _, nodes = query_cost(selections, variables)
+            with self.lock:
+                if self.rate_limit["remaining"] < cost:
+                    return (
+                        403,
+                        self.rate_headers(),
+                        {"message": "API rate limit exceeded for user."},
+                    )
+                self.rate_limit["remaining"] -= cost
+                self.rate_limit["last_cost"] = cost
+                self.rate_limit["last_nodes"] = nodes
+                headers = self.rate_headers()
+            recorded = self.fixtures.get(fixture_key(request["query"], variables))
+            if recorded is not None:
+                return 200, headers, recorded
+            data = execute(Query(self), selections, variables)
+        except (GraphQLError, KeyError, ValueError) as error:
+            return 200, {}, {"data": None, "errors": [{"message": str(error)}]}
+        return 200, headers, {"data": data}
+
+    def handle_rest(self, path, if_none_match, base_url):
+        """Return ``(status, headers, payload)`` for one REST GET.
+
+        Bodies carry a strong ETag; a matching If-None-Match gets a 304 with
+        no body, which like GitHub's does not count as a rate-limited request.
+        """
+        url = urllib.parse.urlsplit(path)
+        params = dict(urllib.parse.parse_qsl(url.query))
+        owned = self.account.repos_for(["OWNER"])
+        headers = {}
+        if url.path == f"/users/{self.account.login}":
+            payload = {
+                "login": self.account.login,
+                "followers": self.account.followers,
+                "public_repos": len(owned),
+            }
+        elif url.path == "/user/repos":
+            per_page = min(int(params.get("per_page", 30)), 100)
+            page = int(params.get("page", 1))
+            payload = [
+                {"full_name": repo["nameWithOwner"], "stargazers_count": repo["stars"]}
+                for repo in owned[(page - 1) * per_page:page * per_page]
+            ]
+            if page * per_page < len(owned):
+                params["page"] = str(page + 1)
+                next_url = f"{base_url}{url.path}?{urllib.parse.urlencode(params)}"
+                headers["Link"] = f'<{next_url}>; rel="next"'
+        else:
+            return 404, {}, {"message": "Not Found"}
+        etag = '"' + hashlib.sha1(json.dumps(payload).encode("utf-8")).hexdigest() + '"'
+        headers["ETag"] = etag
+        with self.lock:
+            self.stats["rest"] += 1
+            if if_none_match == etag:
+                self.stats["not_modified"] += 1
+                return 304, headers, None
+        return 200, headers, payload
+
+    def serve(self, host="127.0.0.1", port=8787):
+        server = ThreadingHTTPServer((host, port), make_handler(self))
+        server.daemon_threads = True
+        return server
+
+    def start_in_thread(self, host="127.0.0.1", port=0):
+        """Start serving in a daemon thread; returns ``(server, graphql_url)``."""
+        server = self.serve(host, port)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        return server, f"http://{host}:{server.server_address[1]}/graphql"
+
+
+def make_handler(fake):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+        # Headers and body go out in separate writes; without TCP_NODELAY,
+        # Nagle and delayed ACKs add ~40 ms to every keep-alive request.
+        disable_nagle_algorithm = True
+
+        def send_json(self, status, headers, payload):
+            body = b"" if payload is None else json.dumps(payload).encode("utf-8")
+            with fake.lock:
+                fake.stats["bytes"] += len(body)
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            for key, value in headers.items():
+                self.send_header(key, value)
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_POST(self):
+            body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+            if self.path.rstrip("/") not in ("/graphql", "/api/graphql"):
+                self.send_json(404, {}, {"message": "Not Found"})
+                return
+            self.send_json(*fake.handle_graphql(body))
+
+        def do_GET(self):
+            base_url = "http://" + self.headers.get("Host", "127.0.0.1")
+            self.send_json(
+                *fake.handle_rest(self.path, self.headers.get("If-None-Match"), base_url)
+            )
+
+        def log_message(self, format, *args):
+            pass
+
+    return Handler
+
+
+def build_arg_parser():
+    arg_parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    arg_parser.add_argument("--host", default="127.0.0.1")
+    arg_parser.add_argument("--port", type=int, default=8787)
+    arg_parser.add_argument("--login", default="octocat", help="synthetic USER_NAME")
+    arg_parser.add_argument("--repos", type=int, default=50, help="personal repos")
+    arg_parser.add_argument("--orgs", type=int, default=2)
+    arg_parser.add_argument("--org-repos", type=int, default=20, help="repos per org")
+    arg_parser.add_argument("--commits", type=int, default=200, help="mean commits per repo")
+    arg_parser.add_argument("--start-year", type=int, default=2016)
+    arg_parser.add_argument("--seed", type=int, default=0)
+    arg_parser.add_argument("--latency", type=float, default=0.0, help="seconds per request")
+    arg_parser.add_argument("--jitter", type=float, default=0.0, help="extra random seconds")
+    arg_parser.add_argument("--error-rate", type=float, default=0.0, help="share of 5xx")
+    arg_parser.add_argument("--throttle-rate", type=float, default=0.0, help="share of 429")
+    arg_parser.add_argument(
+        "--secondary-rate", type=float, default=0.0, help="share of secondary-limit 403s"
+    )
+    arg_parser.add_argument("--retry-after", type=int, default=1)
+    arg_parser.add_argument("--points", type=int, default=5000, help="hourly point budget")
+    arg_parser.add_argument(
+        "--fixtures", metavar="PATH", help="JSONL responses recorded by today.py to replay"
+    )
+    return arg_parser
+
+
+if __name__ == "__main__":
+    args = build_arg_parser().parse_args()
+    account = SyntheticAccount(
+        login=args.login,
+        repos=args.repos,
+        orgs=args.orgs,
+        org_repos=args.org_repos,
+        commits=args.commits,
+        start_year=args.start_year,
+        seed=args.seed,
+    )
+    fake = FakeGitHub(
+        account,
+        latency=args.latency,
+        jitter=args.jitter,
+        error_rate=args.error_rate,
+        throttle_rate=args.throttle_rate,
+        secondary_rate=args.secondary_rate,
+        retry_after=args.retry_after,
+        points=args.points,
+        seed=args.seed,
+        fixtures=args.fixtures,
+    )
+    server = fake.serve(args.host, args.port)
+    print(
+        f"Serving {len(account.repos)} synthetic repos for {account.login} "
+        f"at http://{args.host}:{args.port}/graphql"
+    )
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,170 @@
+"""Audit the GraphQL cost of every query today.py sends.
+
+Runs each request-making function of today.py against fake_github.py with
+fixture recording on (or reads a log written by ``today.py
+--record-fixtures``) and reports, per operation, the requests sent, the
+points and nodes fake_github.query_cost charges for them and the response
+bytes, compared with bench/query_cost.json:
+
+    python query_audit.py                    # compare with the baseline
+    python query_audit.py --update-baseline  # store the current numbers
+    python query_audit.py --fixtures run.jsonl
+
+Exits non-zero when an operation costs more points, nodes or bytes than the
+baseline allows.
+"""
+
+import argparse
+import contextlib
+import datetime
+import io
+import json
+import os
+import shutil
+import sys
+import tempfile
+
+import bench
+import fake_github
+
+BASELINE = os.path.join(bench.HERE, "bench", "query_cost.json")
+
+
+def record_run(today, size, args, workdir):
+    """Run today.py's queries for a synthetic account; returns the fixture log path."""
+    account = fake_github.SyntheticAccount(
+        login=args.login, seed=args.seed, **bench.SIZES[size]
+    )
+    fake = fake_github.FakeGitHub(account, seed=args.seed, points=10 ** 9)
+    server, url = fake.start_in_thread()
+    log = os.path.join(workdir, f"{size}.jsonl")
+    try:
+        today.configure(args.login, "audit", os.path.join(workdir, "cache", size), url)
+        # Every request must reach the fake to be recorded and counted.
+        today.RESPONSE_CACHE["enabled"] = False
+        today.FIXTURE_LOG = log
+        now = datetime.datetime.utcnow()
+        with contextlib.redirect_stdout(io.StringIO()):
+            user_info, created_at = today.user_getter(args.login)
+            today.CONFIG["owner_id"] = user_info["id"]
+            today.follower_getter(args.login)
+            today.graph_repos_stars("repos", ["OWNER"])
+            today.graph_repos_stars("stars", ["OWNER"])
+            today.get_lifetime_contributions(args.login, created_at)
+            today.count_all_contributed_repos(
+                args.login, today.CONFIG["owner_id"], created_at, now.isoformat() + "Z"
+            )
+            today.loc_query(bench.ALL_AFFILIATIONS, 7, True, None, [], "_audit")
+            today.rate_limit_status()
+    finally:
+        today.FIXTURE_LOG = None
+        server.shutdown()
+    return log
+
+
+def audit(log):
+    """Per-operation totals for the requests in a fixture log."""
+    totals = {}
+    with open(log, "r", encoding="utf-8") as f:
+        for line in f:
+            entry = json.loads(line)
+            operation = entry.get("operation", "unknown")
+            variables = entry["variables"] or {}
+            points, _, nodes = fake_github.query_cost(
+                fake_github.parse(entry["query"]), variables
+            )
+            total = totals.setdefault(
+                operation, {"requests": 0, "points": 0, "nodes": 0, "bytes": 0}
+            )
+            total["requests"] += 1
+            total["points"] += points
+            total["nodes"] += nodes
+            total["bytes"] += len(json.dumps(entry["body"]))
+    return dict(sorted(totals.items()))
+
+
+def compare(results, baseline):
+    failures = []
+    for label, operations in results.items():
+        for operation, current in operations.items():
+            expected = baseline.get(label, {}).get(operation)
+            if expected is None:
+                continue
+            for key in ("points", "nodes", "bytes"):
+                if current[key] > expected[key]:
+                    failures.append(
+                        f"{label}/{operation}: {current[key]:,} {key}, "
+                        f"baseline {expected[key]:,}"
+                    )
+    return failures
+
+
+def print_results(results):
+    print(
+        "{:<8} {:<42} {:>9} {:>8} {:>10} {:>12}".format(
+            "run", "operation", "requests", "points", "nodes", "bytes"
+        )
+    )
+    for label, operations in results.items():
+        for operation, entry in operations.items():
+            print(
+                "{:<8} {:<42} {:>9,} {:>8,} {:>10,} {:>12,}".format(
+                    label, operation, entry["requests"], entry["points"],
+                    entry["nodes"], entry["bytes"],
+                )
+            )
+
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    arg_parser.add_argument(
+        "--sizes", nargs="+", choices=list(bench.SIZES), default=["small", "medium"]
+    )
+    arg_parser.add_argument("--login", default="octocat")
+    arg_parser.add_argument("--seed", type=int, default=0)
+    arg_parser.add_argument(
+        "--fixtures",
+        metavar="PATH",
+        help="audit a log written by today.py --record-fixtures instead",
+    )
+    arg_parser.add_argument("--baseline", default=BASELINE)
+    arg_parser.add_argument("--update-baseline", action="store_true")
+    args = arg_parser.parse_args()
+
+    if args.fixtures:
+        results = {"fixtures": audit(args.fixtures)}
+    else:
+        workdir = tempfile.mkdtemp(prefix="today-audit-")
+        try:
+            today = bench.import_today()
+            results = {
+                size: audit(record_run(today, size, args, workdir)) for size in args.sizes
+            }
+        finally:
+            shutil.rmtree(workdir, ignore_errors=True)
+    print_results(results)
+
+    if args.update_baseline:
+        baseline = {}
+        if os.path.exists(args.baseline):
+            with open(args.baseline) as f:
+                baseline = json.load(f)
+        baseline.update(results)
+        os.makedirs(os.path.dirname(args.baseline), exist_ok=True)
+        with open(args.baseline, "w") as f:
+            json.dump(baseline, f, indent=2)
+            f.write("\n")
+        print(f"Baseline written to {args.baseline}")
+        sys.exit(0)
+
+    if not os.path.exists(args.baseline):
+        print(f"No baseline at {args.baseline}; run with --update-baseline first.")
+        sys.exit(0)
+    with open(args.baseline) as f:
+        failures = compare(results, json.load(f))
+    if failures:
+        print("\nRegressions against baseline:")
+        for failure in failures:
+            print("  " + failure)
+        sys.exit(1)
+    print("\nNo regressions against baseline.")
@@ -0,0 +1,100 @@
+"""Offline tests for ascii_gen.py; skipped where Pillow or NumPy is missing."""
+
+import unittest
+
+try:
+    import numpy as np
+
+    import ascii_gen
+except ImportError:  # Pillow and NumPy are not needed to update the cards.
+    ascii_gen = None
+
+
+@unittest.skipIf(ascii_gen is None, "ascii_gen needs Pillow and NumPy")
+class GlyphLutTest(unittest.TestCase):
+    def test_matches_the_per_pixel_formula(self):
+        for density in range(1, len(ascii_gen.ASCII_CHARS) + 1):
+            chars = ascii_gen.ASCII_CHARS[:density]
+            lut = ascii_gen.glyph_lut(density)
+            self.assertEqual(
+                lut.tobytes().decode("ascii"),
+                "".join(chars[level * density // 256] for level in range(256)),
+            )
+
+    def test_extremes(self):
+        lut = ascii_gen.glyph_lut(10)
+        self.assertEqual(chr(lut[0]), " ")
+        self.assertEqual(chr(lut[255]), ascii_gen.ASCII_CHARS[9])
+
+    def test_table_is_read_only(self):
+        with self.assertRaises(ValueError):
+            ascii_gen.glyph_lut(5)[0] = 0
+
+    def test_map_glyphs_rows(self):
+        pixels = np.array([[0, 255, 127], [255, 0, 0]], dtype=np.uint8)
+        self.assertEqual(ascii_gen.map_glyphs(pixels, 2), " . \n.  ")
+
+
+@unittest.skipIf(ascii_gen is None, "ascii_gen needs Pillow and NumPy")
+class BatchOutputsTest(unittest.TestCase):
+    def test_unique_names_keep_their_name(self):
+        self.assertEqual(
+            ascii_gen.batch_outputs(["a/cat.png", "b/dog.jpg"], "out"),
+            [("a/cat.png", "out/cat.svg"), ("b/dog.jpg", "out/dog.svg")],
+        )
+
+    def test_shared_names_do_not_collide(self):
+        jobs = ascii_gen.batch_outputs(["a/logo.png", "b/logo.png", "c/Logo.gif"], "out")
+        outputs = [output for _, output in jobs]
+        self.assertEqual(len(set(output.lower() for output in outputs)), 3)
+        for output in outputs:
+            self.assertRegex(output, r"^out/[Ll]ogo-[0-9a-f]{8}\.svg$")
+
+    def test_names_are_stable(self):
+        self.assertEqual(
+            ascii_gen.batch_outputs(["a/logo.png", "b/logo.png"], "out"),
+            ascii_gen.batch_outputs(["a/logo.png", "b/logo.png"], "out"),
+        )
+
+    def test_repeated_inputs_render_once(self):
+        self.assertEqual(
+            ascii_gen.batch_outputs(["a/cat.png", "./a/cat.png"], "out"),
+            [("a/cat.png", "out/cat.svg")],
+        )
+
+
+@unittest.skipIf(ascii_gen is None, "ascii_gen needs Pillow and NumPy")
+class SvgRowTest(unittest.TestCase):
+    def test_escapes_and_trims(self):
+        self.assertEqual(
+            ascii_gen.svg_row("<&>  ", 15, 50), '<tspan x="15" y="50">&lt;&amp;&gt;</tspan>'
+        )
+
+    def test_collapses_long_runs_only(self):
+        row = ascii_gen.svg_row("#" + " " * 30 + "#", 15, 50, collapse_runs=8)
+        self.assertEqual(row, '<tspan x="15" y="50">#</tspan><tspan dx="18em">#</tspan>')
+        short = ascii_gen.svg_row("#   #", 15, 50, collapse_runs=2)
+        self.assertEqual(short, '<tspan x="15" y="50">#   #</tspan>')
+
+    def test_leading_run_shifts_the_row(self):
+        row = ascii_gen.svg_row(" " * 20 + "#", 15, 50, collapse_runs=8)
+        self.assertEqual(row, '<tspan x="15" y="50" dx="12em">#</tspan>')
+
+    def test_blank_rows_are_dropped_and_stats_reported(self):
+        stats = {}
+        svg = ascii_gen.ascii_to_svg("#\n   \n#", x=15, y=30, stats=stats)
+        self.assertEqual(
+            svg.split("\n"),
+            [
+                '<text x="15" y="30" fill="#24292f" class="ascii">',
+                '<tspan x="15" y="50">#</tspan>',
+                '<tspan x="15" y="90">#</tspan>',
+                "</text>",
+            ],
+        )
+        self.assertEqual(stats["bytes"], len(svg))
+        self.assertGreater(stats["untrimmed_bytes"], stats["bytes"])
+
+
+if __name__ == "__main__":
+    unittest.main()
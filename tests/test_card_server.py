@@ -0,0 +1,174 @@
+"""Offline tests for card_server.py's conditional and gzip responses."""
+
+import gzip
+import json
+import os
+import shutil
+import tempfile
+import threading
+import unittest
+import urllib.error
+import urllib.request
+
+import card_server
+
+SVG = b'<svg xmlns="http://www.w3.org/2000/svg"><text>42</text></svg>'
+
+
+class EtagMatchesTest(unittest.TestCase):
+    def test_exact_and_listed_tags(self):
+        self.assertTrue(card_server.etag_matches('"abc"', '"abc"'))
+        self.assertTrue(card_server.etag_matches('"x", "abc"', '"abc"'))
+        self.assertFalse(card_server.etag_matches('"abcd"', '"abc"'))
+        self.assertFalse(card_server.etag_matches("", '"abc"'))
+
+    def test_weak_comparison(self):
+        self.assertTrue(card_server.etag_matches('W/"abc"', '"abc"'))
+        self.assertTrue(card_server.etag_matches(' "x" , W/"abc" ', '"abc"'))
+
+    def test_wildcard(self):
+        self.assertTrue(card_server.etag_matches(" * ", '"abc"'))
+
+
+class AcceptsGzipTest(unittest.TestCase):
+    def test_accepted(self):
+        for header in ("gzip", "deflate, gzip", "GZIP;q=0.5", "x-gzip", "*", "br, *;q=1"):
+            self.assertTrue(card_server.accepts_gzip(header), header)
+
+    def test_refused(self):
+        for header in ("", "identity", "br", "gzip;q=0", "gzip; q=0.000", "*;q=0"):
+            self.assertFalse(card_server.accepts_gzip(header), header)
+
+
+class RespondTest(unittest.TestCase):
+    def setUp(self):
+        self.server = card_server.CardServer(
+            card_server.build_snapshot({"/dark_mode.svg": SVG}, {"stars": 1})
+        )
+
+    def test_identity_and_gzip_have_their_own_etags(self):
+        status, headers, body = self.server.respond("/dark_mode.svg", {})
+        self.assertEqual((status, body), (200, SVG))
+        self.assertNotIn("Content-Encoding", headers)
+        status, gz_headers, gz_body = self.server.respond(
+            "/dark_mode.svg", {"Accept-Encoding": "gzip"}
+        )
+        self.assertEqual(gz_headers["Content-Encoding"], "gzip")
+        self.assertEqual(gzip.decompress(gz_body), SVG)
+        self.assertNotEqual(headers["ETag"], gz_headers["ETag"])
+        self.assertEqual(gz_headers["Vary"], "Accept-Encoding")
+
+    def test_revalidation(self):
+        _, headers, _ = self.server.respond("/dark_mode.svg", {})
+        status, _, body = self.server.respond(
+            "/dark_mode.svg", {"If-None-Match": headers["ETag"]}
+        )
+        self.assertEqual((status, body), (304, b""))
+        # An identity ETag does not validate the gzip representation.
+        status, _, _ = self.server.respond(
+            "/dark_mode.svg",
+            {"If-None-Match": headers["ETag"], "Accept-Encoding": "gzip"},
+        )
+        self.assertEqual(status, 200)
+        self.assertEqual(self.server.stats, {"requests": 3, "not_modified": 1})
+
+    def test_changed_body_changes_the_etag(self):
+        _, headers, _ = self.server.respond("/dark_mode.svg", {})
+        self.server.update(
+            card_server.build_snapshot({"/dark_mode.svg": SVG.replace(b"42", b"43")}, {})
+        )
+        status, _, _ = self.server.respond(
+            "/dark_mode.svg", {"If-None-Match": headers["ETag"]}
+        )
+        self.assertEqual(status, 200)
+
+    def test_query_string_and_unknown_paths(self):
+        self.assertEqual(self.server.respond("/dark_mode.svg?v=2", {})[0], 200)
+        self.assertEqual(self.server.respond("/light_mode.svg", {})[0], 404)
+
+    def test_counts_concurrent_requests(self):
+        def requests():
+            for _ in range(2000):
+                self.server.respond("/dark_mode.svg", {})
+
+        threads = [threading.Thread(target=requests) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(self.server.stats["requests"], 16000)
+
+
+class HttpTest(unittest.TestCase):
+    def setUp(self):
+        server = card_server.CardServer(
+            card_server.build_snapshot({"/dark_mode.svg": SVG}, {})
+        )
+        self.httpd, self.url = server.start_in_thread()
+        self.addCleanup(self.httpd.server_close)
+        self.addCleanup(self.httpd.shutdown)
+
+    def get(self, path, headers=None):
+        request = urllib.request.Request(self.url + path, headers=headers or {})
+        try:
+            with urllib.request.urlopen(request, timeout=10) as response:
+                return response.status, response.headers, response.read()
+        except urllib.error.HTTPError as error:
+            return error.code, error.headers, b""
+
+    def test_get_and_not_modified(self):
+        status, headers, body = self.get("/dark_mode.svg")
+        self.assertEqual((status, body), (200, SVG))
+        self.assertEqual(headers["Content-Length"], str(len(SVG)))
+        status, _, body = self.get("/dark_mode.svg", {"If-None-Match": headers["ETag"]})
+        self.assertEqual((status, body), (304, b""))
+
+
+class MetaStatsTest(unittest.TestCase):
+    def test_stats_from_meta(self):
+        meta = {
+            "last_update": "2026-01-01T00:00:00Z",
+            "repo_count": 20,
+            "contrib_repo_count": 8,
+            "star_count": 38,
+            "follower_count": 42,
+            "rest_validators": {"/user/repos": "etag"},
+            "card_values": {
+                "age_data": "24 years",
+                "commit_data": "6,869  ",
+                "loc_data": ["398,240", "151,066", "247,174", "0"],
+            },
+        }
+        self.assertEqual(
+            card_server.meta_stats(meta, "octocat"),
+            {
+                "user": "octocat",
+                "last_update": "2026-01-01T00:00:00Z",
+                "repos": 20,
+                "contributed_repos": 8,
+                "stars": 38,
+                "followers": 42,
+                "age": "24 years",
+                "contributions": 6869,
+                "loc": {"added": 398240, "deleted": 151066, "net": 247174},
+            },
+        )
+
+    def test_snapshot_from_disk_serves_stats_not_meta(self):
+        directory = tempfile.mkdtemp(prefix="card-server-test-")
+        self.addCleanup(shutil.rmtree, directory, ignore_errors=True)
+        svg_file = os.path.join(directory, "dark_mode.svg")
+        meta_path = os.path.join(directory, "meta.json")
+        with open(svg_file, "wb") as f:
+            f.write(SVG)
+        with open(meta_path, "w") as f:
+            json.dump({"star_count": 3, "verification": {"cursor": "ab"}}, f)
+        snapshot = card_server.snapshot_from_disk([svg_file], meta_path, "octocat")
+        stats = json.loads(snapshot["/stats.json"]["identity"][0])
+        self.assertEqual(stats["stars"], 3)
+        self.assertNotIn("verification", stats)
+        self.assertEqual(snapshot["/dark_mode.svg"]["identity"][0], SVG)
+
+
+if __name__ == "__main__":
+    unittest.main()
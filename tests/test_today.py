@@ -0,0 +1,352 @@
+"""Offline tests for today.py.
+
+Run with ``python -m unittest`` (or pytest) from the repository root.
+"""
+
+import datetime
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+import today
+
+today.DEBUG = False
+
+
+class FakeResponse:
+    def __init__(self, status_code, headers=None, text=""):
+        self.status_code = status_code
+        self.headers = headers or {}
+        self.text = text
+
+
+class RetryDelayTest(unittest.TestCase):
+    def test_backs_off_exponentially_without_retry_after(self):
+        for status in (502, 503, 504, 429):
+            self.assertEqual(today.retry_delay(FakeResponse(status), 0), 1)
+            self.assertEqual(today.retry_delay(FakeResponse(status), 3), 8)
+
+    def test_honours_delay_seconds(self):
+        response = FakeResponse(429, {"Retry-After": "7"})
+        self.assertEqual(today.retry_delay(response, 4), 7)
+
+    def test_honours_http_date(self):
+        past = FakeResponse(503, {"Retry-After": "Wed, 21 Oct 2015 07:28:00 GMT"})
+        self.assertEqual(today.retry_delay(past, 2), 0)
+        future = FakeResponse(429, {"Retry-After": "Fri, 01 Jan 2100 00:00:00 GMT"})
+        self.assertGreater(today.retry_delay(future, 0), 0)
+
+    def test_unreadable_retry_after_falls_back(self):
+        response = FakeResponse(503, {"Retry-After": "soon"})
+        self.assertEqual(today.retry_delay(response, 2), 4)
+        response = FakeResponse(403, {"Retry-After": "1.5"})
+        self.assertEqual(today.retry_delay(response, 0), 60)
+
+    def test_secondary_rate_limit(self):
+        response = FakeResponse(403, text="You have exceeded a secondary rate limit")
+        self.assertEqual(today.retry_delay(response, 0), 60)
+
+    def test_final_responses(self):
+        self.assertIsNone(today.retry_delay(FakeResponse(401), 0))
+        self.assertIsNone(today.retry_delay(FakeResponse(403, text="Forbidden"), 0))
+        self.assertIsNone(today.retry_delay(FakeResponse(404), 0))
+
+
+class TodayTestCase(unittest.TestCase):
+    """Points today.py's CONFIG at a throwaway cache directory."""
+
+    def setUp(self):
+        self.cache_dir = tempfile.mkdtemp(prefix="today-test-")
+        self.addCleanup(shutil.rmtree, self.cache_dir, ignore_errors=True)
+        today.configure("octocat", "token", self.cache_dir, "http://127.0.0.1:1/graphql")
+
+
+def iso(moment):
+    return moment.isoformat().replace("+00:00", "") + "Z"
+
+
+class WindowTtlTest(unittest.TestCase):
+    def test_window_that_ended_before_the_run_is_closed(self):
+        end = today.RUN_STARTED_AT - datetime.timedelta(seconds=1)
+        self.assertIsNone(today.closed_window_ttl(iso(end)))
+        self.assertIsNone(today.closed_window_ttl("2020-01-01T00:00:00Z"))
+
+    def test_window_ending_at_or_after_the_run_start_is_open(self):
+        self.assertEqual(
+            today.closed_window_ttl(iso(today.RUN_STARTED_AT)), today.OPEN_WINDOW_TTL
+        )
+        now = datetime.datetime.utcnow().isoformat() + "Z"
+        self.assertEqual(today.closed_window_ttl(now), today.OPEN_WINDOW_TTL)
+
+    def test_naive_end_is_read_as_utc(self):
+        self.assertIsNone(today.closed_window_ttl("2020-01-01T00:00:00"))
+
+    def test_lifetime_window_covers_one_year(self):
+        self.assertIsNone(today.lifetime_window_ttl({"from": "2020-01-01T00:00:00Z"}))
+        this_year = f"{today.RUN_STARTED_AT.year}-01-01T00:00:00Z"
+        self.assertEqual(
+            today.lifetime_window_ttl({"from": this_year}), today.OPEN_WINDOW_TTL
+        )
+
+
+class ResponseCacheTest(TodayTestCase):
+    def setUp(self):
+        super().setUp()
+        self.requests = []
+
+        def checked_request(func_name, query, variables, max_retries):
+            self.requests.append((func_name, variables))
+            return today.CachedResponse('{"data": {"n": %d}}' % len(self.requests))
+
+        original = today.checked_request
+        today.checked_request = checked_request
+        self.addCleanup(setattr, today, "checked_request", original)
+        ttls = dict(today.RESPONSE_TTLS)
+        self.addCleanup(today.RESPONSE_TTLS.update, ttls)
+        self.addCleanup(today.RESPONSE_CACHE.update, dict(today.RESPONSE_CACHE))
+        today.RESPONSE_CACHE.update(enabled=True, bytes=None)
+
+    def request(self, func_name, variables=None):
+        return today.simple_request(func_name, "query", variables or {}).json()
+
+    def cached_expiry(self, variables):
+        key = today.response_key("query", variables)
+        with open(os.path.join(today.response_cache_dir(), key + ".json")) as f:
+            return json.load(f)["expires"]
+
+    def test_inventory_operations_are_served_from_the_cache(self):
+        first = self.request("graph_repos_stars")
+        self.assertEqual(self.request("graph_repos_stars"), first)
+        self.assertEqual(len(self.requests), 1)
+
+    def test_different_variables_are_cached_apart(self):
+        self.request("graph_repos_stars", {"cursor": None})
+        self.request("graph_repos_stars", {"cursor": "abc"})
+        self.assertEqual(len(self.requests), 2)
+
+    def test_unlisted_operations_are_never_cached(self):
+        self.request("rate_limit_status")
+        self.request("rate_limit_status")
+        self.assertEqual(len(self.requests), 2)
+
+    def test_expired_responses_are_refetched(self):
+        today.RESPONSE_TTLS["graph_repos_stars"] = -1
+        self.request("graph_repos_stars")
+        self.request("graph_repos_stars")
+        self.assertEqual(len(self.requests), 2)
+
+    def test_open_windows_are_not_cached_forever(self):
+        now = {"endDate": datetime.datetime.utcnow().isoformat() + "Z"}
+        self.request("count_all_contributed_repos_pr", now)
+        self.assertIsNotNone(self.cached_expiry(now))
+
+    def test_closed_windows_are_cached_forever(self):
+        closed = {"endDate": "2020-01-01T00:00:00Z"}
+        self.request("count_all_contributed_repos_pr", closed)
+        self.assertIsNone(self.cached_expiry(closed))
+
+    def test_bypass_keeps_only_closed_windows(self):
+        closed = {"endDate": "2020-01-01T00:00:00Z"}
+        self.request("graph_repos_stars")
+        self.request("count_all_contributed_repos_pr", closed)
+        today.bypass_response_cache()
+        self.request("graph_repos_stars")
+        self.request("count_all_contributed_repos_pr", closed)
+        self.assertEqual(
+            [name for name, _ in self.requests],
+            ["graph_repos_stars", "count_all_contributed_repos_pr", "graph_repos_stars"],
+        )
+
+    def test_disabled_cache_always_fetches(self):
+        today.RESPONSE_CACHE["enabled"] = False
+        self.request("graph_repos_stars")
+        self.request("graph_repos_stars")
+        self.assertEqual(len(self.requests), 2)
+
+
+def repo_hash(name):
+    return hashlib.sha256(name.encode("utf-8")).hexdigest()
+
+
+def repo_node(name, commits, updated_at="2026-01-02T00:00:00Z"):
+    return {
+        "node": {
+            "nameWithOwner": name,
+            "updatedAt": updated_at,
+            "defaultBranchRef": {"target": {"history": {"totalCount": commits}}},
+        }
+    }
+
+
+class ReconcileCacheTest(unittest.TestCase):
+    def test_seen_rows_are_stamped_and_missing_rows_tombstoned(self):
+        entries = {
+            "a": today.cache_row("a", 10, (100, 20, 5), "2026-01-01"),
+            "b": today.cache_row("b", 3, (7, 1, 2), "2026-01-01"),
+        }
+        self.assertEqual(today.reconcile_cache(entries, {"a"}, "2026-02-01"), (1, 0, 0))
+        self.assertEqual(entries["a"], today.cache_row("a", 10, (100, 20, 5), "2026-02-01"))
+        self.assertTrue(today.is_tombstone(entries["b"]))
+        # The tombstone keeps the date the repo was last seen.
+        self.assertEqual(entries["b"].split()[5], "2026-01-01")
+        self.assertEqual(today.cache_totals(entries.values()), (100, 20))
+
+    def test_reappearing_repo_is_restored_with_its_numbers(self):
+        entries = {"b": today.cache_row("b", 3, (7, 1, 2), "2026-01-01", tombstone=True)}
+        self.assertEqual(today.reconcile_cache(entries, {"b"}, "2026-02-01"), (0, 1, 0))
+        self.assertEqual(entries["b"], today.cache_row("b", 3, (7, 1, 2), "2026-02-01"))
+
+    def test_old_tombstones_are_dropped(self):
+        seen_on = "2026-06-01"
+        expired = (
+            datetime.date(2026, 6, 1) - datetime.timedelta(days=today.TOMBSTONE_DAYS + 1)
+        ).isoformat()
+        recent = (
+            datetime.date(2026, 6, 1) - datetime.timedelta(days=today.TOMBSTONE_DAYS - 1)
+        ).isoformat()
+        entries = {
+            "old": today.cache_row("old", 1, (1, 1, 1), expired, tombstone=True),
+            "new": today.cache_row("new", 1, (1, 1, 1), recent, tombstone=True),
+        }
+        self.assertEqual(today.reconcile_cache(entries, set(), seen_on), (0, 0, 1))
+        self.assertEqual(list(entries), ["new"])
+
+    def test_rows_without_dates_expire_from_now(self):
+        entries = {"c": "c 4 2 40 10\n"}
+        today.reconcile_cache(entries, set(), "2026-02-01")
+        self.assertEqual(
+            entries["c"], today.cache_row("c", 4, (40, 10, 2), "2026-02-01", tombstone=True)
+        )
+
+
+class IncrementalCacheUpdateTest(TodayTestCase):
+    """incremental_cache_update reconciles on its own, without --verify."""
+
+    def setUp(self):
+        super().setUp()
+        self.inventory = []
+        self.walked = []
+
+        def repo_inventory(owner_affiliation, cursor=None, edges=None, cache_suffix=""):
+            return list(self.inventory)
+
+        def repo_loc(owner, repo_name, total_commits, data, cache_comment):
+            self.walked.append(f"{owner}/{repo_name}")
+            return (total_commits * 10, total_commits, total_commits)
+
+        for name, stub in (("repo_inventory", repo_inventory), ("repo_loc", repo_loc)):
+            self.addCleanup(setattr, today, name, getattr(today, name))
+            setattr(today, name, stub)
+
+    def write_cache(self, rows):
+        with open(today.cache_filename("_test"), "w") as f:
+            f.writelines(["comment\n"] * 7 + rows)
+
+    def read_cache(self):
+        with open(today.cache_filename("_test")) as f:
+            return {line.split()[0]: line for line in f.readlines()[7:]}
+
+    def update(self, last_update="2026-01-01T00:00:00Z"):
+        return today.incremental_cache_update(
+            "_test", today.ALL_AFFILIATIONS, last_update, 7, False
+        )
+
+    def test_vanished_repos_are_tombstoned_and_seen_ones_stamped(self):
+        kept, gone = repo_hash("octocat/kept"), repo_hash("octocat/gone")
+        self.write_cache([
+            today.cache_row(kept, 5, (50, 5, 5), "2026-01-01"),
+            today.cache_row(gone, 2, (20, 2, 2), "2026-01-01"),
+        ])
+        self.inventory = [repo_node("octocat/kept", 5, "2025-12-01T00:00:00Z")]
+        total = self.update()
+        rows = self.read_cache()
+        self.assertTrue(today.is_tombstone(rows[gone]))
+        self.assertFalse(today.is_tombstone(rows[kept]))
+        self.assertEqual(rows[kept].split()[5], datetime.datetime.utcnow().date().isoformat())
+        self.assertEqual(total, [50, 5, 45, True])
+        self.assertEqual(self.walked, [])
+
+    def test_only_updated_repos_with_new_commits_are_walked(self):
+        same, grown = repo_hash("octocat/same"), repo_hash("octocat/grown")
+        self.write_cache([
+            today.cache_row(same, 5, (50, 5, 5), "2026-01-01"),
+            today.cache_row(grown, 2, (20, 2, 2), "2026-01-01"),
+        ])
+        self.inventory = [
+            repo_node("octocat/same", 5),
+            repo_node("octocat/grown", 3),
+            repo_node("octocat/new", 1),
+        ]
+        self.update()
+        self.assertEqual(sorted(self.walked), ["octocat/grown", "octocat/new"])
+        rows = self.read_cache()
+        self.assertEqual(rows[grown].split()[1:5], ["3", "3", "30", "3"])
+        self.assertIn(repo_hash("octocat/new"), rows)
+
+    def test_returning_repo_is_restored_without_a_walk(self):
+        back = repo_hash("octocat/back")
+        self.write_cache([today.cache_row(back, 4, (40, 4, 4), "2026-01-01", tombstone=True)])
+        self.inventory = [repo_node("octocat/back", 4)]
+        self.assertEqual(self.update(), [40, 4, 36, True])
+        self.assertFalse(today.is_tombstone(self.read_cache()[back]))
+        self.assertEqual(self.walked, [])
+
+
+try:
+    import ascii_gen
+except ImportError:  # Pillow and NumPy are only needed for the art.
+    ascii_gen = None
+
+
+class SvgOverwriteTest(TodayTestCase):
+    VALUES = ("1 year", "1,234", "56", "78", "9", "10", ["1,000", "500", "500"])
+
+    def setUp(self):
+        super().setUp()
+        root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        self.svg_file = os.path.join(self.cache_dir, "dark_mode.svg")
+        shutil.copy(os.path.join(root, "dark_mode.svg"), self.svg_file)
+
+    def stat_texts(self):
+        from xml.dom import minidom
+
+        svg = minidom.parse(self.svg_file)
+        tspans = [
+            node
+            for node in svg.getElementsByTagName("tspan")
+            if node.parentNode.getAttribute("class") != "ascii"
+        ]
+        return {
+            index: tspans[index].firstChild.data
+            for index in (5, 44, 46, 48, 50, 52, 54, 55, 56)
+        }
+
+    def expected(self):
+        age, commits, stars, repos, contributed, followers, loc = self.VALUES
+        return {
+            5: age, 44: repos, 46: contributed, 48: commits, 50: stars,
+            52: followers, 54: loc[2], 55: loc[0] + "++", 56: loc[1] + "--",
+        }
+
+    def test_values_land_in_their_tspans(self):
+        self.assertTrue(today.svg_overwrite(self.svg_file, *self.VALUES))
+        self.assertEqual(self.stat_texts(), self.expected())
+
+    def test_unchanged_card_is_not_rewritten(self):
+        today.svg_overwrite(self.svg_file, *self.VALUES)
+        mtime = os.path.getmtime(self.svg_file)
+        self.assertFalse(today.svg_overwrite(self.svg_file, *self.VALUES))
+        self.assertEqual(os.path.getmtime(self.svg_file), mtime)
+
+    @unittest.skipIf(ascii_gen is None, "ASCII art needs Pillow and NumPy")
+    def test_art_of_any_height_leaves_the_stats_in_place(self):
+        for art in ("#", "\n".join(["@#" * 10] * 40)):
+            today.svg_overwrite(self.svg_file, *self.VALUES, art)
+            self.assertEqual(self.stat_texts(), self.expected())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,43 +1,136 @@
 import datetime
 import json
-from dateutil import relativedelta, parser
-import requests
 import os
-from xml.dom import minidom
 import time
 import hashlib
 import sys
-import datetime
+import argparse
+import base64
+import bisect
+import math
+import subprocess
+import threading
+
+# requests, dateutil, xml.dom.minidom and the profiling modules are imported
+# where they are first used, so importing this module stays cheap.
 
 # ----------------------- Configuration -----------------------
 
 DEBUG = True
-HEADERS = {"authorization": "token " + os.environ["ACCESS_TOKEN"]}
-USER_NAME = os.environ["USER_NAME"]
-CACHE_DIR = "cache"
-if not os.path.exists(CACHE_DIR):
-    os.makedirs(CACHE_DIR)
-
-QUERY_COUNT = {
-    "user_getter": 0,
-    "follower_getter": 0,
-    "graph_repos_stars": 0,
-    "recursive_loc": 0,
-    "graph_commits": 0,
-    "loc_query": 0,
-    "pr_contributed_repos": 0,
-    "lifetime_contributions": 0,  # Added for lifetime contributions query
+ALL_AFFILIATIONS = ["OWNER", "COLLABORATOR", "ORGANIZATION_MEMBER"]
+SVG_FILES = ("dark_mode.svg", "light_mode.svg")
+# The formatted values render_cards writes into the cards.
+CARD_VALUES = (
+    "age_data", "commit_data", "star_data", "repo_data",
+    "contrib_data", "follower_data", "loc_data",
+)
+BIRTHDAY = datetime.datetime(2002, 9, 19)
+ORG_BATCH_SIZE = 10  # organizations per aliased repositories query
+ORG_REPOS_MAX_AGE = 7 * 24 * 60 * 60  # seconds an org's cached repo list is trusted
+REQUEST_TIMEOUT = 60  # seconds to wait for a GitHub response
+# Share of cached repos --verify re-walks per run: the minimum covers the
+# whole cache about once a month, as the old monthly full rebuild did.
+VERIFY_MIN_RATE = 1 / 30
+VERIFY_MAX_RATE = 0.25
+# LOC cache rows of repos gone from the inventory are kept as tombstones for
+# this many days after they were last seen, then dropped by compaction.
+TOMBSTONE_DAYS = 90
+
+# Runtime configuration, filled in by configure(). Importing this module
+# reads no environment variables and touches no files.
+CONFIG = {
+    "user_name": None,
+    "headers": {},
+    "cache_dir": "cache",
+    "graphql_url": "https://api.github.com/graphql",
+    "owner_id": None,
+    "access_token": None,
+    # Repos with at least git_mirror_threshold commits are counted from a bare
+    # clone under git_mirror instead of GraphQL history pages (see git_loc).
+    "git_mirror": None,
+    "git_mirror_threshold": 5000,
+    "git_authors": [],
+    "git_remote": "https://github.com",
+    # With rest_counters, followers, repos and stars come from conditional
+    # REST requests (see rest_counter) instead of GraphQL queries.
+    "rest_url": "https://api.github.com",
+    "rest_counters": False,
+}
+
+
+def configure(
+    user_name=None, access_token=None, cache_dir=None, graphql_url=None, rest_url=None
+):
+    """Fill CONFIG, falling back to USER_NAME, ACCESS_TOKEN, GITHUB_GRAPHQL_URL and GITHUB_API_URL.
+
+    Creates the cache directory. Returns CONFIG.
+    """
+    user_name = user_name or os.environ.get("USER_NAME")
+    access_token = access_token or os.environ.get("ACCESS_TOKEN")
+    if not user_name or not access_token:
+        raise Exception("configure: USER_NAME and ACCESS_TOKEN must be set")
+    CONFIG["user_name"] = user_name
+    CONFIG["access_token"] = access_token
+    CONFIG["headers"] = {"authorization": "token " + access_token}
+    CONFIG["cache_dir"] = cache_dir or CONFIG["cache_dir"]
+    CONFIG["graphql_url"] = (
+        graphql_url or os.environ.get("GITHUB_GRAPHQL_URL") or CONFIG["graphql_url"]
+    )
+    CONFIG["rest_url"] = rest_url or os.environ.get("GITHUB_API_URL") or CONFIG["rest_url"]
+    os.makedirs(CONFIG["cache_dir"], exist_ok=True)
+    return CONFIG
+
+
+# Every GraphQL request made during a run is recorded as a span. Spans are
+# tagged with the pipeline stage (set by perf_counter, per thread, since
+# stages run concurrently) and, for LOC history walks, the repository being
+# walked, and are rolled up at the end of the run.
+TELEMETRY = {
+    "spans": [],
+    "stages": {},
+    "context": threading.local(),
+    "rate_limit": {},
+}
+TELEMETRY_LOCK = threading.Lock()
+
+# Set by --record-fixtures: successful responses are appended to this JSONL
+# file so bench.py / fake_github.py can replay them offline and
+# query_audit.py can audit what each operation asked for.
+FIXTURE_LOG = None
+
+# Filled in by --profile: one cProfile.Profile, the tracemalloc peak and the
+# allocations retained at stage end per stage.
+PROFILE = {"enabled": False, "top": 25, "stages": {}}
+
+# Responses to simple_request are kept in <cache_dir>/responses for as long
+# as RESPONSE_TTLS allows for their operation. "bytes" is the size on disk,
+# counted on first use.
+RESPONSE_CACHE = {
+    "enabled": True,
+    "max_bytes": 64 * 1024 * 1024,
+    "bytes": None,
+    "hits": 0,
+    "misses": 0,
+    "coalesced": 0,
 }
+IN_FLIGHT = {}
+IN_FLIGHT_LOCK = threading.Lock()
+HTTP = {"session": None}
+
+OPEN_WINDOW_TTL = 10 * 60
+# Windows ending at or after this are still open: "now" in a query is
+# always later than the moment the process started.
+RUN_STARTED_AT = datetime.datetime.now(datetime.timezone.utc)
+INVENTORY_TTL = 23 * 60 * 60  # a little under a day, so daily runs refetch
 
 # ... [Keep other helper functions and imports unchanged] ...
 
 # ----------------------- Debug Function -----------------------
 
-import datetime
-from dateutil import parser
-
 
 def get_lifetime_contributions(username, start_date):
+    from dateutil import parser
+
     query = """
     query($login: String!, $from: DateTime!) {
       user(login: $login) {
@@ -69,7 +162,6 @@ def get_lifetime_contributions(username, start_date):
         # Execute the GraphQL query
         response = simple_request("get_lifetime_contributions", query, variables)
         json_response = response.json()
-        print(json_response)
 
         # Check for errors in the response
         if "errors" in json_response:
@@ -84,7 +176,6 @@ def get_lifetime_contributions(username, start_date):
             "contributionCalendar"
         ]["totalContributions"]
         total_contributions += contribs
-        print(contribs)
 
     return total_contributions
 
@@ -99,13 +190,18 @@ def format_plural(unit):
 
 
 def load_metadata():
-    meta_path = os.path.join(CACHE_DIR, "meta.json")
+    meta_path = os.path.join(CONFIG["cache_dir"], "meta.json")
     default_meta = {
         "last_update": "2000-01-01T00:00:00Z",
         "repo_count": 0,
         "contrib_repo_count": 0,
         "star_count": 0,
         "follower_count": 0,
+        "ascii_source": {},
+        "rest_validators": {},
+        "verification": {},
+        "preflight": {},
+        "card_values": {},
     }
     if os.path.exists(meta_path):
         with open(meta_path, "r") as f:
@@ -122,59 +218,607 @@ def load_metadata():
 
 
 def save_metadata(meta):
-    meta_path = os.path.join(CACHE_DIR, "meta.json")
+    meta_path = os.path.join(CONFIG["cache_dir"], "meta.json")
     with open(meta_path, "w") as f:
         json.dump(meta, f)
     debug("Saved metadata: " + str(meta))
 
 
-def simple_request(func_name, query, variables, max_retries=5):
-    debug(f"{func_name}: Sending request with variables {variables}")
-    retryable_codes = {502, 503, 504, 429}
+def variables_digest(variables):
+    return hashlib.sha256(
+        json.dumps(variables, sort_keys=True, default=str).encode("utf-8")
+    ).hexdigest()[:12]
+
+
+def graphql_cost(response):
+    """Work out the rate-limit points a response consumed.
+
+    Uses ``rateLimit.cost`` when the query asked for it, otherwise the change
+    in the ``X-RateLimit-Used`` header since the previous response in the same
+    reset window.
+    """
+    try:
+        cost = response.json()["data"]["rateLimit"]["cost"]
+        if cost is not None:
+            return int(cost)
+    except (ValueError, KeyError, TypeError):
+        pass
+    used = response.headers.get("X-RateLimit-Used")
+    reset = response.headers.get("X-RateLimit-Reset")
+    if used is None:
+        return None
+    last = TELEMETRY["rate_limit"]
+    cost = None
+    if last.get("reset") == reset and last.get("used") is not None:
+        cost = max(int(used) - last["used"], 0)
+    last["used"] = int(used)
+    last["reset"] = reset
+    if response.headers.get("X-RateLimit-Remaining") is not None:
+        last["remaining"] = int(response.headers["X-RateLimit-Remaining"])
+    return cost
+
+
+def record_span(func_name, variables, response, retries, latency, repo=None, cost=None):
+    span = {
+        "operation": func_name,
+        "variables": variables_digest(variables),
+        "stage": getattr(TELEMETRY["context"], "stage", None),
+        "repo": repo,
+        "status": response.status_code if response is not None else None,
+        "retries": retries,
+        "latency": latency,
+        "bytes": len(response.content) if response is not None else 0,
+        "cost": cost if cost is not None or response is None else graphql_cost(response),
+    }
+    TELEMETRY["spans"].append(span)
+    return span
+
+
+def http_session():
+    """The process-wide requests.Session, so connections are reused between requests."""
+    with TELEMETRY_LOCK:
+        if HTTP["session"] is None:
+            import requests
+
+            HTTP["session"] = requests.Session()
+        return HTTP["session"]
+
+
+def graphql_post(func_name, query, variables):
+    start = time.perf_counter()
+    response = http_session().post(
+        CONFIG["graphql_url"],
+        json={"query": query, "variables": variables},
+        headers=CONFIG["headers"],
+        timeout=REQUEST_TIMEOUT,
+    )
+    elapsed = time.perf_counter() - start
+    if FIXTURE_LOG and response.status_code == 200:
+        with TELEMETRY_LOCK, open(FIXTURE_LOG, "a", encoding="utf-8") as f:
+            f.write(
+                json.dumps(
+                    {
+                        "operation": func_name,
+                        "query": query,
+                        "variables": variables,
+                        "body": response.json(),
+                    }
+                )
+                + "\n"
+            )
+    return response, elapsed
+
+
+def parse_retry_after(value):
+    """Seconds a Retry-After header asks for, or None if it is missing or unreadable.
+
+    RFC 9110 allows either delay-seconds or an HTTP-date.
+    """
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return int(value)
+    from email.utils import parsedate_to_datetime
+
+    try:
+        when = parsedate_to_datetime(value)
+    except (TypeError, ValueError, IndexError):
+        return None
+    if when is None:
+        return None
+    if when.tzinfo is None:
+        when = when.replace(tzinfo=datetime.timezone.utc)
+    delay = (when - datetime.datetime.now(datetime.timezone.utc)).total_seconds()
+    return max(0, math.ceil(delay))
+
+
+def retry_delay(response, attempt):
+    """Seconds to wait before retrying ``response``, or None if it is final.
+
+    5xx and 429 responses back off exponentially (1, 2, 4, 8, 16s); 429 and
+    secondary rate limit 403 responses honour ``Retry-After`` when it can be
+    read, as seconds or an HTTP-date.
+    """
+    retry_after = response.headers.get("Retry-After")
+    wait = parse_retry_after(retry_after)
+    if response.status_code in (502, 503, 504, 429):
+        return wait if wait is not None else 2 ** attempt
+    if response.status_code == 403 and (
+        retry_after or "secondary rate limit" in response.text
+    ):
+        return wait if wait is not None else 60
+    return None
+
+
+def send_with_retries(func_name, query, variables, max_retries=5, repo=None):
+    """POST a query, retrying transient failures; returns the last response."""
+    latency = 0.0
     for attempt in range(max_retries):
-        response = requests.post(
-            "https://api.github.com/graphql",
-            json={"query": query, "variables": variables},
-            headers=HEADERS,
-        )
-        if response.status_code == 200:
-            debug(f"{func_name}: Received successful response.")
-            return response
-        if response.status_code in retryable_codes and attempt < max_retries - 1:
-            wait = 2 ** attempt  # exponential backoff: 1, 2, 4, 8, 16s
+        response, elapsed = graphql_post(func_name, query, variables)
+        latency += elapsed
+        wait = None if response.status_code == 200 else retry_delay(response, attempt)
+        if wait is not None and attempt < max_retries - 1:
             debug(
                 f"{func_name}: Got {response.status_code}, retrying in {wait}s "
                 f"(attempt {attempt + 1}/{max_retries})"
             )
             time.sleep(wait)
             continue
-        raise Exception(
-            func_name, "has failed with", response.status_code, response.text, QUERY_COUNT
+        record_span(func_name, variables, response, attempt, latency, repo)
+        return response
+
+
+def checked_request(func_name, query, variables, max_retries=5):
+    debug(f"{func_name}: Sending request with variables {variables}")
+    response = send_with_retries(func_name, query, variables, max_retries)
+    if response.status_code == 200:
+        debug(f"{func_name}: Received successful response.")
+        return response
+    raise Exception(
+        func_name,
+        "has failed with",
+        response.status_code,
+        response.text,
+        operation_rollup(),
+    )
+
+
+def closed_window_ttl(end):
+    """Cache forever (None) once the window ending at ``end`` closed before this run."""
+    end = datetime.datetime.fromisoformat(end.replace("Z", "+00:00"))
+    if end.tzinfo is None:
+        end = end.replace(tzinfo=datetime.timezone.utc)
+    if end < RUN_STARTED_AT:
+        return None
+    return OPEN_WINDOW_TTL
+
+
+def lifetime_window_ttl(variables):
+    # contributionsCollection(from:) without "to" covers one year.
+    year_start = variables["from"]
+    return closed_window_ttl(str(int(year_start[:4]) + 1) + year_start[4:])
+
+
+# Seconds a response may be served from the cache, per operation; None
+# means forever. Operations not listed here are never cached.
+RESPONSE_TTLS = {
+    "user_getter": INVENTORY_TTL,
+    "follower_getter": OPEN_WINDOW_TTL,
+    "graph_repos_stars": INVENTORY_TTL,
+    "count_repos_with_commits": INVENTORY_TTL,
+    "count_all_contributed_repos_collab": INVENTORY_TTL,
+    "count_all_contributed_repos_owned_personal": INVENTORY_TTL,
+    "user_organizations": INVENTORY_TTL,
+    "org_repositories": INVENTORY_TTL,
+    "loc_query": INVENTORY_TTL,
+    "get_lifetime_contributions": lifetime_window_ttl,
+    "count_all_contributed_repos_pr": lambda variables: closed_window_ttl(
+        variables["endDate"]
+    ),
+}
+
+
+def bypass_response_cache():
+    """Refetch every operation whose answer can still change.
+
+    Closed contribution windows keep their cached responses; everything
+    cached for INVENTORY_TTL or OPEN_WINDOW_TTL is fetched again.
+    """
+    for operation, ttl in RESPONSE_TTLS.items():
+        if not callable(ttl):
+            RESPONSE_TTLS[operation] = 0
+
+
+class CachedResponse:
+    """Stands in for a requests.Response served from the response cache."""
+
+    status_code = 200
+    headers = {}
+
+    def __init__(self, text):
+        self.text = text
+        self.content = text.encode("utf-8")
+
+    def json(self):
+        return json.loads(self.text)
+
+
+def response_key(query, variables):
+    digest = hashlib.sha256()
+    for part in (CONFIG["graphql_url"], CONFIG["access_token"] or "", query):
+        digest.update(part.encode("utf-8") + b"\0")
+    digest.update(variables_digest(variables).encode("utf-8"))
+    return digest.hexdigest()
+
+
+def response_cache_dir():
+    return os.path.join(CONFIG["cache_dir"], "responses")
+
+
+def read_cached_response(key):
+    filename = os.path.join(response_cache_dir(), key + ".json")
+    try:
+        with open(filename, "r", encoding="utf-8") as f:
+            entry = json.load(f)
+    except (FileNotFoundError, ValueError):
+        return None
+    if entry["expires"] is not None and entry["expires"] < time.time():
+        return None
+    os.utime(filename)  # mark as recently used
+    return CachedResponse(entry["body"])
+
+
+def evict_responses():
+    """Drop least recently used responses until the cache fits in max_bytes."""
+    directory = response_cache_dir()
+    entries = []
+    for name in os.listdir(directory):
+        if name.endswith(".json"):
+            stat = os.stat(os.path.join(directory, name))
+            entries.append((stat.st_mtime, stat.st_size, name))
+    RESPONSE_CACHE["bytes"] = sum(size for _, size, _ in entries)
+    for _, size, name in sorted(entries):
+        if RESPONSE_CACHE["bytes"] <= RESPONSE_CACHE["max_bytes"]:
+            break
+        try:
+            os.remove(os.path.join(directory, name))
+        except FileNotFoundError:
+            pass
+        RESPONSE_CACHE["bytes"] -= size
+
+
+def store_response(key, response, ttl):
+    directory = response_cache_dir()
+    os.makedirs(directory, exist_ok=True)
+    text = json.dumps(
+        {"expires": None if ttl is None else time.time() + ttl, "body": response.text}
+    )
+    write_atomic(os.path.join(directory, key + ".json"), text)
+    if RESPONSE_CACHE["bytes"] is None:
+        evict_responses()
+    else:
+        RESPONSE_CACHE["bytes"] += len(text.encode("utf-8"))
+        if RESPONSE_CACHE["bytes"] > RESPONSE_CACHE["max_bytes"]:
+            evict_responses()
+
+
+def single_flight(key, fetch):
+    """Call fetch() once for concurrent callers with the same key; all get its result."""
+    with IN_FLIGHT_LOCK:
+        entry = IN_FLIGHT.get(key)
+        leader = entry is None
+        if leader:
+            entry = IN_FLIGHT[key] = {"done": threading.Event(), "result": None}
+        else:
+            RESPONSE_CACHE["coalesced"] += 1
+    if not leader:
+        entry["done"].wait()
+        if isinstance(entry["result"], BaseException):
+            raise entry["result"]
+        return entry["result"]
+    try:
+        entry["result"] = fetch()
+        return entry["result"]
+    except BaseException as error:
+        entry["result"] = error
+        raise
+    finally:
+        with IN_FLIGHT_LOCK:
+            del IN_FLIGHT[key]
+        entry["done"].set()
+
+
+def simple_request(func_name, query, variables, max_retries=5):
+    """POST a query and return the successful response, using the response cache.
+
+    Identical requests made concurrently share one POST.
+    """
+    ttl = RESPONSE_TTLS.get(func_name, 0)
+    if callable(ttl):
+        ttl = ttl(variables)
+    cacheable = RESPONSE_CACHE["enabled"] and ttl != 0
+    key = response_key(query, variables)
+
+    def fetch():
+        if cacheable:
+            response = read_cached_response(key)
+            if response is not None:
+                debug(f"{func_name}: Served from the response cache.")
+                RESPONSE_CACHE["hits"] += 1
+                return response
+            RESPONSE_CACHE["misses"] += 1
+        response = checked_request(func_name, query, variables, max_retries)
+        if cacheable and "errors" not in response.json():
+            store_response(key, response, ttl)
+        return response
+
+    return single_flight(key, fetch)
+
+
+def rollup(key):
+    totals = {}
+    for span in TELEMETRY["spans"]:
+        name = span[key]
+        if name is None:
+            continue
+        entry = totals.setdefault(
+            name,
+            {"requests": 0, "retries": 0, "latency": 0.0, "bytes": 0, "cost": 0},
         )
+        entry["requests"] += 1
+        entry["retries"] += span["retries"]
+        entry["latency"] += span["latency"]
+        entry["bytes"] += span["bytes"]
+        entry["cost"] += span["cost"] or 0
+    return totals
+
+
+def operation_rollup():
+    return {name: entry["requests"] for name, entry in rollup("operation").items()}
+
+
+def run_report(mode):
+    stages = rollup("stage")
+    for name, elapsed in TELEMETRY["stages"].items():
+        stages.setdefault(
+            name,
+            {"requests": 0, "retries": 0, "latency": 0.0, "bytes": 0, "cost": 0},
+        )["wall_time"] = elapsed
+    spans = TELEMETRY["spans"]
+    return {
+        "generated_at": datetime.datetime.utcnow().isoformat() + "Z",
+        "mode": mode,
+        "totals": {
+            "requests": len(spans),
+            "retries": sum(span["retries"] for span in spans),
+            "latency": sum(span["latency"] for span in spans),
+            "bytes": sum(span["bytes"] for span in spans),
+            "cost": sum(span["cost"] or 0 for span in spans),
+        },
+        "rate_limit": TELEMETRY["rate_limit"],
+        "response_cache": {
+            key: RESPONSE_CACHE[key] for key in ("hits", "misses", "coalesced")
+        },
+        "stages": stages,
+        "repos": rollup("repo"),
+        "operations": rollup("operation"),
+        "spans": spans,
+    }
 
 
-def query_count(funct_id):
-    global QUERY_COUNT
-    QUERY_COUNT[funct_id] += 1
+def write_atomic(filename, text):
+    tmp = filename + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        f.write(text)
+    os.replace(tmp, filename)
+
+
+def write_run_report(filename, report):
+    write_atomic(filename, json.dumps(report, indent=2) + "\n")
+    debug(f"write_run_report: Saved run report to {filename}")
+
+
+def write_prometheus_textfile(filename, report):
+    def label(value):
+        return str(value).replace("\\", "\\\\").replace('"', '\\"')
+
+    metrics = [
+        ("requests", "requests_total", "counter", "GraphQL requests sent"),
+        ("retries", "retries_total", "counter", "GraphQL request retries"),
+        ("latency", "request_seconds_total", "counter", "Seconds spent in requests"),
+        ("bytes", "response_bytes_total", "counter", "GraphQL response bytes received"),
+        ("cost", "graphql_cost_total", "counter", "GraphQL rate-limit points spent"),
+    ]
+    lines = []
+    for key, name, kind, help_text in metrics:
+        lines.append(f"# HELP github_stats_{name} {help_text}.")
+        lines.append(f"# TYPE github_stats_{name} {kind}")
+        for scope in ("stage", "repo"):
+            for value, entry in sorted(report[scope + "s"].items()):
+                lines.append(
+                    f'github_stats_{name}{{{scope}="{label(value)}"}} {entry[key]}'
+                )
+    lines.append("# HELP github_stats_stage_duration_seconds Wall time of each stage.")
+    lines.append("# TYPE github_stats_stage_duration_seconds gauge")
+    for stage, entry in sorted(report["stages"].items()):
+        if "wall_time" in entry:
+            lines.append(
+                f'github_stats_stage_duration_seconds{{stage="{label(stage)}"}} '
+                f"{entry['wall_time']}"
+            )
+    if "remaining" in report["rate_limit"]:
+        lines.append("# HELP github_stats_rate_limit_remaining GraphQL points left.")
+        lines.append("# TYPE github_stats_rate_limit_remaining gauge")
+        lines.append(
+            f"github_stats_rate_limit_remaining {report['rate_limit']['remaining']}"
+        )
+    write_atomic(filename, "\n".join(lines) + "\n")
+    debug(f"write_prometheus_textfile: Saved metrics to {filename}")
 
 
-def perf_counter(func, *args):
+def profile_stage(stage, func, *args):
+    """Run one stage under cProfile and tracemalloc, accumulating per stage.
+
+    tracemalloc state is process-wide, so stages must not be profiled
+    concurrently; the CLI runs them one at a time and rejects --profile
+    with --daemon.
+    """
+    import cProfile
+    import tracemalloc
+
+    entry = PROFILE["stages"].setdefault(
+        stage, {"profile": cProfile.Profile(), "peak": 0, "retained": []}
+    )
+    # Stages are profiled one at a time and stop() below clears the traces,
+    # so start() begins each stage with a fresh peak (reset_peak() is 3.9+).
+    tracemalloc.start()
+    entry["profile"].enable()
+    try:
+        return func(*args)
+    finally:
+        entry["profile"].disable()
+        peak = tracemalloc.get_traced_memory()[1]
+        if peak >= entry["peak"]:
+            # What is still allocated as the stage returns, which can be far
+            # less than what was live at the peak.
+            entry["peak"] = peak
+            entry["retained"] = (
+                tracemalloc.take_snapshot()
+                .filter_traces(
+                    [tracemalloc.Filter(False, tracemalloc.__file__)]
+                )
+                .statistics("lineno")[: PROFILE["top"]]
+            )
+        tracemalloc.stop()
+
+
+def write_profile_reports(directory, top, pstats_file=None):
+    import io
+    import pstats
+
+    os.makedirs(directory, exist_ok=True)
+    combined = None
+    for stage, entry in PROFILE["stages"].items():
+        stream = io.StringIO()
+        stats = pstats.Stats(entry["profile"], stream=stream)
+        stream.write(f"Stage: {stage}\n")
+        stream.write(
+            f"Wall time: {TELEMETRY['stages'].get(stage, 0.0):.4f} s, "
+            f"API latency: {rollup('stage').get(stage, {}).get('latency', 0.0):.4f} s\n"
+        )
+        stream.write(f"Peak traced memory: {entry['peak'] / 1024:.1f} KiB\n\n")
+        stream.write(f"Top {top} allocation sites retained at stage end (not at the peak):\n")
+        for stat in entry["retained"]:
+            stream.write(f"  {stat}\n")
+        stream.write(f"\nTop {top} functions by cumulative time:\n")
+        stats.sort_stats("cumulative").print_stats(top)
+        stream.write(f"\nTop {top} functions by internal time:\n")
+        stats.sort_stats("tottime").print_stats(top)
+        with open(os.path.join(directory, stage + ".txt"), "w") as f:
+            f.write(stream.getvalue())
+        if combined is None:
+            combined = pstats.Stats(entry["profile"])
+        else:
+            combined.add(entry["profile"])
+    if pstats_file and combined is not None:
+        combined.dump_stats(pstats_file)
+    debug(f"write_profile_reports: Saved {len(PROFILE['stages'])} reports in {directory}")
+
+
+def perf_counter(func, *args, stage=None):
+    stage = stage or func.__name__
+    context = TELEMETRY["context"]
+    context.stage = stage
     start = time.perf_counter()
-    result = func(*args)
+    try:
+        if PROFILE["enabled"]:
+            result = profile_stage(stage, func, *args)
+        else:
+            result = func(*args)
+    finally:
+        context.stage = None
     elapsed = time.perf_counter() - start
-    debug(f"perf_counter: {func.__name__} took {elapsed:.4f} seconds.")
+    with TELEMETRY_LOCK:
+        TELEMETRY["stages"][stage] = TELEMETRY["stages"].get(stage, 0.0) + elapsed
+    debug(f"perf_counter: {stage} took {elapsed:.4f} seconds.")
     return result, elapsed
 
 
+def run_stages(stages, workers=None):
+    """Run a DAG of stages, each as soon as the stages it depends on are done.
+
+    ``stages`` maps a stage name to (func, inputs); func is called through
+    perf_counter with the results of the stages named in inputs, in order.
+    Independent stages run concurrently on up to ``workers`` threads.
+    Returns {name: (result, elapsed)}. If a stage fails, stages already
+    running finish, no new ones start, and its exception is raised.
+    """
+    from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+    results = {}
+    pending = dict(stages)
+    running = {}
+    with ThreadPoolExecutor(max_workers=workers or len(stages)) as pool:
+        while pending or running:
+            for name, (func, inputs) in list(pending.items()):
+                if all(dependency in results for dependency in inputs):
+                    args = [results[dependency][0] for dependency in inputs]
+                    future = pool.submit(perf_counter, func, *args, stage=name)
+                    running[future] = name
+                    del pending[name]
+            if not running:
+                raise Exception("run_stages: unsatisfiable inputs for", sorted(pending))
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                results[running.pop(future)] = future.result()
+    return results
+
+
+def critical_path(stages, results):
+    """The chain of dependent stages with the largest summed time, and that sum."""
+    finish = {}
+    previous = {}
+
+    def visit(name):
+        if name not in finish:
+            inputs = stages[name][1]
+            for dependency in inputs:
+                visit(dependency)
+            previous[name] = max(inputs, key=finish.get) if inputs else None
+            start = finish[previous[name]] if inputs else 0.0
+            finish[name] = start + results[name][1]
+        return finish[name]
+
+    for name in stages:
+        visit(name)
+    name = max(finish, key=finish.get)
+    total = finish[name]
+    path = []
+    while name:
+        path.append(name)
+        name = previous[name]
+    return path[::-1], total
+
+
 def formatter(query_type, difference, funct_return=False, whitespace=0):
     print("{:<23}".format("   " + query_type + ":"), end="")
     if difference > 1:
         print("{:>12}".format("%.4f" % difference + " s "))
     else:
         print("{:>12}".format("%.4f" % (difference * 1000) + " ms"))
+    return format_value(funct_return, whitespace)
+
+
+def format_value(value, whitespace=0):
     if whitespace:
-        return f"{'{:,}'.format(funct_return): <{whitespace}}"
-    return funct_return
+        return f"{'{:,}'.format(value): <{whitespace}}"
+    return value
+
+
+def cache_filename(cache_suffix="", extension=".txt"):
+    name = hashlib.sha256((CONFIG["user_name"] + cache_suffix).encode("utf-8")).hexdigest()
+    return os.path.join(CONFIG["cache_dir"], name + extension)
 
 
 def force_close_file(data, cache_comment, filename):
@@ -185,10 +829,11 @@ def force_close_file(data, cache_comment, filename):
 
 
 def count_all_contributed_repos(username, user_id, start_date=None, end_date=None):
+    from dateutil import parser, relativedelta
+
     repos_with_contributions = set()
 
     # Part 1: Repos where user is a collaborator or org member with commits
-    query_count("graph_repos_stars")
     collab_query = """
     query ($owner_affiliation: [RepositoryAffiliation], $login: String!, $cursor: String, $userId: ID!) {
         user(login: $login) {
@@ -244,7 +889,6 @@ def count_all_contributed_repos(username, user_id, start_date=None, end_date=Non
         variables["cursor"] = data["pageInfo"]["endCursor"]
 
     # Part 2: PR and commit contributions (including org repos)
-    query_count("pr_contributed_repos")
     pr_query = """
     query($login: String!, $startDate: DateTime, $endDate: DateTime) {
         user(login: $login) {
@@ -252,9 +896,6 @@ def count_all_contributed_repos(username, user_id, start_date=None, end_date=Non
                 commitContributionsByRepository(maxRepositories: 100) {
                     repository {
                         nameWithOwner
-                        owner {
-                            login
-                        }
                     }
                     contributions {
                         totalCount
@@ -348,49 +989,165 @@ def count_all_contributed_repos(username, user_id, start_date=None, end_date=Non
             "endCursor"
         ]  # Update cursor for pagination
 
-    # Query for organization repositories where user is owner
-    owned_query_org = """
-    query ($login: String!) {
+    # Organization repositories where user is owner
+    owned_repos |= owned_org_repos(username)
+
+    # Exclude only personal and owned org repos
+    contrib_only_repos = repos_with_contributions - owned_repos
+
+    return len(contrib_only_repos), contrib_only_repos
+
+
+def user_organizations(username):
+    """All of the user's organizations as {login: {"updatedAt", "repoCount"}}."""
+    query = """
+    query ($login: String!, $cursor: String) {
         user(login: $login) {
-            organizations(first: 100) {
+            organizations(first: 100, after: $cursor) {
                 edges {
                     node {
-                        repositories(first: 100, affiliations: [OWNER]) {
-                            edges {
-                                node {
-                                    nameWithOwner
-                                }
-                            }
+                        login
+                        updatedAt
+                        repositories(affiliations: [OWNER]) {
+                            totalCount
                         }
                     }
                 }
+                pageInfo {
+                    endCursor
+                    hasNextPage
+                }
             }
         }
     }"""
-    debug("Fetching org repos where user is owner")
-    response = simple_request(
-        "count_all_contributed_repos_owned_org", owned_query_org, {"login": username}
+    variables = {"login": username, "cursor": None}
+    orgs = {}
+    while True:
+        response = simple_request("user_organizations", query, variables)
+        json_response = response.json()
+        if "errors" in json_response:
+            raise Exception(f"GraphQL errors: {json_response['errors']}")
+        data = json_response["data"]["user"]["organizations"]
+        for edge in data["edges"]:
+            node = edge["node"]
+            orgs[node["login"]] = {
+                "updatedAt": node["updatedAt"],
+                "repoCount": node["repositories"]["totalCount"],
+            }
+        if not data["pageInfo"]["hasNextPage"]:
+            return orgs
+        variables["cursor"] = data["pageInfo"]["endCursor"]
+
+
+def org_repos_query(count):
+    """A query fetching one page of owned repositories for each of ``count`` orgs."""
+    parameters = ", ".join(
+        f"$login{i}: String!, $cursor{i}: String" for i in range(count)
     )
-    json_response = response.json()
-    if "errors" in json_response:
-        debug(f"GraphQL errors: {json_response['errors']}")
-        raise Exception(f"GraphQL errors: {json_response['errors']}")
-    orgs = json_response["data"]["user"]["organizations"]["edges"]
-    for org_edge in orgs:
-        repos = org_edge["node"]["repositories"]["edges"]
-        for repo_edge in repos:
-            owned_repos.add(repo_edge["node"]["nameWithOwner"])
+    fields = "".join(
+        f"""
+        org{i}: organization(login: $login{i}) {{
+            repositories(first: 100, after: $cursor{i}, affiliations: [OWNER]) {{
+                edges {{
+                    node {{
+                        nameWithOwner
+                    }}
+                }}
+                pageInfo {{
+                    endCursor
+                    hasNextPage
+                }}
+            }}
+        }}"""
+        for i in range(count)
+    )
+    return f"""
+    query ({parameters}) {{{fields}
+    }}"""
+
+
+def org_repositories(logins):
+    """Owned repositories of each org as {login: [nameWithOwner, ...]}.
+
+    Pages for up to ORG_BATCH_SIZE orgs are fetched per request under
+    aliases; an org stays in the batch rotation until its cursor runs out,
+    so every request after the first carries the next page of several orgs.
+    """
+    repos = {login: [] for login in logins}
+    cursors = {login: None for login in logins}  # orgs with pages left
+    while cursors:
+        batch = list(cursors)[:ORG_BATCH_SIZE]
+        variables = {}
+        for i, login in enumerate(batch):
+            variables[f"login{i}"] = login
+            variables[f"cursor{i}"] = cursors[login]
+        debug(f"org_repositories: Fetching repos for {', '.join(batch)}")
+        response = simple_request(
+            "org_repositories", org_repos_query(len(batch)), variables
+        )
+        json_response = response.json()
+        if "errors" in json_response:
+            raise Exception(f"GraphQL errors: {json_response['errors']}")
+        for i, login in enumerate(batch):
+            org = json_response["data"][f"org{i}"]
+            if org is None:
+                debug(f"org_repositories: Organization {login} is not visible.")
+                del cursors[login]
+                continue
+            data = org["repositories"]
+            repos[login] += [edge["node"]["nameWithOwner"] for edge in data["edges"]]
+            if data["pageInfo"]["hasNextPage"]:
+                cursors[login] = data["pageInfo"]["endCursor"]
+            else:
+                del cursors[login]
+    return repos
 
-    # Exclude only personal and owned org repos
-    contrib_only_repos = repos_with_contributions - owned_repos
 
-    return len(contrib_only_repos), contrib_only_repos
+def owned_org_repos(username, cache_suffix="_orgs"):
+    """Owned repositories across the user's orgs, cached per org.
+
+    An org's list is refetched when its updatedAt or owned repository count
+    changes, or once it is ORG_REPOS_MAX_AGE old, since renames and
+    transfers touch neither.
+    """
+    filename = cache_filename(cache_suffix, ".json")
+    try:
+        with open(filename, "r") as f:
+            cached = json.load(f)
+    except (FileNotFoundError, ValueError):
+        cached = {}
+    orgs = user_organizations(username)
+    now = time.time()
+    stale = [
+        login
+        for login, org in orgs.items()
+        if login not in cached
+        or cached[login].get("updatedAt") != org["updatedAt"]
+        or cached[login].get("repoCount") != org["repoCount"]
+        or now - cached[login].get("fetchedAt", 0) > ORG_REPOS_MAX_AGE
+    ]
+    debug(
+        f"owned_org_repos: {len(orgs)} organizations, {len(stale)} changed or expired since the last run"
+    )
+    fetched = org_repositories(stale)
+    cache = {
+        login: (
+            dict(orgs[login], fetchedAt=now, repos=fetched[login])
+            if login in fetched
+            else cached[login]
+        )
+        for login in orgs
+    }
+    write_atomic(filename, json.dumps(cache))
+    return {repo for entry in cache.values() for repo in entry["repos"]}
 
 
 # ----------------------- Core Functions -----------------------
 
 
 def daily_readme(birthday):
+    from dateutil import relativedelta
+
     diff = relativedelta.relativedelta(datetime.datetime.today(), birthday)
     result = "{} {}, {} {}, {} {}{}".format(
         diff.years,
@@ -406,7 +1163,6 @@ def daily_readme(birthday):
 
 
 def user_getter(username):
-    query_count("user_getter")
     query = """
     query($login: String!){
         user(login: $login) {
@@ -423,7 +1179,6 @@ def user_getter(username):
 
 
 def follower_getter(username):
-    query_count("follower_getter")
     query = """
     query($login: String!){
         user(login: $login) {
@@ -439,50 +1194,193 @@ def follower_getter(username):
     return count
 
 
-def graph_repos_stars(
-    count_type, owner_affiliation, cursor=None, repos_with_commits=None
-):
-    if count_type == "commit_repos" and repos_with_commits is None:
-        repos_with_commits = set()  # Use a set to track repos with commits
-    query_count("graph_repos_stars")
+def preflight_signals(username):
+    """Followers, owned repos and stars, the latest push and this year's contributions.
+
+    Everything a run renders changes one of these, and they all come from a
+    single query. Stars are summed over the 100 most starred owned repos,
+    so a star on a repo outside them goes unnoticed until another signal
+    changes.
+    """
     query = """
-    query ($owner_affiliation: [RepositoryAffiliation], $login: String!, $cursor: String, $userId: ID!) {
+    query($login: String!, $from: DateTime!) {
         user(login: $login) {
-            repositories(first: 100, after: $cursor, ownerAffiliations: $owner_affiliation) {
+            followers {
                 totalCount
-                edges {
-                    node {
-                        ... on Repository {
-                            nameWithOwner
-                            stargazers {
-                                totalCount
-                            }
-                            updatedAt
-                            defaultBranchRef {
-                                target {
-                                    ... on Commit {
-                                        history(first: 1, author: {id: $userId}) {
-                                            totalCount
-                                        }
-                                    }
-                                }
-                            }
-                        }
-                    }
+            }
+            owned: repositories(first: 100, ownerAffiliations: [OWNER], orderBy: {field: STARGAZERS, direction: DESC}) {
+                totalCount
+                nodes {
+                    stargazerCount
                 }
-                pageInfo {
-                    endCursor
-                    hasNextPage
+            }
+            pushed: repositories(first: 1, ownerAffiliations: [OWNER, COLLABORATOR, ORGANIZATION_MEMBER], orderBy: {field: PUSHED_AT, direction: DESC}) {
+                nodes {
+                    pushedAt
+                }
+            }
+            contributionsCollection(from: $from) {
+                contributionCalendar {
+                    totalContributions
                 }
             }
         }
     }"""
-    variables = {
-        "owner_affiliation": owner_affiliation,
-        "login": USER_NAME,
-        "cursor": cursor,
-        "userId": OWNER_ID,  # Use the user's node ID for commit filtering
+    year = datetime.datetime.utcnow().year
+    variables = {"login": username, "from": f"{year}-01-01T00:00:00Z"}
+    response = simple_request("preflight_signals", query, variables)
+    json_response = response.json()
+    if "errors" in json_response:
+        raise Exception(f"GraphQL errors: {json_response['errors']}")
+    user = json_response["data"]["user"]
+    pushed = user["pushed"]["nodes"]
+    return {
+        "followers": user["followers"]["totalCount"],
+        "repos": user["owned"]["totalCount"],
+        "stars": sum(node["stargazerCount"] for node in user["owned"]["nodes"]),
+        "pushed_at": pushed[0]["pushedAt"] if pushed else None,
+        "contributions": [
+            year,
+            user["contributionsCollection"]["contributionCalendar"]["totalContributions"],
+        ],
+    }
+
+
+def rest_counter(func_name, path, meta, extract, max_retries=5):
+    """GET a REST API path conditionally and return ``extract(response)``.
+
+    The ETag and Last-Modified of the last 200 are stored with its extracted
+    value in meta["rest_validators"]. A 304 returns that value again and,
+    unlike any GraphQL query, costs no primary rate-limit budget.
+    """
+    url = path if "://" in path else CONFIG["rest_url"].rstrip("/") + path
+    stored = meta["rest_validators"].get(url)
+    headers = dict(CONFIG["headers"], accept="application/vnd.github+json")
+    if stored:
+        if stored["etag"]:
+            headers["if-none-match"] = stored["etag"]
+        if stored["last_modified"]:
+            headers["if-modified-since"] = stored["last_modified"]
+    debug(f"{func_name}: GET {url}")
+    latency = 0.0
+    for attempt in range(max_retries):
+        start = time.perf_counter()
+        response = http_session().get(url, headers=headers, timeout=REQUEST_TIMEOUT)
+        latency += time.perf_counter() - start
+        wait = None if response.status_code in (200, 304) else retry_delay(response, attempt)
+        if wait is None or attempt == max_retries - 1:
+            break
+        debug(f"{func_name}: Got {response.status_code}, retrying in {wait}s")
+        time.sleep(wait)
+    record_span(func_name, {"url": url}, response, attempt, latency, cost=0)
+    if response.status_code == 304 and stored:
+        debug(f"{func_name}: Not modified.")
+        return stored["value"]
+    if response.status_code != 200:
+        raise Exception(func_name, "has failed with", response.status_code, response.text)
+    value = extract(response)
+    meta["rest_validators"][url] = {
+        "etag": response.headers.get("ETag"),
+        "last_modified": response.headers.get("Last-Modified"),
+        "value": value,
     }
+    return value
+
+
+def rest_follower_count(meta):
+    return rest_counter(
+        "follower_getter_rest",
+        "/users/" + CONFIG["user_name"],
+        meta,
+        lambda response: response.json()["followers"],
+    )
+
+
+def rest_repos_stars(meta):
+    """(repo count, stargazer sum) of the repos the token's user owns, page by page."""
+
+    def page_counts(response):
+        repos = response.json()
+        return {
+            "repos": len(repos),
+            "stars": sum(repo["stargazers_count"] for repo in repos),
+            "next": response.links.get("next", {}).get("url"),
+        }
+
+    path = "/user/repos?affiliation=owner&per_page=100"
+    repo_count = star_count = 0
+    while path:
+        page = rest_counter("graph_repos_stars_rest", path, meta, page_counts)
+        repo_count += page["repos"]
+        star_count += page["stars"]
+        path = page["next"]
+    debug(f"rest_repos_stars: {repo_count} repos, {star_count} stars")
+    return repo_count, star_count
+
+
+# The repository fields each graph_repos_stars count type reads. Queries are
+# generated from these, so a count type pays only for what it uses: "repos"
+# needs no repository nodes at all and "stars" no commit history.
+REPOSITORY_FIELDS = {
+    "repos": None,
+    "stars": "stargazerCount",
+    "commit_repos": """
+                        nameWithOwner
+                        defaultBranchRef {
+                            target {
+                                ... on Commit {
+                                    history(first: 1, author: {id: $userId}) {
+                                        totalCount
+                                    }
+                                }
+                            }
+                        }""",
+}
+
+
+def repositories_query(count_type):
+    """The graph_repos_stars query for ``count_type``, declaring only the variables it uses."""
+    fields = REPOSITORY_FIELDS[count_type]
+    if fields is None:
+        return """
+    query ($owner_affiliation: [RepositoryAffiliation], $login: String!) {
+        user(login: $login) {
+            repositories(ownerAffiliations: $owner_affiliation) {
+                totalCount
+            }
+        }
+    }"""
+    parameters = "$owner_affiliation: [RepositoryAffiliation], $login: String!, $cursor: String"
+    if "$userId" in fields:
+        parameters += ", $userId: ID!"
+    return f"""
+    query ({parameters}) {{
+        user(login: $login) {{
+            repositories(first: 100, after: $cursor, ownerAffiliations: $owner_affiliation) {{
+                edges {{
+                    node {{{fields}
+                    }}
+                }}
+                pageInfo {{
+                    endCursor
+                    hasNextPage
+                }}
+            }}
+        }}
+    }}"""
+
+
+def graph_repos_stars(
+    count_type, owner_affiliation, cursor=None, repos_with_commits=None
+):
+    if count_type == "commit_repos" and repos_with_commits is None:
+        repos_with_commits = set()  # Use a set to track repos with commits
+    query = repositories_query(count_type)
+    variables = {"owner_affiliation": owner_affiliation, "login": CONFIG["user_name"]}
+    if REPOSITORY_FIELDS[count_type] is not None:
+        variables["cursor"] = cursor
+    if "$userId" in query:
+        variables["userId"] = CONFIG["owner_id"]  # Use the user's node ID for commit filtering
     debug(
         f"graph_repos_stars: Fetching with cursor {cursor} for affiliation {owner_affiliation}, count_type {count_type}"
     )
@@ -508,7 +1406,7 @@ def graph_repos_stars(
     elif count_type == "stars":
         total = 0
         for edge in data["edges"]:
-            total += edge["node"]["stargazers"]["totalCount"]
+            total += edge["node"]["stargazerCount"]
         if data["pageInfo"]["hasNextPage"]:
             total += graph_repos_stars(
                 count_type, owner_affiliation, data["pageInfo"]["endCursor"]
@@ -547,7 +1445,6 @@ def recursive_loc(
 ):
     debug(f"recursive_loc: Starting for {owner}/{repo_name} with cursor {cursor}")
     while True:
-        query_count("recursive_loc")
         query = """
         query ($repo_name: String!, $owner: String!, $cursor: String) {
             repository(name: $repo_name, owner: $owner) {
@@ -555,10 +1452,8 @@ def recursive_loc(
                     target {
                         ... on Commit {
                             history(first: 100, after: $cursor) {
-                                totalCount
                                 edges {
                                     node {
-                                        committedDate
                                         author {
                                             user {
                                                 id
@@ -580,10 +1475,8 @@ def recursive_loc(
         }"""
         variables = {"repo_name": repo_name, "owner": owner, "cursor": cursor}
         debug(f"recursive_loc: Querying commits with variables {variables}")
-        response = requests.post(
-            "https://api.github.com/graphql",
-            json={"query": query, "variables": variables},
-            headers=HEADERS,
+        response = send_with_retries(
+            "recursive_loc", query, variables, repo=f"{owner}/{repo_name}"
         )
         if response.status_code == 200:
             response_data = response.json()["data"]["repository"]
@@ -595,7 +1488,7 @@ def recursive_loc(
                     if (
                         node.get("author")
                         and node["author"].get("user")
-                        and node["author"]["user"]["id"] == OWNER_ID
+                        and node["author"]["user"]["id"] == CONFIG["owner_id"]
                     ):
                         my_commits += 1
                         addition_total += node["additions"]
@@ -612,10 +1505,7 @@ def recursive_loc(
                 )
                 return (0, 0, 0)
         else:
-            filename = os.path.join(
-                CACHE_DIR,
-                hashlib.sha256(USER_NAME.encode("utf-8")).hexdigest() + ".txt",
-            )
+            filename = cache_filename()
             force_close_file(data, cache_comment, filename)
             if response.status_code == 403:
                 raise Exception("Too many requests! You've hit the anti-abuse limit!")
@@ -628,20 +1518,130 @@ def recursive_loc(
     return addition_total, deletion_total, my_commits
 
 
-def loc_query(
-    owner_affiliation,
-    comment_size=0,
-    force_cache=False,
-    cursor=None,
-    edges=None,
-    cache_suffix="",
-):
-    if edges is None:
-        edges = []
-    query_count("loc_query")
+def uses_git_mirror(total_commits):
+    # git log can only tell my commits apart by author name or email, so
+    # without git_authors the mirror is never used.
+    return (
+        bool(CONFIG["git_mirror"] and CONFIG["git_authors"])
+        and total_commits >= CONFIG["git_mirror_threshold"]
+    )
+
+
+def repo_loc(owner, repo_name, total_commits, data, cache_comment):
+    """(additions, deletions, my_commits) for a repo, from the git mirror if it is large."""
+    if uses_git_mirror(total_commits):
+        try:
+            return git_loc(owner, repo_name)
+        except (OSError, subprocess.CalledProcessError) as error:
+            debug(
+                f"repo_loc: git mirror failed for {owner}/{repo_name} ({error}), walking the API instead."
+            )
+    return recursive_loc(owner, repo_name, data, cache_comment)
+
+
+def git(*args, cwd=None, auth=False):
+    command = ["git"]
+    if auth and CONFIG["access_token"]:
+        # Passed per command so the token is never written to the mirror's config.
+        credentials = base64.b64encode(
+            f"x-access-token:{CONFIG['access_token']}".encode("utf-8")
+        ).decode("ascii")
+        command += ["-c", f"http.extraHeader=Authorization: Basic {credentials}"]
+    return subprocess.run(
+        command + list(args), cwd=cwd, check=True, capture_output=True, text=True
+    ).stdout
+
+
+def mirror_repo(owner, repo_name):
+    """Clone or fetch the branches of owner/repo_name into a bare mirror; returns its path."""
+    path = os.path.join(CONFIG["git_mirror"], owner, repo_name + ".git")
+    if not os.path.isdir(path):
+        url = f"{CONFIG['git_remote'].rstrip('/')}/{owner}/{repo_name}.git"
+        debug(f"mirror_repo: Cloning {url} into {path}")
+        git("clone", "--bare", "--quiet", url, path, auth=True)
+    else:
+        debug(f"mirror_repo: Fetching {owner}/{repo_name} into {path}")
+        git(
+            "fetch", "--prune", "--quiet", "origin", "+refs/heads/*:refs/heads/*",
+            cwd=path, auth=True,
+        )
+    return path
+
+
+def git_loc(owner, repo_name):
+    """Count my commits, additions and deletions on the default branch of a mirror.
+
+    Streams ``git log --numstat`` for commits whose author name or email
+    matches CONFIG["git_authors"]. Totals and the head they were counted up
+    to are kept in today-loc.json inside the mirror, so later runs only read
+    the commits made since, unless the branch was rewritten or the authors
+    or log options changed. Merge commits are skipped, as GraphQL history
+    does not credit them with the merged branch's changes.
+    """
+    path = mirror_repo(owner, repo_name)
+    authors = CONFIG["git_authors"]
+    options = ["--numstat", "--format=%x00%H", "--no-merges"]
+    state_file = os.path.join(path, "today-loc.json")
+    try:
+        with open(state_file, "r") as f:
+            state = json.load(f)
+    except (FileNotFoundError, ValueError):
+        state = {}
+    try:
+        head = git("rev-parse", "--verify", "--quiet", "HEAD^{commit}", cwd=path).strip()
+    except subprocess.CalledProcessError:
+        debug(f"git_loc: {owner}/{repo_name} has no commits on its default branch.")
+        return (0, 0, 0)
+
+    if (
+        state.get("authors") == authors
+        and state.get("options") == options
+        and state.get("head")
+        and subprocess.run(
+            ["git", "merge-base", "--is-ancestor", state["head"], head], cwd=path
+        ).returncode == 0
+    ):
+        revision = f"{state['head']}..{head}"
+    else:
+        state = {
+            "authors": authors,
+            "options": options,
+            "additions": 0,
+            "deletions": 0,
+            "my_commits": 0,
+        }
+        revision = head
+    debug(f"git_loc: Reading {owner}/{repo_name} {revision}")
+
+    command = ["git", "log"] + options
+    command += ["--author=" + author for author in authors] + [revision, "--"]
+    with subprocess.Popen(
+        command, cwd=path, stdout=subprocess.PIPE, text=True, errors="replace"
+    ) as process:
+        for line in process.stdout:
+            if line.startswith("\0"):
+                state["my_commits"] += 1
+            elif line.strip():
+                added, deleted, _ = line.split("\t", 2)
+                # Binary files are listed as "-".
+                if added != "-":
+                    state["additions"] += int(added)
+                    state["deletions"] += int(deleted)
+    if process.returncode:
+        raise subprocess.CalledProcessError(process.returncode, command)
+
+    state["head"] = head
+    write_atomic(state_file, json.dumps(state))
     debug(
-        f"loc_query{cache_suffix}: Fetching repositories with cursor {cursor} for affiliation {owner_affiliation}"
+        f"git_loc: Completed for {owner}/{repo_name} -> commits: {state['my_commits']}, additions: {state['additions']}, deletions: {state['deletions']}"
     )
+    return state["additions"], state["deletions"], state["my_commits"]
+
+
+def repo_inventory(owner_affiliation, cursor=None, edges=None, cache_suffix=""):
+    """Page through the user's repositories with their commit totals."""
+    if edges is None:
+        edges = []
     query = """
     query ($owner_affiliation: [RepositoryAffiliation], $login: String!, $cursor: String) {
         user(login: $login) {
@@ -670,37 +1670,42 @@ def loc_query(
             }
         }
     }"""
-    variables = {
-        "owner_affiliation": owner_affiliation,
-        "login": USER_NAME,
-        "cursor": cursor,
-    }
-    response = simple_request("loc_query", query, variables)
-    repos_data = response.json()["data"]["user"]["repositories"]
-    debug(f"loc_query{cache_suffix}: Retrieved {len(repos_data['edges'])} repositories")
-    if repos_data["pageInfo"]["hasNextPage"]:
-        edges += repos_data["edges"]
-        return loc_query(
-            owner_affiliation,
-            comment_size,
-            force_cache,
-            repos_data["pageInfo"]["endCursor"],
-            edges,
-            cache_suffix,
+    while True:
+        debug(
+            f"loc_query{cache_suffix}: Fetching repositories with cursor {cursor} for affiliation {owner_affiliation}"
         )
-    else:
-        return cache_builder(
-            edges + repos_data["edges"], comment_size, force_cache, cache_suffix
+        variables = {
+            "owner_affiliation": owner_affiliation,
+            "login": CONFIG["user_name"],
+            "cursor": cursor,
+        }
+        response = simple_request("loc_query", query, variables)
+        repos_data = response.json()["data"]["user"]["repositories"]
+        debug(
+            f"loc_query{cache_suffix}: Retrieved {len(repos_data['edges'])} repositories"
         )
+        edges += repos_data["edges"]
+        if not repos_data["pageInfo"]["hasNextPage"]:
+            return edges
+        cursor = repos_data["pageInfo"]["endCursor"]
+
+
+def loc_query(
+    owner_affiliation,
+    comment_size=0,
+    force_cache=False,
+    cursor=None,
+    edges=None,
+    cache_suffix="",
+):
+    edges = repo_inventory(owner_affiliation, cursor, edges, cache_suffix)
+    return cache_builder(edges, comment_size, force_cache, cache_suffix)
 
 
 def cache_builder(edges, comment_size, force_cache, cache_suffix):
     debug(f"cache_builder{cache_suffix}: Building cache...")
     cached = True
-    filename = os.path.join(
-        CACHE_DIR,
-        hashlib.sha256((USER_NAME + cache_suffix).encode("utf-8")).hexdigest() + ".txt",
-    )
+    filename = cache_filename(cache_suffix)
     try:
         with open(filename, "r") as f:
             data = f.readlines()
@@ -726,6 +1731,7 @@ def cache_builder(edges, comment_size, force_cache, cache_suffix):
     cache_comment = data[:comment_size]
     data = data[comment_size:]
     new_data = []
+    seen_on = datetime.datetime.utcnow().date().isoformat()
     for index in range(len(edges)):
         current_hash = hashlib.sha256(
             edges[index]["node"]["nameWithOwner"].encode("utf-8")
@@ -744,29 +1750,23 @@ def cache_builder(edges, comment_size, force_cache, cache_suffix):
                         f"cache_builder{cache_suffix}: Repository {edges[index]['node']['nameWithOwner']} updated. Recalculating LOC."
                     )
                     owner, repo_name = edges[index]["node"]["nameWithOwner"].split("/")
-                    loc = recursive_loc(owner, repo_name, data, cache_comment)
+                    loc = repo_loc(
+                        owner, repo_name, expected_commits, data, cache_comment
+                    )
                     new_data.append(
-                        current_hash
-                        + " "
-                        + str(expected_commits)
-                        + " "
-                        + str(loc[2])
-                        + " "
-                        + str(loc[0])
-                        + " "
-                        + str(loc[1])
-                        + "\n"
+                        cache_row(current_hash, expected_commits, loc, seen_on)
                     )
                 else:
-                    new_data.append(data[index])
+                    new_data.append(
+                        cache_row(current_hash, commit_count, cache_loc(rest), seen_on)
+                    )
             except (TypeError, IndexError):
-                new_data.append(current_hash + " 0 0 0 0\n")
+                new_data.append(cache_row(current_hash, 0, (0, 0, 0), seen_on))
         else:
             debug(
                 f"cache_builder{cache_suffix}: New repository found: {edges[index]['node']['nameWithOwner']}. Calculating data."
             )
             owner, repo_name = edges[index]["node"]["nameWithOwner"].split("/")
-            loc = recursive_loc(owner, repo_name, data, cache_comment)
             expected_commits = (
                 edges[index]["node"]["defaultBranchRef"]["target"]["history"][
                     "totalCount"
@@ -774,30 +1774,79 @@ def cache_builder(edges, comment_size, force_cache, cache_suffix):
                 if edges[index]["node"]["defaultBranchRef"]
                 else 0
             )
-            new_data.append(
-                current_hash
-                + " "
-                + str(expected_commits)
-                + " "
-                + str(loc[2])
-                + " "
-                + str(loc[0])
-                + " "
-                + str(loc[1])
-                + "\n"
-            )
+            loc = repo_loc(owner, repo_name, expected_commits, data, cache_comment)
+            new_data.append(cache_row(current_hash, expected_commits, loc, seen_on))
     with open(filename, "w") as f:
         f.writelines(cache_comment)
         f.writelines(new_data)
-    loc_add, loc_del = 0, 0
-    for line in new_data:
-        loc_values = line.split()
-        loc_add += int(loc_values[3])
-        loc_del += int(loc_values[4])
+    loc_add, loc_del = cache_totals(new_data)
     debug(f"cache_builder{cache_suffix}: Cache build complete.")
     return [loc_add, loc_del, loc_add - loc_del, cached]
 
 
+def cache_row(repo_hash, commits, loc, last_seen, tombstone=False):
+    """One LOC cache line for ``loc`` = (additions, deletions, my_commits).
+
+    Fields: hash, commits, my commits, additions, deletions, the date the
+    repo was last in an inventory and, for repos that have since
+    disappeared, "tombstone". Lines from before last-seen dates have only
+    the first five fields and are read as live.
+    """
+    line = f"{repo_hash} {commits} {loc[2]} {loc[0]} {loc[1]} {last_seen}"
+    return line + (" tombstone\n" if tombstone else "\n")
+
+
+def cache_loc(fields):
+    """(additions, deletions, my_commits) from the fields after hash and commits."""
+    return int(fields[1]), int(fields[2]), int(fields[0])
+
+
+def is_tombstone(line):
+    return line.split()[6:7] == ["tombstone"]
+
+
+def cache_totals(lines):
+    """Summed (additions, deletions) of the live rows in ``lines``."""
+    rows = [line.split() for line in lines]
+    rows = [parts for parts in rows if len(parts) >= 5 and parts[6:7] != ["tombstone"]]
+    return sum(int(parts[3]) for parts in rows), sum(int(parts[4]) for parts in rows)
+
+
+def reconcile_cache(entries, seen, seen_on):
+    """Bring {hash: line} ``entries`` in line with the full inventory ``seen``.
+
+    Rows of repos in ``seen`` get ``seen_on`` as their last-seen date, and
+    tombstones among them come back with their numbers as they were, so a
+    repo that reappears unchanged needs no re-walk. Rows of repos missing
+    from ``seen`` become tombstones, which no total counts; compaction drops
+    those last seen more than TOMBSTONE_DAYS ago. Returns the number of
+    rows (tombstoned, restored, dropped).
+    """
+    cutoff = (
+        datetime.date.fromisoformat(seen_on) - datetime.timedelta(days=TOMBSTONE_DAYS)
+    ).isoformat()
+    tombstoned = restored = dropped = 0
+    for repo_hash, line in list(entries.items()):
+        parts = line.split()
+        dead = parts[6:7] == ["tombstone"]
+        if repo_hash in seen:
+            entries[repo_hash] = cache_row(repo_hash, parts[1], cache_loc(parts[2:5]), seen_on)
+            restored += dead
+        elif dead:
+            if parts[5] < cutoff:
+                del entries[repo_hash]
+                dropped += 1
+        else:
+            # Rows without a date were written before tombstones existed;
+            # their expiry counts from now.
+            last_seen = parts[5] if len(parts) > 5 else seen_on
+            entries[repo_hash] = cache_row(
+                repo_hash, parts[1], cache_loc(parts[2:5]), last_seen, tombstone=True
+            )
+            tombstoned += 1
+    return tombstoned, restored, dropped
+
+
 def flush_cache(edges, filename, comment_size, cache_suffix):
     debug(f"flush_cache{cache_suffix}: Flushing and rebuilding cache...")
     with open(filename, "r") as f:
@@ -818,18 +1867,75 @@ def flush_cache(edges, filename, comment_size, cache_suffix):
 
 def commit_counter(comment_size, cache_suffix=""):
     total_commits = 0
-    filename = os.path.join(
-        CACHE_DIR,
-        hashlib.sha256((USER_NAME + cache_suffix).encode("utf-8")).hexdigest() + ".txt",
-    )
+    filename = cache_filename(cache_suffix)
     with open(filename, "r") as f:
         data = f.readlines()[comment_size:]
     for line in data:
-        total_commits += int(line.split()[2])
+        if not is_tombstone(line):
+            total_commits += int(line.split()[2])
     debug(f"commit_counter{cache_suffix}: Total commits counted = {total_commits}")
     return total_commits
 
 
+def ascii_art_source(image_path, params):
+    """Identify an ASCII-art source by its image bytes and rendering settings.
+
+    ascii_gen (and with it Pillow and NumPy) is only imported when a source
+    is given; the art itself is rendered by ascii_art on first use.
+    """
+    import ascii_gen
+
+    settings = {
+        "width": ascii_gen.WIDTH,
+        "height": ascii_gen.HEIGHT,
+        "density": ascii_gen.DENSITY,
+        "invert": ascii_gen.INVERT,
+        "brightness": ascii_gen.BRIGHTNESS,
+        "contrast": ascii_gen.CONTRAST,
+    }
+    settings.update((key, value) for key, value in params.items() if value is not None)
+    return {
+        "image": image_path,
+        "params": settings,
+        "key": ascii_gen.render_key(image_path, settings),
+        "art": None,
+    }
+
+
+def ascii_art(source):
+    if source["art"] is None:
+        import ascii_gen
+
+        debug(f"ascii_art: Rendering {source['image']} with {source['params']}")
+        source["art"] = ascii_gen.image_to_ascii(source["image"], **source["params"])
+    return source["art"]
+
+
+def inject_ascii_art(svg, art):
+    """Replace the rows of the <text class="ascii"> block, keeping its fill and origin."""
+    from xml.dom import minidom
+
+    import ascii_gen
+
+    for block in svg.getElementsByTagName("text"):
+        if block.getAttribute("class") == "ascii":
+            break
+    else:
+        raise Exception("svg_overwrite: no <text class=\"ascii\"> block to render into")
+    fragment = minidom.parseString(
+        ascii_gen.ascii_to_svg(
+            art,
+            x=int(block.getAttribute("x") or 15),
+            y=int(block.getAttribute("y") or 30),
+            fill=block.getAttribute("fill") or "#24292f",
+        )
+    )
+    while block.firstChild:
+        block.removeChild(block.firstChild)
+    for node in fragment.documentElement.childNodes:
+        block.appendChild(svg.importNode(node, True))
+
+
 def svg_overwrite(
     filename,
     age_data,
@@ -839,119 +1945,147 @@ def svg_overwrite(
     contrib_data,
     follower_data,
     loc_data,
+    art=None,
 ):
-    debug(f"svg_overwrite: Overwriting SVG file {filename}")
-    svg = minidom.parse(filename)
+    from xml.dom import minidom
 
-    with open(filename, mode="w", encoding="utf-8") as f:
-        tspan = svg.getElementsByTagName("tspan")
-
-        def safe_update(index, data):
-            if len(tspan) > index:
-                # Ensure data is a string and remove any leading/trailing spaces only if it's being replaced
-                data = str(data).strip() if data is not None else ""
-                if tspan[index].firstChild:
-                    tspan[index].firstChild.data = data  # Replace existing text
-                else:
-                    tspan[index].appendChild(
-                        svg.createTextNode(data)
-                    )  # Add new text node if empty
-
-        # Update all relevant <tspan> elements
-        safe_update(30, age_data)
-        safe_update(69, repo_data)
-        safe_update(71, contrib_data)
-        safe_update(73, commit_data)
-        safe_update(75, star_data)
-        safe_update(77, follower_data)
-        safe_update(79, loc_data[2])
-        safe_update(80, loc_data[0] + "++")
-        safe_update(81, loc_data[1] + "--")
-
-        # Now only remove the spaces from the specific updated content
-        xml_string = svg.toxml("utf-8").decode("utf-8")
-
-        # Only remove unwanted spaces between tags in the areas that were updated
-        for index in [30, 69, 71, 73, 75, 77, 79, 80, 81]:
-            tspan_text = str(tspan[index].firstChild.data).strip()
-            xml_string = xml_string.replace(
-                f'<tspan class="valueColor">{tspan[index].firstChild.data}</tspan>',
-                f'<tspan class="valueColor">{tspan_text}</tspan>',
-            )
-
-        f.write(xml_string)
+    debug(f"svg_overwrite: Overwriting SVG file {filename}")
+    with open(filename, "r", encoding="utf-8") as f:
+        original = f.read()
+    svg = minidom.parseString(original)
+    if art is not None:
+        inject_ascii_art(svg, art)
+
+    # Stats are addressed by position among the tspans outside the ASCII
+    # art block, so the art can have any number of rows.
+    tspan = [
+        node
+        for node in svg.getElementsByTagName("tspan")
+        if node.parentNode.getAttribute("class") != "ascii"
+    ]
+
+    def safe_update(index, data):
+        if len(tspan) > index:
+            # Ensure data is a string and remove any leading/trailing spaces only if it's being replaced
+            data = str(data).strip() if data is not None else ""
+            if tspan[index].firstChild:
+                tspan[index].firstChild.data = data  # Replace existing text
+            else:
+                tspan[index].appendChild(
+                    svg.createTextNode(data)
+                )  # Add new text node if empty
+
+    # Update all relevant <tspan> elements
+    safe_update(5, age_data)
+    safe_update(44, repo_data)
+    safe_update(46, contrib_data)
+    safe_update(48, commit_data)
+    safe_update(50, star_data)
+    safe_update(52, follower_data)
+    safe_update(54, loc_data[2])
+    safe_update(55, loc_data[0] + "++")
+    safe_update(56, loc_data[1] + "--")
+
+    # Now only remove the spaces from the specific updated content
+    xml_string = svg.toxml("utf-8").decode("utf-8")
+
+    # Only remove unwanted spaces between tags in the areas that were updated
+    for index in [5, 44, 46, 48, 50, 52, 54, 55, 56]:
+        tspan_text = str(tspan[index].firstChild.data).strip()
+        xml_string = xml_string.replace(
+            f'<tspan class="valueColor">{tspan[index].firstChild.data}</tspan>',
+            f'<tspan class="valueColor">{tspan_text}</tspan>',
+        )
 
+    # Written through a temporary file, and only when something changed, so
+    # readers never see a partial card and unchanged files keep their mtime.
+    if xml_string == original:
+        debug(f"svg_overwrite: {filename} unchanged")
+        return False
+    write_atomic(filename, xml_string)
     debug(f"svg_overwrite: Finished updating {filename}")
-
-
-def get_repos_updated_since(last_update, owner_affiliation):
-        query = """
-        query($login: String!, $ownerAffiliations: [RepositoryAffiliation]) {
-            user(login: $login) {
-                repositories(first: 100, ownerAffiliations: $ownerAffiliations) {
-                    edges {
-                        node {
-                            nameWithOwner
-                            updatedAt
-                            defaultBranchRef {
-                                target {
-                                    ... on Commit {
-                                        history {
-                                            totalCount
-                                        }
-                                    }
-                                }
-                            }
-                        }
-                    }
-                }
-            }
-        }
-        """
-        variables = {
-                "login": USER_NAME,
-                "ownerAffiliations": owner_affiliation
-        }
-        response = simple_request("get_repos_updated_since", query, variables)
-        json_data = response.json()
-        if "data" not in json_data:
-                if "errors" in json_data:
-                        debug(f"get_repos_updated_since: GraphQL errors: {json_data['errors']}")
-                        raise Exception(f"GraphQL errors in get_repos_updated_since: {json_data['errors']}")
-                else:
-                        debug(f"get_repos_updated_since: Response missing both 'data' and 'errors': {json_data}")
-                        raise Exception("GraphQL response missing both 'data' and 'errors' keys.")
-        updated_repos = []
-        for edge in json_data["data"]["user"]["repositories"]["edges"]:
-                repo = edge["node"]
-                if repo["updatedAt"] > last_update:
-                        updated_repos.append(repo)
-        debug(
-                f"get_repos_updated_since: {len(updated_repos)} repos updated since {last_update}"
+    return True
+
+
+def render_cards(values, ascii_source, meta):
+    """Render ``values`` into both SVG files; returns the files that changed.
+
+    ``values`` holds the formatted svg_overwrite arguments by name. The
+    ASCII art is rendered into files whose stored source key is stale.
+    """
+    changed = []
+    for svg_file in SVG_FILES:
+        art = None
+        if ascii_source and meta["ascii_source"].get(svg_file) != ascii_source["key"]:
+            art = ascii_art(ascii_source)
+        updated, _ = perf_counter(
+            svg_overwrite,
+            svg_file,
+            values["age_data"],
+            values["commit_data"],
+            values["star_data"],
+            values["repo_data"],
+            values["contrib_data"],
+            values["follower_data"],
+            values["loc_data"],
+            art,
+            stage="svg_render",
         )
-        return updated_repos
+        if art is not None:
+            meta["ascii_source"][svg_file] = ascii_source["key"]
+        if updated:
+            changed.append(svg_file)
+    # Kept so a --preflight run that finds nothing changed can re-render
+    # the cards with only a new age.
+    meta["card_values"] = {key: values[key] for key in CARD_VALUES}
+    return changed
+
+
+def card_stats(meta, values=None):
+    """The stats document served as /stats.json by --serve.
+
+    card_server.meta_stats() reads it from ``meta``; a --daemon cycle's
+    ``values`` replace the age, lifetime contributions and LOC with the
+    ones it just fetched.
+    """
+    import card_server
+
+    stats = card_server.meta_stats(meta, CONFIG["user_name"])
+    values = values or {}
+    if "age_data" in values:
+        stats["age"] = values["age_data"]
+    if "contribution_count" in values:
+        stats["contributions"] = values["contribution_count"]
+    if "loc_counts" in values:
+        stats["loc"] = dict(zip(("added", "deleted", "net"), values["loc_counts"]))
+    return stats
+
+
+def card_snapshot(meta, values=None):
+    """Read the rendered cards once and build card_server's in-memory snapshot."""
+    import card_server
+
+    files = {}
+    for svg_file in SVG_FILES:
+        with open(svg_file, "rb") as f:
+            files["/" + os.path.basename(svg_file)] = f.read()
+    return card_server.build_snapshot(files, card_stats(meta, values))
 
 
 def update_cache_for_repo(repo, cache_suffix, comment_size=7):
     owner, repo_name = repo["nameWithOwner"].split("/")
-    updated_data = recursive_loc(owner, repo_name, [], [])
     total_commits = (
         repo["defaultBranchRef"]["target"]["history"]["totalCount"]
         if repo.get("defaultBranchRef")
         else 0
     )
+    updated_data = repo_loc(owner, repo_name, total_commits, [], [])
     current_hash = hashlib.sha256(repo["nameWithOwner"].encode("utf-8")).hexdigest()
-    new_entry = (
-        current_hash
-        + " "
-        + str(total_commits)
-        + " "
-        + str(updated_data[2])
-        + " "
-        + str(updated_data[0])
-        + " "
-        + str(updated_data[1])
-        + "\n"
+    new_entry = cache_row(
+        current_hash,
+        total_commits,
+        updated_data,
+        datetime.datetime.utcnow().date().isoformat(),
     )
     debug(
         f"update_cache_for_repo: Updated {repo['nameWithOwner']} with new entry: {new_entry.strip()}"
@@ -962,11 +2096,15 @@ def update_cache_for_repo(repo, cache_suffix, comment_size=7):
 def incremental_cache_update(
     cache_suffix, owner_affiliation, last_update, comment_size=7, force_cache=False
 ):
-    updated_repos = get_repos_updated_since(last_update, owner_affiliation)
-    filename = os.path.join(
-        CACHE_DIR,
-        hashlib.sha256((USER_NAME + cache_suffix).encode("utf-8")).hexdigest() + ".txt",
-    )
+    """Re-walk the repos with new commits since ``last_update`` and reconcile the rest.
+
+    ``owner_affiliation`` must be the one the cache was built with: its
+    full inventory is fetched, repos updated since ``last_update`` whose
+    commit count differs from their cached row are re-walked, cached repos
+    missing from it become tombstones and every repo in it gets today as
+    its last-seen date.
+    """
+    filename = cache_filename(cache_suffix)
     try:
         with open(filename, "r") as f:
             data = f.readlines()
@@ -978,27 +2116,158 @@ def incremental_cache_update(
             owner_affiliation, comment_size, force_cache, cache_suffix=cache_suffix
         )
 
+    edges = repo_inventory(owner_affiliation, cache_suffix=cache_suffix)
+    updated_repos = [
+        edge["node"] for edge in edges if edge["node"]["updatedAt"] > last_update
+    ]
+    debug(
+        f"incremental_cache_update{cache_suffix}: {len(updated_repos)} of {len(edges)} repos updated since {last_update}"
+    )
     cache_dict = {}
     for line in data[comment_size:]:
         parts = line.split()
         if parts:
             cache_dict[parts[0]] = line
+    seen_on = datetime.datetime.utcnow().date().isoformat()
     for repo in updated_repos:
         current_hash = hashlib.sha256(repo["nameWithOwner"].encode("utf-8")).hexdigest()
+        cached = cache_dict.get(current_hash)
+        commits = (
+            repo["defaultBranchRef"]["target"]["history"]["totalCount"]
+            if repo.get("defaultBranchRef")
+            else 0
+        )
+        if cached and int(cached.split()[1]) == commits:
+            # No new commits on the default branch, so the cached numbers
+            # stand; reconcile_cache() below restores it if it was a tombstone.
+            continue
         new_entry = update_cache_for_repo(repo, cache_suffix, comment_size)
         cache_dict[current_hash] = new_entry
+    seen = {
+        hashlib.sha256(edge["node"]["nameWithOwner"].encode("utf-8")).hexdigest()
+        for edge in edges
+    }
+    tombstoned, restored, dropped = reconcile_cache(cache_dict, seen, seen_on)
+    debug(
+        f"incremental_cache_update{cache_suffix}: {tombstoned} tombstoned, {restored} restored, {dropped} dropped"
+    )
     comment_block = data[:comment_size] if len(data) >= comment_size else []
     new_cache_lines = comment_block + list(cache_dict.values())
     with open(filename, "w") as f:
         f.writelines(new_cache_lines)
-    loc_add, loc_del = 0, 0
-    for line in new_cache_lines[comment_size:]:
+    loc_add, loc_del = cache_totals(new_cache_lines[comment_size:])
+    debug(
+        f"incremental_cache_update{cache_suffix}: Updated cache. Total LOC added: {loc_add}, deleted: {loc_del}"
+    )
+    return [loc_add, loc_del, loc_add - loc_del, True]
+
+
+def verify_loc_cache(cache_suffix, meta, comment_size=7):
+    """Re-walk a rotating sample of cached repos and repair entries that drifted.
+
+    One inventory query per 60 repos first repairs every entry whose commit
+    count no longer matches and adds repos missing from the cache. Repos
+    whose count matches are then re-walked in hash order from where the
+    previous run stopped, so consecutive runs cover the whole cache. The
+    sample grows while re-walks keep finding wrong entries and shrinks back
+    towards VERIFY_MIN_RATE when they do not. Progress is kept in
+    meta["verification"]. Returns the LOC totals like incremental_cache_update.
+    """
+    state = meta["verification"]
+    state.setdefault("rate", VERIFY_MIN_RATE)
+    state.setdefault("cursor", "")
+    state.setdefault("drift", 0.0)
+    state.setdefault("last_full_pass", None)
+
+    filename = cache_filename(cache_suffix)
+    with open(filename, "r") as f:
+        data = f.readlines()
+    cache_comment = data[:comment_size]
+    entries = {}
+    for line in data[comment_size:]:
         parts = line.split()
         if len(parts) >= 5:
-            loc_add += int(parts[3])
-            loc_del += int(parts[4])
+            entries[parts[0]] = line
+
+    inventory = {}
+    for edge in repo_inventory(ALL_AFFILIATIONS, cache_suffix=cache_suffix):
+        node = edge["node"]
+        commits = (
+            node["defaultBranchRef"]["target"]["history"]["totalCount"]
+            if node["defaultBranchRef"]
+            else 0
+        )
+        repo_hash = hashlib.sha256(node["nameWithOwner"].encode("utf-8")).hexdigest()
+        inventory[repo_hash] = (node["nameWithOwner"], commits)
+
+    seen_on = datetime.datetime.utcnow().date().isoformat()
+    tombstoned, restored, dropped = reconcile_cache(entries, inventory, seen_on)
+
+    def walk(repo_hash):
+        name_with_owner, commits = inventory[repo_hash]
+        if not commits:
+            return cache_row(repo_hash, 0, (0, 0, 0), seen_on)
+        owner, repo_name = name_with_owner.split("/")
+        loc = repo_loc(owner, repo_name, commits, list(entries.values()), cache_comment)
+        return cache_row(repo_hash, commits, loc, seen_on)
+
+    stale = [
+        repo_hash
+        for repo_hash, (_, commits) in inventory.items()
+        if repo_hash not in entries or int(entries[repo_hash].split()[1]) != commits
+    ]
+    for repo_hash in stale:
+        debug(f"verify_loc_cache{cache_suffix}: Repairing {inventory[repo_hash][0]}")
+        entries[repo_hash] = walk(repo_hash)
+
+    candidates = sorted(
+        repo_hash
+        for repo_hash in entries
+        if repo_hash in inventory and repo_hash not in stale and inventory[repo_hash][1]
+    )
+    size = min(len(candidates), max(1, math.ceil(state["rate"] * len(candidates))))
+    start = bisect.bisect_right(candidates, state["cursor"])
+    sample = (candidates[start:] + candidates[:start])[:size]
+    mismatches = 0
+    for repo_hash in sample:
+        entry = walk(repo_hash)
+        if entry.split()[:5] != entries[repo_hash].split()[:5]:
+            debug(
+                f"verify_loc_cache{cache_suffix}: {inventory[repo_hash][0]} drifted: "
+                f"{entries[repo_hash].strip()} -> {entry.strip()}"
+            )
+            mismatches += 1
+            entries[repo_hash] = entry
+    if sample:
+        if start + size >= len(candidates):
+            state["last_full_pass"] = datetime.datetime.utcnow().isoformat() + "Z"
+        state["cursor"] = sample[-1]
+
+    # Smoothed share of sampled entries that were wrong; it sets the next
+    # sample size, between the two rate bounds.
+    observed = mismatches / len(sample) if sample else 0.0
+    state["drift"] = 0.7 * state["drift"] + 0.3 * observed
+    state["rate"] = min(VERIFY_MAX_RATE, max(VERIFY_MIN_RATE, 4 * state["drift"]))
+    state["sampled"] = len(sample)
+    state["repaired"] = len(stale) + mismatches
+    state["coverage"] = (
+        bisect.bisect_right(candidates, state["cursor"]) / len(candidates)
+        if candidates
+        else 1.0
+    )
+    state["verified_at"] = datetime.datetime.utcnow().isoformat() + "Z"
+    state["tombstones"] = sum(is_tombstone(line) for line in entries.values())
+    state["compacted"] = dropped
+
+    write_atomic(filename, "".join(cache_comment + list(entries.values())))
+    loc_add, loc_del = cache_totals(entries.values())
     debug(
-        f"incremental_cache_update{cache_suffix}: Updated cache. Total LOC added: {loc_add}, deleted: {loc_del}"
+        f"verify_loc_cache{cache_suffix}: {tombstoned} rows tombstoned, {restored} restored, "
+        f"{dropped} compacted away"
+    )
+    debug(
+        f"verify_loc_cache{cache_suffix}: {len(stale)} stale entries repaired, "
+        f"{mismatches}/{len(sample)} sampled entries drifted, next rate {state['rate']:.3f}"
     )
     return [loc_add, loc_del, loc_add - loc_del, True]
 
@@ -1006,7 +2275,6 @@ def incremental_cache_update(
 def count_repos_with_commits(owner_affiliation, cursor=None, repos_with_commits=None):
     if repos_with_commits is None:
         repos_with_commits = set()  # Use a set to avoid duplicates
-    query_count("graph_repos_commits")
     query = """
     query ($owner_affiliation: [RepositoryAffiliation], $login: String!, $cursor: String, $userId: ID!) {
         user(login: $login) {
@@ -1034,9 +2302,9 @@ def count_repos_with_commits(owner_affiliation, cursor=None, repos_with_commits=
     }"""
     variables = {
         "owner_affiliation": owner_affiliation,
-        "login": USER_NAME,
+        "login": CONFIG["user_name"],
         "cursor": cursor,
-        "userId": OWNER_ID,  # Use the user's node ID
+        "userId": CONFIG["owner_id"],  # Use the user's node ID
     }
     debug(
         f"count_repos_with_commits: Fetching with cursor {cursor} for affiliation {owner_affiliation}"
@@ -1075,56 +2343,709 @@ def count_repos_with_commits(owner_affiliation, cursor=None, repos_with_commits=
     return len(repos_with_commits)
 
 
+# ----------------------- Query Planner -----------------------
+
+
+def rate_limit_status():
+    query = """
+    query {
+        rateLimit {
+            limit
+            cost
+            remaining
+            resetAt
+        }
+    }"""
+    response = simple_request("rate_limit_status", query, {})
+    return response.json()["data"]["rateLimit"]
+
+
+def graphql_points(*page_sizes):
+    """Points GitHub charges for one query with nested connections.
+
+    Each connection costs one request per parent node it is fetched for; the
+    total is divided by 100 and rounded, with a minimum of one point.
+    """
+    requests_needed, parents = 0, 1
+    for page_size in page_sizes:
+        requests_needed += parents
+        parents *= page_size
+    return max(1, round(requests_needed / 100))
+
+
+def pages(count, page_size=100):
+    return max(1, -(-count // page_size))
+
+
+def walk_pages(commits):
+    """History pages recursive_loc needs for a repo; none if the git mirror counts it."""
+    return 0 if uses_git_mirror(commits) else pages(commits)
+
+
+def plan_run(created_at, last_update, cache_suffix="_all", comment_size=7):
+    """Estimate requests, points and wall time for full and incremental runs."""
+    edges = repo_inventory(ALL_AFFILIATIONS, cache_suffix=cache_suffix)
+    rate = rate_limit_status()
+
+    cached = {}
+    try:
+        with open(cache_filename(cache_suffix), "r") as f:
+            for line in f.readlines()[comment_size:]:
+                parts = line.split()
+                if len(parts) >= 5:
+                    cached[parts[0]] = int(parts[1])
+    except FileNotFoundError:
+        debug(f"plan_run{cache_suffix}: No cache file; every repo needs a walk.")
+
+    repos = {"new": [], "changed": [], "unchanged": [], "empty": []}
+    owned = 0
+    incremental_walks = 0
+    for edge in edges:
+        node = edge["node"]
+        commits = (
+            node["defaultBranchRef"]["target"]["history"]["totalCount"]
+            if node["defaultBranchRef"]
+            else 0
+        )
+        repo_hash = hashlib.sha256(node["nameWithOwner"].encode("utf-8")).hexdigest()
+        if not commits:
+            status = "empty"
+        elif repo_hash not in cached:
+            status = "new"
+        elif cached[repo_hash] != commits:
+            status = "changed"
+        else:
+            status = "unchanged"
+        repos[status].append((node["nameWithOwner"], commits))
+        if node["nameWithOwner"].split("/")[0].lower() == CONFIG["user_name"].lower():
+            owned += 1
+        if status in ("new", "changed") and node["updatedAt"] > last_update:
+            incremental_walks += walk_pages(commits)
+    collaborated = len(edges) - owned
+
+    years = datetime.datetime.utcnow().year - int(created_at[:4]) + 1
+    shared = [
+        ("user_lookup", 1, 1),
+        ("lifetime_contributions", years, years * graphql_points(1)),
+        ("repo_count", 1, graphql_points()),
+        # Org repositories are only re-fetched for orgs whose updatedAt
+        # changed, so only the organization listing is counted.
+        (
+            "contributed_repos",
+            pages(collaborated) + years + pages(owned) + 1,
+            pages(collaborated) * graphql_points(100, 1)
+            + years * graphql_points(100)
+            + pages(owned) * graphql_points(100)
+            + graphql_points(100),
+        ),
+        ("stars", pages(owned), pages(owned) * graphql_points(100)),
+        ("followers", 1, 1),
+    ]
+    if CONFIG["rest_counters"]:
+        # The counters come from REST pages, which cost no GraphQL points.
+        rest = {"repo_count": 0, "stars": pages(owned), "followers": 1}
+        shared = [
+            (stage, rest[stage], 0) if stage in rest else (stage, requests_needed, points)
+            for stage, requests_needed, points in shared
+        ]
+    inventory = pages(len(edges), 60)
+    full_walks = sum(
+        walk_pages(commits) for status in ("new", "changed", "unchanged")
+        for _, commits in repos[status]
+    )
+    loc = {
+        "full": (inventory + full_walks, inventory * graphql_points(60, 1) + full_walks),
+        "incremental": (
+            inventory + incremental_walks,
+            inventory * graphql_points(60, 1) + incremental_walks,
+        ),
+    }
+    if not cached:
+        # incremental_cache_update falls back to a full build without a cache.
+        loc["incremental"] = loc["full"]
+
+    spans = TELEMETRY["spans"]
+    per_request = sum(span["latency"] for span in spans) / max(len(spans), 1)
+    totals = {}
+    for mode, (loc_requests, loc_points) in loc.items():
+        requests_needed = sum(entry[1] for entry in shared) + loc_requests
+        points = sum(entry[2] for entry in shared) + loc_points
+        totals[mode] = {
+            "requests": requests_needed,
+            "points": points,
+            "wall_time": requests_needed * per_request,
+        }
+
+    if totals["full"]["points"] <= rate["remaining"]:
+        suggestion = "full"
+        reason = "a complete re-walk fits in the remaining rate-limit budget"
+    elif totals["incremental"]["points"] <= rate["remaining"]:
+        suggestion = "incremental"
+        reason = (
+            f"a full run needs {totals['full']['points']:,} points but only "
+            f"{rate['remaining']:,} remain until {rate['resetAt']}"
+        )
+    else:
+        suggestion = "sharded"
+        reason = (
+            f"split the history walk across "
+            f"{pages(totals['full']['points'], rate['limit'])} rate-limit windows"
+        )
+    return {
+        "repos": {status: len(entries) for status, entries in repos.items()},
+        "largest": sorted(
+            repos["new"] + repos["changed"] + repos["unchanged"], key=lambda r: -r[1]
+        )[:5],
+        "stages": shared,
+        "loc": loc,
+        "totals": totals,
+        "per_request": per_request,
+        "rate_limit": rate,
+        "suggestion": suggestion,
+        "reason": reason,
+    }
+
+
+def print_plan(plan):
+    repos = plan["repos"]
+    print("Planned work per stage:")
+    print("{:<26}{:>10}{:>10}".format("   stage", "requests", "points"))
+    for stage, requests_needed, points in plan["stages"]:
+        print("{:<26}{:>10,}{:>10,}".format("   " + stage, requests_needed, points))
+    for mode, (requests_needed, points) in plan["loc"].items():
+        print(
+            "{:<26}{:>10,}{:>10,}".format(
+                "   loc_cache (" + mode + ")", requests_needed, points
+            )
+        )
+    print(
+        f"\nLOC cache: {repos['new']} repos need a full walk, "
+        f"{repos['changed']} changed since the cache was built, "
+        f"{repos['unchanged'] + repos['empty']} skipped "
+        f"({repos['empty']} empty)"
+    )
+    for name, commits in plan["largest"]:
+        if uses_git_mirror(commits):
+            print(f"   {name}: {commits:,} commits, git mirror")
+        else:
+            print(f"   {name}: {commits:,} commits, {pages(commits)} pages")
+    rate = plan["rate_limit"]
+    print(
+        f"\nRate limit: {rate['remaining']:,}/{rate['limit']:,} points remaining, "
+        f"resets at {rate['resetAt']}"
+    )
+    for mode, entry in plan["totals"].items():
+        print(
+            f"   {mode:<12} {entry['requests']:>8,} requests "
+            f"{entry['points']:>8,} points   ~{entry['wall_time']:.1f} s "
+            f"(at {plan['per_request'] * 1000:.1f} ms/request)"
+        )
+    print(f"\nSuggested mode: {plan['suggestion']} ({plan['reason']})")
+
+
+# Seconds before --daemon retries a group whose refresh failed.
+DAEMON_RETRY = 60
+
+# Seconds between refreshes of each group of metrics in --daemon mode.
+DAEMON_SCHEDULE = {
+    "age": 60 * 60,
+    "followers": 15 * 60,
+    "stars": 15 * 60,  # repo count and stars
+    "contributions": 60 * 60,  # lifetime contributions and contributed repos
+    "loc": 15 * 60,  # LOC of repos updated since the previous check
+}
+
+
+def run_daemon(meta, ascii_source=None, schedule=None, cycles=None, workers=8, on_cycle=None):
+    """Keep the cards fresh, refreshing each metric group on its own schedule.
+
+    Values, the HTTP session and the LOC cache file stay warm between
+    refreshes. Responses are only served from the response cache where
+    they can no longer change (closed contribution windows), since the
+    schedule decides when everything else is refetched. Each cycle runs
+    the due refreshes as concurrent stages and rewrites a card only when
+    its rendered text changed. A group whose refresh raises keeps its
+    previous values and is retried after DAEMON_RETRY seconds; the cards
+    are first rendered once every group has succeeded. A successful LOC
+    refresh advances meta["last_update"] like a one-shot run. ``cycles`` bounds
+    the number of cycles;
+    ``on_cycle`` is called after each one with the set of refreshed groups
+    and the current values.
+    """
+    schedule = dict(DAEMON_SCHEDULE, **(schedule or {}))
+    bypass_response_cache()
+
+    user_info, created_at = user_getter(CONFIG["user_name"])
+    CONFIG["owner_id"] = user_info["id"]
+
+    def refresh_loc():
+        started = datetime.datetime.utcnow().isoformat() + "Z"
+        total_loc = incremental_cache_update(
+            "_all", ALL_AFFILIATIONS, meta["last_update"], 7, False
+        )
+        # Only moved on success, so a failed cycle's window is retried; the
+        # cycle's save_metadata() keeps it across daemon restarts.
+        meta["last_update"] = started
+        return {
+            "loc_data": ["{:,}".format(value) for value in total_loc],
+            "loc_counts": total_loc[:3],
+        }
+
+    def refresh_contributions():
+        now = datetime.datetime.utcnow().isoformat() + "Z"
+        contributed, _ = count_all_contributed_repos(
+            CONFIG["user_name"], CONFIG["owner_id"], created_at, now
+        )
+        contributions = get_lifetime_contributions(CONFIG["user_name"], created_at)
+        return {
+            "commit_data": format_value(contributions, 7),
+            "contrib_data": format_value(contributed, 2),
+            "contrib_repo_count": contributed,
+            "contribution_count": contributions,
+        }
+
+    def refresh_stars():
+        if CONFIG["rest_counters"]:
+            repo_count, star_count = rest_repos_stars(meta)
+        else:
+            repo_count = graph_repos_stars("repos", ["OWNER"])
+            star_count = graph_repos_stars("stars", ["OWNER"])
+        return {
+            "repo_data": format_value(repo_count, 2),
+            "star_data": star_count,
+            "repo_count": repo_count,
+            "star_count": star_count,
+        }
+
+    def refresh_followers():
+        if CONFIG["rest_counters"]:
+            follower_count = rest_follower_count(meta)
+        else:
+            follower_count = follower_getter(CONFIG["user_name"])
+        return {"follower_data": follower_count, "follower_count": follower_count}
+
+    refreshers = {
+        "age": lambda: {"age_data": daily_readme(BIRTHDAY)},
+        "followers": refresh_followers,
+        "stars": refresh_stars,
+        "contributions": refresh_contributions,
+        "loc": refresh_loc,
+    }
+
+    def guarded(group):
+        def refresh():
+            try:
+                return refreshers[group]()
+            except Exception as error:
+                print(f"run_daemon: Refreshing {group} failed: {error!r}")
+                return None
+
+        return refresh
+
+    values = {}
+    next_due = {group: 0.0 for group in refreshers}
+    cycle = 0
+    while cycles is None or cycle < cycles:
+        delay = min(next_due.values()) - time.monotonic()
+        if delay > 0:
+            debug(f"run_daemon: Sleeping {delay:.0f} s")
+            time.sleep(delay)
+        now = time.monotonic()
+        due = [group for group, when in next_due.items() if when <= now]
+        TELEMETRY["spans"].clear()
+        TELEMETRY["stages"].clear()
+        results = run_stages({group: (guarded(group), []) for group in due}, workers)
+        refreshed = set()
+        for group in due:
+            if results[group][0] is None:
+                next_due[group] = now + min(DAEMON_RETRY, schedule[group])
+                continue
+            values.update(results[group][0])
+            next_due[group] = now + schedule[group]
+            refreshed.add(group)
+        failed = [group for group in due if group not in refreshed]
+        if all(key in values for key in CARD_VALUES):
+            changed = render_cards(values, ascii_source, meta)
+            outcome = f"updated {', '.join(changed)}" if changed else "cards unchanged"
+        else:
+            changed, outcome = [], "cards not rendered yet"
+        for key in ("repo_count", "contrib_repo_count", "star_count", "follower_count"):
+            if key in values:
+                meta[key] = values[key]
+        save_metadata(meta)
+        print(
+            f"[{datetime.datetime.utcnow().isoformat(timespec='seconds')}Z] "
+            f"refreshed {', '.join(g for g in due if g in refreshed) or 'nothing'}"
+            + (f" ({', '.join(failed)} failed)" if failed else "")
+            + f": {len(TELEMETRY['spans'])} API calls, {outcome}"
+        )
+        if on_cycle:
+            on_cycle(refreshed, values)
+        cycle += 1
+
+
 if __name__ == "__main__":
-    mode = None
-    if len(sys.argv) > 1:
-        if sys.argv[1] == "--full-cache":
-            mode = "full"
-            debug("Running in full cache mode.")
-        elif sys.argv[1] == "--incremental-update":
-            mode = "incremental"
-            debug("Running in incremental update mode.")
-    if mode is None:
-        print("Usage: python today.py --full-cache | --incremental-update")
-        sys.exit(1)
+    arg_parser = argparse.ArgumentParser(
+        usage="python today.py --full-cache | --incremental-update | --plan | --daemon [options]"
+    )
+    mode_group = arg_parser.add_mutually_exclusive_group(required=True)
+    mode_group.add_argument(
+        "--full-cache", dest="mode", action="store_const", const="full"
+    )
+    mode_group.add_argument(
+        "--incremental-update", dest="mode", action="store_const", const="incremental"
+    )
+    mode_group.add_argument(
+        "--plan",
+        dest="mode",
+        action="store_const",
+        const="plan",
+        help="only run inventory queries and print the estimated cost of a run",
+    )
+    mode_group.add_argument(
+        "--daemon",
+        dest="mode",
+        action="store_const",
+        const="daemon",
+        help="keep running, refreshing each metric on its own schedule",
+    )
+    arg_parser.add_argument(
+        "--refresh",
+        metavar="GROUP=SECONDS",
+        action="append",
+        default=[],
+        help="override a --daemon refresh interval; groups: " + ", ".join(DAEMON_SCHEDULE),
+    )
+    arg_parser.add_argument(
+        "--daemon-cycles",
+        metavar="N",
+        type=int,
+        help="stop --daemon after N refresh cycles",
+    )
+    arg_parser.add_argument(
+        "--serve",
+        metavar="[HOST:]PORT",
+        help="with --daemon, serve the cards and /stats.json over HTTP from memory",
+    )
+    arg_parser.add_argument(
+        "--report", metavar="PATH", help="write a JSON run report with request spans"
+    )
+    arg_parser.add_argument(
+        "--prom-textfile",
+        metavar="PATH",
+        help="write per-stage and per-repo metrics in Prometheus textfile format",
+    )
+    arg_parser.add_argument(
+        "--profile",
+        metavar="DIR",
+        help="profile each stage with cProfile and tracemalloc, writing reports to DIR",
+    )
+    arg_parser.add_argument(
+        "--profile-top",
+        metavar="N",
+        type=int,
+        default=25,
+        help="number of hotspots listed per stage report (default: 25)",
+    )
+    arg_parser.add_argument(
+        "--profile-pstats",
+        metavar="PATH",
+        help="also write all stages combined as a pstats file (requires --profile)",
+    )
+    arg_parser.add_argument(
+        "--record-fixtures",
+        metavar="PATH",
+        help="append every successful GraphQL response to PATH for offline replay",
+    )
+    ascii_group = arg_parser.add_argument_group(
+        "ascii art",
+        "render an image into the ASCII art block of both SVGs; the block is only "
+        "regenerated when the image or its settings change (defaults: ascii_gen.py)",
+    )
+    ascii_group.add_argument("--ascii-image", metavar="PATH")
+    ascii_group.add_argument("--ascii-width", type=int)
+    ascii_group.add_argument("--ascii-height", type=int)
+    ascii_group.add_argument("--ascii-density", type=int)
+    ascii_group.add_argument("--ascii-brightness", type=float)
+    ascii_group.add_argument("--ascii-contrast", type=float)
+    ascii_group.add_argument("--ascii-invert", action="store_true", default=None)
+    git_group = arg_parser.add_argument_group(
+        "git mirror",
+        "count LOC of large repos from local bare clones instead of GraphQL history pages",
+    )
+    git_group.add_argument("--git-mirror", metavar="DIR", help="directory of bare clones")
+    git_group.add_argument(
+        "--git-mirror-threshold",
+        metavar="N",
+        type=int,
+        default=CONFIG["git_mirror_threshold"],
+        help="use the mirror for repos with at least N commits (default: %(default)s)",
+    )
+    git_group.add_argument(
+        "--git-author",
+        metavar="PATTERN",
+        action="append",
+        default=[],
+        help="git log --author pattern (commit name or email) for my commits; "
+        "repeatable, required with --git-mirror",
+    )
+    git_group.add_argument(
+        "--git-remote",
+        metavar="URL",
+        default=CONFIG["git_remote"],
+        help="base URL repos are cloned from (default: %(default)s)",
+    )
+    arg_parser.add_argument(
+        "--verify",
+        action="store_true",
+        help="with --incremental-update, repair drifted LOC cache entries and "
+        "re-walk a rotating sample of the rest",
+    )
+    arg_parser.add_argument(
+        "--preflight",
+        action="store_true",
+        help="with --incremental-update, exit after one query when nothing "
+        "shown on the cards changed since the last run",
+    )
+    arg_parser.add_argument(
+        "--rest-counters",
+        action="store_true",
+        help="read followers, repos and stars with conditional REST requests "
+        "(ETags kept in meta.json); ACCESS_TOKEN must belong to USER_NAME",
+    )
+    arg_parser.add_argument(
+        "--no-response-cache",
+        action="store_true",
+        help="always query the API instead of reusing cached responses",
+    )
+    arg_parser.add_argument(
+        "--response-cache-size",
+        metavar="BYTES",
+        type=int,
+        default=RESPONSE_CACHE["max_bytes"],
+        help="size bound of cache/responses (default: %(default)s)",
+    )
+    arg_parser.add_argument(
+        "--stage-workers",
+        metavar="N",
+        type=int,
+        default=8,
+        help="threads for running independent stages concurrently (default: %(default)s; 1 with --profile)",
+    )
+    args = arg_parser.parse_args()
+    if args.git_mirror and not args.git_author:
+        arg_parser.error(
+            "--git-mirror requires --git-author: git log matches commit names "
+            "and emails, not GitHub logins"
+        )
+    configure()
+    RESPONSE_CACHE["enabled"] = not args.no_response_cache
+    RESPONSE_CACHE["max_bytes"] = args.response_cache_size
+    CONFIG["git_mirror"] = args.git_mirror
+    CONFIG["git_mirror_threshold"] = args.git_mirror_threshold
+    CONFIG["git_authors"] = args.git_author
+    CONFIG["git_remote"] = args.git_remote
+    CONFIG["rest_counters"] = args.rest_counters
+    FIXTURE_LOG = args.record_fixtures
+    if args.profile and args.mode == "daemon":
+        arg_parser.error("--profile cannot be used with --daemon")
+    if args.profile_pstats and not args.profile:
+        arg_parser.error("--profile-pstats requires --profile")
+    if args.serve and args.mode != "daemon":
+        arg_parser.error("--serve requires --daemon")
+    if args.verify and args.mode != "incremental":
+        arg_parser.error("--verify requires --incremental-update")
+    if args.preflight and args.mode != "incremental":
+        arg_parser.error("--preflight requires --incremental-update")
+    PROFILE["enabled"] = bool(args.profile)
+    PROFILE["top"] = args.profile_top
+    mode = args.mode
+    debug(f"Running in {mode} mode.")
 
     meta = load_metadata()
     last_update = meta["last_update"]
 
-    print("Calculation times:")
-    (user_info, created_at), user_time = perf_counter(user_getter, USER_NAME)
-    OWNER_ID = user_info["id"]
-    age_data, age_time = perf_counter(daily_readme, datetime.datetime(2002, 9, 19))
+    ascii_source = None
+    if args.ascii_image:
+        ascii_source = ascii_art_source(
+            args.ascii_image,
+            {
+                "width": args.ascii_width,
+                "height": args.ascii_height,
+                "density": args.ascii_density,
+                "invert": args.ascii_invert,
+                "brightness": args.ascii_brightness,
+                "contrast": args.ascii_contrast,
+            },
+        )
 
-    # Fetch lifetime contributions
-    total_contributions, contrib_time = perf_counter(
-        get_lifetime_contributions, USER_NAME, created_at
-    )
+    if mode == "daemon":
+        schedule = {}
+        for entry in args.refresh:
+            group, _, seconds = entry.partition("=")
+            if group not in DAEMON_SCHEDULE or not seconds.isdigit():
+                arg_parser.error(f"--refresh expects GROUP=SECONDS, got {entry!r}")
+            schedule[group] = int(seconds)
+
+        server = None
+        if args.serve:
+            import card_server
+
+            server = card_server.CardServer(card_snapshot(meta))
+            _, url = server.start_in_thread(*card_server.parse_address(args.serve))
+            print(f"Serving cards at {url}")
+
+        def write_reports(refreshed, values):
+            # The HTTP server only ever reads this snapshot, so requests
+            # between cycles cost no API calls and no rendering.
+            if server:
+                server.update(card_snapshot(meta, values))
+            report = run_report(mode)
+            if args.report:
+                write_run_report(args.report, report)
+            if args.prom_textfile:
+                write_prometheus_textfile(args.prom_textfile, report)
 
-    # Fetch counts
-    repo_count, repo_time = perf_counter(graph_repos_stars, "repos", ["OWNER"])
-    contrib_result, contrib_repo_time = perf_counter(
-        count_all_contributed_repos,
-        USER_NAME,
-        OWNER_ID,
-        created_at,
-        datetime.datetime.utcnow().isoformat() + "Z",
-    )
-    contrib_repo_count, contrib_repos = contrib_result
-    star_count, star_time = perf_counter(graph_repos_stars, "stars", ["OWNER"])
-    follower_count, follower_time = perf_counter(follower_getter, USER_NAME)
+        try:
+            run_daemon(
+                meta, ascii_source, schedule, args.daemon_cycles, args.stage_workers,
+                write_reports,
+            )
+        except KeyboardInterrupt:
+            print("Stopped.")
+        sys.exit(0)
 
+    print("Calculation times:")
+    if mode == "plan":
+        (user_info, created_at), _ = perf_counter(
+            user_getter, CONFIG["user_name"], stage="user_lookup"
+        )
+        CONFIG["owner_id"] = user_info["id"]
+        print_plan(plan_run(created_at, last_update))
+        sys.exit(0)
+
+    signals = None
+    if args.preflight:
+        signals, preflight_time = perf_counter(
+            preflight_signals, CONFIG["user_name"], stage="preflight"
+        )
+        if signals == meta["preflight"] and meta["card_values"]:
+            # Nothing a card shows has changed: skip every heavy stage and
+            # only re-render if the age rolled over (or the art changed).
+            values = dict(meta["card_values"], age_data=daily_readme(BIRTHDAY))
+            changed = []
+            if values != meta["card_values"] or (
+                ascii_source
+                and any(
+                    meta["ascii_source"].get(svg_file) != ascii_source["key"]
+                    for svg_file in SVG_FILES
+                )
+            ):
+                changed = render_cards(values, ascii_source, meta)
+                save_metadata(meta)
+            print(
+                f"Preflight: nothing changed since the last run ({preflight_time:.4f} s, 1 request); "
+                + (f"updated {', '.join(changed)}" if changed else "cards unchanged")
+            )
+            report = run_report(mode)
+            if args.report:
+                write_run_report(args.report, report)
+            if args.prom_textfile:
+                write_prometheus_textfile(args.prom_textfile, report)
+            sys.exit(0)
+        # Something changed, so the cached inventories may be stale: the
+        # cards must show what the stored signals describe, or the next
+        # preflight would match them and keep the stale cards.
+        bypass_response_cache()
+
+    def lookup_user():
+        user_info, created_at = user_getter(CONFIG["user_name"])
+        CONFIG["owner_id"] = user_info["id"]
+        return created_at
+
+    # Each stage lists the stages whose results it takes; everything that
+    # needs the owner id or account creation date waits for user_lookup.
+    now = datetime.datetime.utcnow().isoformat() + "Z"
+    stages = {
+        "user_lookup": (lookup_user, []),
+        "age": (lambda: daily_readme(BIRTHDAY), []),
+        "lifetime_contributions": (
+            lambda created_at: get_lifetime_contributions(
+                CONFIG["user_name"], created_at
+            ),
+            ["user_lookup"],
+        ),
+        "repo_count": (
+            lambda created_at: graph_repos_stars("repos", ["OWNER"]),
+            ["user_lookup"],
+        ),
+        "contributed_repos": (
+            lambda created_at: count_all_contributed_repos(
+                CONFIG["user_name"], CONFIG["owner_id"], created_at, now
+            ),
+            ["user_lookup"],
+        ),
+        "stars": (
+            lambda created_at: graph_repos_stars("stars", ["OWNER"]),
+            ["user_lookup"],
+        ),
+        "followers": (lambda: follower_getter(CONFIG["user_name"]), []),
+    }
+    if CONFIG["rest_counters"]:
+        # One walk over the conditional /user/repos pages answers both counters.
+        stages["rest_repos"] = (lambda: rest_repos_stars(meta), [])
+        stages["repo_count"] = (lambda counts: counts[0], ["rest_repos"])
+        stages["stars"] = (lambda counts: counts[1], ["rest_repos"])
+        stages["followers"] = (lambda: rest_follower_count(meta), [])
     # Update cache for all repos (owned + contributed)
-    all_affiliations = ["OWNER", "COLLABORATOR", "ORGANIZATION_MEMBER"]
-    # in __main__
     if mode == "full":
-        total_loc, total_loc_time = perf_counter(
-            loc_query, all_affiliations, 7, True, None, [], "_all"
+        stages["loc_cache"] = (
+            lambda created_at: loc_query(ALL_AFFILIATIONS, 7, True, None, [], "_all"),
+            ["user_lookup"],
         )
     else:
-        total_loc, total_loc_time = perf_counter(
-            incremental_cache_update, "_all", ["OWNER"], last_update, 7, False
+        stages["loc_cache"] = (
+            lambda created_at: incremental_cache_update(
+                "_all", ALL_AFFILIATIONS, last_update, 7, False
+            ),
+            ["user_lookup"],
         )
+        if args.verify:
+            stages["loc_verify"] = (
+                lambda total_loc: verify_loc_cache("_all", meta, 7),
+                ["loc_cache"],
+            )
+
+    if ascii_source:
+        if any(
+            meta["ascii_source"].get(svg_file) != ascii_source["key"]
+            for svg_file in SVG_FILES
+        ):
+            stages["ascii_art"] = (lambda: ascii_art(ascii_source), [])
+
+    # Stages share the process-wide profiler and tracemalloc, so they are
+    # only profiled one at a time.
+    workers = 1 if PROFILE["enabled"] else args.stage_workers
+    # Taken before any stage runs, so repos updated during this run are
+    # picked up again by the next incremental update.
+    run_started_at = datetime.datetime.utcnow().isoformat() + "Z"
+    run_start = time.perf_counter()
+    results = run_stages(stages, workers)
+    run_time = time.perf_counter() - run_start
+    path, path_time = critical_path(stages, results)
+
+    created_at, user_time = results["user_lookup"]
+    age_data, age_time = results["age"]
+    total_contributions, contrib_time = results["lifetime_contributions"]
+    repo_count, repo_time = results["repo_count"]
+    (contrib_repo_count, contrib_repos), contrib_repo_time = results["contributed_repos"]
+    star_count, star_time = results["stars"]
+    follower_count, follower_time = results["followers"]
+    total_loc, total_loc_time = results.get("loc_verify", results["loc_cache"])
+    if "rest_repos" in results:
+        # Both counters were read from the same REST pages.
+        repo_time += results["rest_repos"][1]
+        star_time += results["rest_repos"][1]
 
     # Format data
     repo_data = formatter("my repositories", repo_time, repo_count, 2)
@@ -1140,34 +3061,29 @@ if __name__ == "__main__":
         total_loc[index] = "{:,}".format(total_loc[index])
 
     # Overwrite SVG files
-    svg_overwrite(
-        "dark_mode.svg",
-        age_data,
-        total_contributions_formatted,
-        star_data,
-        repo_data,
-        contrib_data,
-        follower_data,
-        total_loc,
-    )
-    svg_overwrite(
-        "light_mode.svg",
-        age_data,
-        total_contributions_formatted,
-        star_data,
-        repo_data,
-        contrib_data,
-        follower_data,
-        total_loc,
-    )
-
-    new_timestamp = datetime.datetime.utcnow().isoformat() + "Z"
-    if mode == "full":
-        meta["last_update"] = new_timestamp
+    render_cards(
+        {
+            "age_data": age_data,
+            "commit_data": total_contributions_formatted,
+            "star_data": star_data,
+            "repo_data": repo_data,
+            "contrib_data": contrib_data,
+            "follower_data": follower_data,
+            "loc_data": total_loc,
+        },
+        ascii_source,
+        meta,
+    )
+
+    # Every stage (including loc_verify with --verify) succeeded, so the
+    # next incremental update only needs repos updated after this run began.
+    meta["last_update"] = run_started_at
     meta["repo_count"] = repo_count
     meta["contrib_repo_count"] = contrib_repo_count
     meta["star_count"] = star_count
     meta["follower_count"] = follower_count
+    if signals is not None:
+        meta["preflight"] = signals
     save_metadata(meta)
 
     # Print metrics
@@ -1180,14 +3096,64 @@ if __name__ == "__main__":
         + contrib_repo_time
     )
     print(
-        "\033[F" * 8,
-        "{:<21}".format("Total function time:"),
+        "{:<23}".format("Total function time:"),
         "{:>11}".format("%.4f" % total_func_time),
         " s",
     )
-    print("Total GitHub GraphQL API calls:", "{:>3}".format(sum(QUERY_COUNT.values())))
-    for funct_name, count in QUERY_COUNT.items():
-        print("{:<28}".format("   " + funct_name + ":"), "{:>6}".format(count))
+    print(
+        "{:<23}".format("Stage wall time:"),
+        "{:>11}".format("%.4f" % run_time),
+        " s",
+    )
+    print(
+        "Critical path:",
+        " -> ".join(path),
+        "({:.4f} s of {:.4f} s summed over all stages)".format(
+            path_time, sum(elapsed for _, elapsed in results.values())
+        ),
+    )
+    report = run_report(mode)
+    report["critical_path"] = {"stages": path, "seconds": path_time}
+    report["stage_wall_time"] = run_time
+    print(
+        "Total GitHub GraphQL API calls:",
+        "{:>3}".format(report["totals"]["requests"]),
+        f"({report['totals']['cost']} points, {report['totals']['bytes']:,} bytes)",
+    )
+    print(
+        "Response cache:",
+        f"{RESPONSE_CACHE['hits']} hits, {RESPONSE_CACHE['misses']} misses,",
+        f"{RESPONSE_CACHE['coalesced']} coalesced",
+    )
+    if "loc_verify" in results:
+        verification = meta["verification"]
+        print(
+            "LOC cache verification:",
+            f"{verification['sampled']} repos re-walked,",
+            f"{verification['repaired']} entries repaired,",
+            f"{verification['coverage']:.0%} of this pass covered,",
+            f"{verification['tombstones']} tombstones,",
+            f"next sample rate {verification['rate']:.1%}",
+        )
+    if CONFIG["rest_counters"]:
+        rest_spans = [s for s in TELEMETRY["spans"] if s["operation"].endswith("_rest")]
+        print(
+            "REST counters:",
+            f"{len(rest_spans)} requests,",
+            f"{sum(s['status'] == 304 for s in rest_spans)} not modified",
+        )
+    for funct_name, entry in report["operations"].items():
+        print(
+            "{:<48}".format("   " + funct_name + ":"),
+            "{:>6}".format(entry["requests"]),
+            "{:>10.4f} s".format(entry["latency"]),
+        )
+    if args.report:
+        write_run_report(args.report, report)
+    if args.prom_textfile:
+        write_prometheus_textfile(args.prom_textfile, report)
+    if args.profile:
+        write_profile_reports(args.profile, args.profile_top, args.profile_pstats)
 
     print("\nage_data:", age_data)
     print("total_contributions_formatted:", total_contributions_formatted)